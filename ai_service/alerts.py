@@ -0,0 +1,180 @@
+"""
+Pipeline d'alertes du service IA CAMEG-CHAIN
+
+Les scorers (évaluation de risque, détection d'anomalies) émettent des
+événements dans une file en mémoire sans jamais attendre la base. Une tâche
+de fond :
+- déduplique les événements par (entity_id, alert_type) sur une fenêtre
+  (ALERT_DEDUP_WINDOW) ;
+- escalade la sévérité si l'événement se répète (ALERT_ESCALATION_COUNT
+  occurrences dans la fenêtre) ou arrive avec une sévérité plus haute ;
+- insère les alertes retenues dans la table alerts avec une seule requête
+  par vidage.
+
+Les entity_id sans entité correspondante sont enregistrés avec entity_id NULL
+(clé étrangère vers entities). Les alertes rattachées à une entité
+incrémentent son nombre d'alertes ouvertes dans le magasin de
+caractéristiques, recalculé périodiquement depuis la table (résolutions).
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import ai_settings
+import entity_features
+from metrics import ALERTS_EVENTS_TOTAL, ALERTS_WRITTEN_TOTAL, ALERTS_QUEUE_DEPTH
+
+try:
+    import psycopg2
+    from psycopg2.extras import execute_values
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    psycopg2 = None
+    execute_values = None
+
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ("low", "medium", "high", "critical")
+SEVERITY_RANK = {severity: i for i, severity in enumerate(SEVERITIES)}
+
+INSERT_ALERTS_SQL = (
+    "INSERT INTO alerts (entity_id, alert_type, severity, message) "
+    "SELECT e.id, v.alert_type, v.severity, v.message "
+    "FROM (VALUES %s) AS v (entity_id, alert_type, severity, message) "
+    "LEFT JOIN entities e ON e.id::text = v.entity_id "
+    "RETURNING entity_id::text"
+)
+
+
+class AlertPipeline:
+    """File d'alertes avec déduplication, escalade et insertion groupée"""
+
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self.connection = None
+        # (entity_id, alert_type) -> [début de fenêtre, occurrences, sévérité émise]
+        self.windows: Dict[Tuple[str, str], List] = {}
+        self.retry: List[Tuple[str, str, str, str]] = []
+        self._writer: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if not ai_settings.ALERTS_ENABLED:
+            return
+        if psycopg2 is None:
+            logger.warning("Alert pipeline disabled - psycopg2 is not installed")
+            return
+        self.queue = asyncio.Queue(maxsize=ai_settings.ALERT_QUEUE_SIZE)
+        self._writer = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+            # Dernier vidage des événements en attente
+            await self._flush(self._drain())
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def emit(self, entity_id: str, alert_type: str, severity: str, message: str) -> None:
+        """Émettre un événement (non bloquant ; abandonné si la file est pleine)"""
+        if self.queue is None:
+            return
+        try:
+            self.queue.put_nowait((entity_id, alert_type, severity, message, time.monotonic()))
+            ALERTS_EVENTS_TOTAL.labels(result="queued").inc()
+        except asyncio.QueueFull:
+            ALERTS_EVENTS_TOTAL.labels(result="dropped").inc()
+
+    def _drain(self) -> List[Tuple]:
+        events = []
+        while self.queue is not None and not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        return events
+
+    async def _run(self) -> None:
+        """Vider la file toutes les ALERT_FLUSH_INTERVAL secondes ou par ALERT_BATCH_SIZE"""
+        while True:
+            events = [await self.queue.get()]
+            deadline = time.monotonic() + ai_settings.ALERT_FLUSH_INTERVAL
+            while len(events) < ai_settings.ALERT_BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    events.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            ALERTS_QUEUE_DEPTH.set(self.queue.qsize())
+            await self._flush(events)
+
+    def deduplicate(self, events: List[Tuple]) -> List[Tuple[str, str, str, str]]:
+        """Retenir les alertes nouvelles ou escaladées"""
+        window = ai_settings.ALERT_DEDUP_WINDOW
+        rows = []
+        for entity_id, alert_type, severity, message, at in events:
+            key = (entity_id, alert_type)
+            state = self.windows.get(key)
+            if state is None or at - state[0] > window:
+                self.windows[key] = [at, 1, severity]
+                rows.append((entity_id, alert_type, severity, message))
+                continue
+
+            state[1] += 1
+            emitted_rank = SEVERITY_RANK[state[2]]
+            rank = SEVERITY_RANK[severity]
+            # Répétition dans la fenêtre : monter d'un niveau toutes les ALERT_ESCALATION_COUNT occurrences
+            if state[1] % ai_settings.ALERT_ESCALATION_COUNT == 0:
+                rank = max(rank, min(emitted_rank + 1, len(SEVERITIES) - 1))
+            if rank > emitted_rank:
+                escalated = SEVERITIES[rank]
+                state[2] = escalated
+                rows.append((
+                    entity_id, alert_type, escalated,
+                    f"{message} (escaladée : {state[1]} occurrences en {int(at - state[0])}s)"
+                ))
+            else:
+                ALERTS_EVENTS_TOTAL.labels(result="deduplicated").inc()
+
+        # Oublier les fenêtres expirées
+        now = time.monotonic()
+        if len(self.windows) > ai_settings.ALERT_QUEUE_SIZE:
+            self.windows = {k: v for k, v in self.windows.items() if now - v[0] <= window}
+        return rows
+
+    async def _flush(self, events: List[Tuple]) -> None:
+        fresh = self.deduplicate(events)
+        rows = self.retry + fresh
+        self.retry = []
+        if not rows:
+            return
+        try:
+            linked = await asyncio.to_thread(self._insert, rows)
+        except Exception as e:
+            logger.error(f"Alert insert failed ({len(rows)} alerts) - {str(e)}")
+            # Une seule nouvelle tentative au vidage suivant pour les nouvelles alertes
+            self.retry = fresh[:ai_settings.ALERT_QUEUE_SIZE]
+            return
+
+        ALERTS_WRITTEN_TOTAL.inc(len(rows))
+        # Seules les alertes rattachées à une entité comptent comme ouvertes :
+        # ce sont celles que la resynchronisation depuis la table retrouve
+        for entity_id in linked:
+            entity_features.feature_store.alert_opened(entity_id)
+
+    def _insert(self, rows: List[Tuple[str, str, str, str]]) -> List[str]:
+        """Insérer un lot d'alertes en une requête ; retourne les entity_id rattachés"""
+        if self.connection is None or self.connection.closed:
+            self.connection = psycopg2.connect(ai_settings.DATABASE_URL, connect_timeout=5)
+        try:
+            with self.connection.cursor() as cursor:
+                returned = execute_values(cursor, INSERT_ALERTS_SQL, rows, page_size=len(rows), fetch=True)
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        return [entity_id for (entity_id,) in returned if entity_id is not None]
+
+
+# Instance globale du pipeline d'alertes
+alert_pipeline = AlertPipeline()
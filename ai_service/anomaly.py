@@ -0,0 +1,267 @@
+"""
+Détection d'anomalies statistique en flux pour le service IA CAMEG-CHAIN
+
+Chaque entité (entity_id) possède un état compact stocké dans des tableaux
+NumPy indexés par un numéro de case :
+- moyenne / variance glissantes (algorithme de Welford)
+- moyenne et variance exponentielles (EWMA)
+- fenêtre circulaire des derniers montants (z-score robuste médiane / MAD)
+
+Les statistiques portent sur log(1 + montant), les montants étant très
+asymétriques. La dispersion est bornée par ANOMALY_MIN_SCALE : un historique
+constant (écart-type et MAD nuls) signale quand même un montant en rupture.
+L'état est sauvegardé dans MODEL_PATH toutes les
+ANOMALY_SNAPSHOT_INTERVAL secondes (hors de la boucle asyncio) et à l'arrêt,
+puis rechargé au démarrage.
+"""
+import asyncio
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import ai_settings
+
+logger = logging.getLogger(__name__)
+
+# Seuil historique conservé : montant absolu suspect
+HIGH_AMOUNT_THRESHOLD = 1000000
+
+# Facteur de cohérence de la MAD avec l'écart-type d'une loi normale
+MAD_SCALE = 0.6745
+
+
+class EntityStateStore:
+    """Stockage des statistiques par entité dans des tableaux contigus"""
+
+    def __init__(self, window: int, capacity: int = 1024):
+        self.window = window
+        self.slots: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.dirty = False
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.mean = np.zeros(capacity, dtype=np.float64)
+        self.m2 = np.zeros(capacity, dtype=np.float64)
+        self.ewma = np.zeros(capacity, dtype=np.float64)
+        self.ewm_var = np.zeros(capacity, dtype=np.float64)
+        self.recent = np.zeros((capacity, self.window), dtype=np.float64)
+
+    def _grow(self) -> None:
+        """Doubler la capacité des tableaux"""
+        capacity = len(self.count) * 2
+        for name in ("count", "mean", "m2", "ewma", "ewm_var"):
+            current = getattr(self, name)
+            grown = np.zeros(capacity, dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, name, grown)
+        recent = np.zeros((capacity, self.window), dtype=np.float64)
+        recent[:len(self.recent)] = self.recent
+        self.recent = recent
+
+    def slot(self, entity_id: str) -> int:
+        """Retourner (et créer si besoin) la case d'une entité"""
+        slot = self.slots.get(entity_id)
+        if slot is None:
+            slot = len(self.slots)
+            if slot >= len(self.count):
+                self._grow()
+            self.slots[entity_id] = slot
+        return slot
+
+    def save(self, path: str) -> None:
+        """
+        Sauvegarder l'état (écriture atomique)
+
+        Le verrou n'est tenu que le temps de copier les tableaux : l'écriture
+        du fichier ne bloque pas les observations.
+        """
+        with self.lock:
+            size = len(self.slots)
+            # Les cases sont attribuées dans l'ordre d'insertion du dictionnaire
+            snapshot = {
+                "entity_ids": np.array(list(self.slots), dtype=str),
+                "count": self.count[:size].copy(),
+                "mean": self.mean[:size].copy(),
+                "m2": self.m2[:size].copy(),
+                "ewma": self.ewma[:size].copy(),
+                "ewm_var": self.ewm_var[:size].copy(),
+                "recent": self.recent[:size].copy()
+            }
+            self.dirty = False
+
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, **snapshot)
+            os.replace(tmp_path, path)
+        except Exception:
+            self.dirty = True
+            raise
+
+    @classmethod
+    def load(cls, path: str, window: int) -> "EntityStateStore":
+        """Recharger l'état sauvegardé (état vide si absent ou incompatible)"""
+        if not os.path.exists(path):
+            return cls(window)
+
+        with np.load(path) as data:
+            entity_ids = data["entity_ids"].tolist()
+            if data["recent"].ndim != 2 or data["recent"].shape[1] != window:
+                logger.warning(f"Anomaly state {path} ignored - window size changed")
+                return cls(window)
+
+            store = cls(window, capacity=max(1024, len(entity_ids)))
+            size = len(entity_ids)
+            store.count[:size] = data["count"]
+            store.mean[:size] = data["mean"]
+            store.m2[:size] = data["m2"]
+            store.ewma[:size] = data["ewma"]
+            store.ewm_var[:size] = data["ewm_var"]
+            store.recent[:size] = data["recent"]
+            store.slots = {entity_id: i for i, entity_id in enumerate(entity_ids)}
+
+        logger.info(f"Anomaly state loaded - {len(store.slots)} entities")
+        return store
+
+
+class AnomalyDetector:
+    """Détecteur d'anomalies par entité"""
+
+    def __init__(self, store: EntityStateStore):
+        self.store = store
+        self.alpha = ai_settings.ANOMALY_EWMA_ALPHA
+        self.min_history = ai_settings.ANOMALY_MIN_HISTORY
+        self.z_threshold = ai_settings.ANOMALY_Z_THRESHOLD
+        self.mad_threshold = ai_settings.ANOMALY_MAD_THRESHOLD
+        self.min_scale = ai_settings.ANOMALY_MIN_SCALE
+        self._snapshot_task: Optional[asyncio.Task] = None
+
+    def observe(self, entity_id: str, amount: float) -> List[Dict]:
+        """
+        Évaluer une transaction par rapport à l'historique de l'entité,
+        puis mettre à jour cet historique
+
+        Retourne la liste des anomalies détectées (éventuellement vide).
+        """
+        anomalies = []
+        if amount > HIGH_AMOUNT_THRESHOLD:
+            anomalies.append({
+                "type": "high_amount",
+                "severity": "high",
+                "description": "Transaction avec montant élevé"
+            })
+
+        value = float(np.log1p(max(amount, 0.0)))
+        store = self.store
+
+        with store.lock:
+            slot = store.slot(entity_id)
+            count = int(store.count[slot])
+
+            if count >= self.min_history:
+                anomalies.extend(self._score(slot, count, value))
+
+            # Welford
+            count += 1
+            delta = value - store.mean[slot]
+            store.mean[slot] += delta / count
+            store.m2[slot] += delta * (value - store.mean[slot])
+            store.count[slot] = count
+
+            # EWMA (moyenne et variance exponentielles)
+            if count == 1:
+                store.ewma[slot] = value
+                store.ewm_var[slot] = 0.0
+            else:
+                diff = value - store.ewma[slot]
+                increment = self.alpha * diff
+                store.ewma[slot] += increment
+                store.ewm_var[slot] = (1 - self.alpha) * (store.ewm_var[slot] + diff * increment)
+
+            # Fenêtre circulaire pour la médiane / MAD
+            store.recent[slot, (count - 1) % store.window] = value
+            store.dirty = True
+
+        return anomalies
+
+    def _score(self, slot: int, count: int, value: float) -> List[Dict]:
+        """Calculer les z-scores d'une valeur avant sa prise en compte"""
+        store = self.store
+        anomalies = []
+
+        # Dispersions bornées : sans plancher, un historique constant ne signalerait jamais rien
+        std = max(np.sqrt(store.m2[slot] / (count - 1)) if count > 1 else 0.0, self.min_scale)
+        if std > 0:
+            z = (value - store.mean[slot]) / std
+            if abs(z) > self.z_threshold:
+                anomalies.append({
+                    "type": "amount_deviation",
+                    "severity": "high" if abs(z) > 2 * self.z_threshold else "medium",
+                    "score": round(float(z), 3),
+                    "description": "Montant inhabituel par rapport à l'historique de l'entité"
+                })
+
+        ewm_std = max(np.sqrt(store.ewm_var[slot]), self.min_scale)
+        if ewm_std > 0:
+            z_ewma = (value - store.ewma[slot]) / ewm_std
+            if abs(z_ewma) > self.z_threshold:
+                anomalies.append({
+                    "type": "recent_trend_deviation",
+                    "severity": "medium",
+                    "score": round(float(z_ewma), 3),
+                    "description": "Montant en rupture avec la tendance récente de l'entité"
+                })
+
+        recent = store.recent[slot, :min(count, store.window)]
+        median = np.median(recent)
+        mad = max(np.median(np.abs(recent - median)), MAD_SCALE * self.min_scale)
+        if mad > 0:
+            robust_z = MAD_SCALE * (value - median) / mad
+            if abs(robust_z) > self.mad_threshold:
+                anomalies.append({
+                    "type": "robust_outlier",
+                    "severity": "high" if abs(robust_z) > 2 * self.mad_threshold else "medium",
+                    "score": round(float(robust_z), 3),
+                    "description": "Montant aberrant (médiane / MAD) sur les dernières transactions"
+                })
+
+        return anomalies
+
+    def save(self) -> None:
+        """Sauvegarder l'état si des observations ont été ajoutées"""
+        if self.store.dirty:
+            self.store.save(state_path())
+
+    async def start(self) -> None:
+        """Démarrer la sauvegarde périodique"""
+        if ai_settings.ANOMALY_SNAPSHOT_INTERVAL > 0:
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+
+    async def stop(self) -> None:
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            self._snapshot_task = None
+        await asyncio.to_thread(self.save)
+
+    async def _snapshot_loop(self) -> None:
+        while True:
+            await asyncio.sleep(ai_settings.ANOMALY_SNAPSHOT_INTERVAL)
+            try:
+                await asyncio.to_thread(self.save)
+            except Exception as e:
+                logger.error(f"Anomaly state snapshot error - {str(e)}")
+
+
+def state_path() -> str:
+    """Chemin du fichier d'état des entités"""
+    return os.path.join(ai_settings.MODEL_PATH, ai_settings.ANOMALY_STATE_FILE)
+
+
+def load_detector() -> AnomalyDetector:
+    """Créer le détecteur à partir de l'état sauvegardé"""
+    return AnomalyDetector(EntityStateStore.load(state_path(), ai_settings.ANOMALY_WINDOW))
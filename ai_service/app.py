@@ -1,20 +1,34 @@
 """
 Service IA pour CAMEG-CHAIN - Scoring et détection automatique des risques
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, validator
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 import uvicorn
+import asyncio
+import json
 import os
 import sys
 import logging
 from datetime import datetime
 
+import numpy as np
+
 # Ajouter le dossier parent au path pour les imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import ai_settings
+import scoring
+import anomaly
+import entity_features
+from registry import model_registry
+from inference import inference_executor
+from coalescer import request_coalescer
+from result_cache import result_cache, fingerprint
+from alerts import alert_pipeline
 
 # Configuration du logging
 logging.basicConfig(
@@ -46,28 +60,19 @@ app.add_middleware(
     allow_headers=["Authorization", "Content-Type", "Accept"],
 )
 
+# Détecteur d'anomalies (état par entité chargé au démarrage)
+anomaly_detector: Optional[anomaly.AnomalyDetector] = None
+
 # Modèles Pydantic pour les requêtes
+# Les valeurs autorisées sont des Literal (scoring.py) : la vérification est
+# compilée par Pydantic au lieu d'un validateur Python exécuté à chaque appel.
 class TransactionData(BaseModel):
     """Données d'une transaction pour l'analyse"""
     amount: float = Field(..., gt=0, description="Montant de la transaction (doit être positif)")
-    currency: str = Field(default="XOF", description="Devise de la transaction")
-    transaction_type: str = Field(..., min_length=1, description="Type de transaction")
+    currency: scoring.CurrencyCode = Field(default="XOF", description="Devise de la transaction")
+    transaction_type: scoring.TransactionType = Field(..., description="Type de transaction")
     entity_id: str = Field(..., min_length=1, description="ID de l'entité")
     description: str = Field(default="", max_length=500, description="Description de la transaction")
-    
-    @validator('currency')
-    def validate_currency(cls, v):
-        allowed_currencies = ['XOF', 'USD', 'EUR', 'GBP', 'CAD']
-        if v not in allowed_currencies:
-            raise ValueError(f'Devise non supportée. Devises autorisées: {allowed_currencies}')
-        return v
-    
-    @validator('transaction_type')
-    def validate_transaction_type(cls, v):
-        allowed_types = ['purchase', 'payment', 'transfer', 'international_transfer', 'cryptocurrency']
-        if v not in allowed_types:
-            raise ValueError(f'Type de transaction non supporté. Types autorisés: {allowed_types}')
-        return v
 
 class RiskAssessmentRequest(BaseModel):
     """Requête d'évaluation de risque"""
@@ -75,18 +80,25 @@ class RiskAssessmentRequest(BaseModel):
     entity_data: Dict = Field(default_factory=dict, description="Données supplémentaires sur l'entité")
 
 class RiskAssessmentResponse(BaseModel):
-    """Réponse d'évaluation de risque"""
+    """
+    Réponse d'évaluation de risque
+
+    Sert au schéma OpenAPI : les résultats produits par le scoring sont
+    renvoyés tels quels, sans nouvelle validation.
+    """
     risk_score: float = Field(..., ge=0.0, le=1.0, description="Score de risque entre 0 et 1")
-    risk_level: str = Field(..., description="Niveau de risque")
+    risk_level: scoring.RiskLevel = Field(..., description="Niveau de risque")
     risk_factors: List[str] = Field(..., description="Facteurs de risque identifiés")
     recommendations: List[str] = Field(..., description="Recommandations basées sur l'analyse")
-    
-    @validator('risk_level')
-    def validate_risk_level(cls, v):
-        allowed_levels = ['low', 'medium', 'high', 'critical']
-        if v not in allowed_levels:
-            raise ValueError(f'Niveau de risque invalide. Niveaux autorisés: {allowed_levels}')
-        return v
+
+class BatchRiskAssessmentRequest(BaseModel):
+    """Requête d'évaluation de risque par lot"""
+    transactions: List[TransactionData] = Field(
+        ...,
+        min_length=1,
+        max_length=ai_settings.BATCH_MAX_TRANSACTIONS,
+        description="Transactions à évaluer"
+    )
 
 @app.on_event("startup")
 async def startup_event():
@@ -97,6 +109,41 @@ async def startup_event():
     # Créer le dossier des modèles s'il n'existe pas
     os.makedirs(ai_settings.MODEL_PATH, exist_ok=True)
     print(f"📁 Dossier des modèles: {ai_settings.MODEL_PATH}")
+    
+    # Recharger l'état du détecteur d'anomalies
+    global anomaly_detector
+    anomaly_detector = anomaly.load_detector()
+    await anomaly_detector.start()
+    print(f"📈 Détecteur d'anomalies: {len(anomaly_detector.store.slots)} entités suivies")
+    
+    # Profils des entités (contexte du scoring)
+    entity_features.feature_store = entity_features.load_feature_store()
+    await entity_features.feature_store.start()
+    print(f"🗂️ Profils d'entités: {len(entity_features.feature_store.slots)} entités")
+    
+    # Charger et préchauffer les modèles actifs
+    await model_registry.start()
+    print(f"🧠 Modèles: {model_registry.current.version_key}")
+    
+    # Démarrer le pool d'inférence (après le registre : les workers chargent le modèle actif)
+    await inference_executor.start()
+    await request_coalescer.start()
+    await result_cache.start()
+    
+    # Pipeline d'alertes (insertions groupées dans la table alerts)
+    await alert_pipeline.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Événement d'arrêt du service IA"""
+    await alert_pipeline.stop()
+    await result_cache.stop()
+    await request_coalescer.stop()
+    await inference_executor.stop()
+    await model_registry.stop()
+    await entity_features.feature_store.stop()
+    if anomaly_detector is not None:
+        await anomaly_detector.stop()
 
 @app.get("/")
 async def root():
@@ -111,17 +158,99 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Vérification de l'état du service IA"""
+    registry_status = model_registry.status()
     return {
         "status": "healthy",
         "service": "ai",
-        "models_loaded": False,  # À implémenter
+        "models_loaded": registry_status["models_loaded"],
+        "models": registry_status["models"],
+        "models_loaded_at": registry_status["loaded_at"],
+        "model_errors": registry_status["errors"],
+        "result_cache": result_cache.stats(),
+        "alerts_queued": alert_pipeline.queue.qsize() if alert_pipeline.queue is not None else None,
         "version": "1.0.0"
     }
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Métriques Prometheus du service IA"""
+    if not ai_settings.ENABLE_METRICS:
+        raise HTTPException(status_code=404, detail="Métriques désactivées")
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.post("/api/v1/models/reload")
+async def reload_models():
+    """Forcer la résolution des versions actives et le rechargement des modèles"""
+    try:
+        changed = await asyncio.to_thread(model_registry.reload)
+    except Exception as e:
+        logger.error(f"Model reload error - {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors du rechargement: {str(e)}")
+    return {"changed": changed, **model_registry.status()}
+
+async def score_transaction(transaction: TransactionData, context: np.ndarray) -> Dict:
+    """
+    Scorer une transaction avec le contexte de son entité : via le coalesceur
+    si activé, sinon directement dans le pool d'inférence
+    """
+    if ai_settings.COALESCE_ENABLED:
+        # Scoring regroupé avec les appels concurrents (résultat identique à un appel isolé)
+        return await request_coalescer.assess(transaction, context)
+    
+    # Modèle actif du registre, sinon simulation
+    columns = await inference_executor.score(scoring.features([transaction], context))
+    risk_score = float(columns["risk_score"][0])
+    entity_features.feature_store.record([transaction.entity_id], [transaction.amount], [risk_score])
+    
+    return {
+        "risk_score": risk_score,
+        "risk_level": scoring.RISK_LEVELS[int(columns["risk_level"][0])],
+        "risk_factors": scoring.decode_mask(int(columns["risk_factors_mask"][0]), scoring.FACTOR_LABELS),
+        "recommendations": scoring.decode_mask(
+            int(columns["recommendations_mask"][0]), scoring.RECOMMENDATION_LABELS
+        )
+    }
+
+def emit_risk_alert(entity_id: str, risk_level: str, risk_score: float) -> None:
+    """Émettre une alerte pour un score de risque élevé ou critique"""
+    if risk_level in ("high", "critical"):
+        alert_pipeline.emit(
+            entity_id, "high_risk_transaction", risk_level,
+            f"Transaction à risque {risk_level} (score {risk_score:.2f})"
+        )
+
+def emit_anomaly_alert(entity_id: str, found: Dict) -> None:
+    """Émettre une alerte pour une anomalie détectée"""
+    alert_pipeline.emit(entity_id, found["type"], found["severity"], found["description"])
+
+async def assess_transaction(transaction: TransactionData) -> Dict:
+    """Évaluer une transaction déjà validée (cache de résultats puis scoring)"""
+    # Contexte de l'entité en O(1) depuis le magasin de caractéristiques
+    context = entity_features.feature_store.context([transaction.entity_id])
+    
+    # Résultat déjà calculé pour cette transaction, ce contexte et cette version de modèle
+    cache_key = None
+    if ai_settings.RESULT_CACHE_ENABLED:
+        context_key = int(scoring.context_factor_masks(np.array([transaction.amount]), context)[0])
+        cache_key = fingerprint(transaction, model_registry.current.version_key, context_key)
+        result = await result_cache.get(cache_key)
+        if result is not None:
+            return result
+    
+    result = await score_transaction(transaction, context[0])
+    # Uniquement pour un scoring effectif : un résultat servi par le cache a déjà été signalé
+    emit_risk_alert(transaction.entity_id, result["risk_level"], result["risk_score"])
+    if cache_key is not None:
+        await result_cache.set(cache_key, result)
+    return result
+
 @app.post("/api/v1/risk-assessment", response_model=RiskAssessmentResponse)
 async def assess_risk(request: RiskAssessmentRequest):
     """
     Évaluer le risque d'une transaction
+    
+    Montant, entité, devise et type sont validés par le schéma de la requête ;
+    le résultat est renvoyé sans nouvelle validation.
     """
     start_time = datetime.utcnow()
     request_id = f"req_{int(start_time.timestamp() * 1000)}"
@@ -130,49 +259,13 @@ async def assess_risk(request: RiskAssessmentRequest):
         # Log de la requête (sans données sensibles)
         logger.info(f"Risk assessment request {request_id} - Entity: {request.transaction.entity_id}, Amount: {request.transaction.amount}, Type: {request.transaction.transaction_type}")
         
-        # Validation des données d'entrée
-        if not request.transaction or not request.transaction.amount:
-            logger.warning(f"Invalid request {request_id} - Missing transaction data")
-            raise HTTPException(status_code=400, detail="Données de transaction manquantes")
-        
-        if request.transaction.amount < 0:
-            logger.warning(f"Invalid request {request_id} - Negative amount: {request.transaction.amount}")
-            raise HTTPException(status_code=400, detail="Montant de transaction invalide")
-        
-        if not request.transaction.entity_id:
-            logger.warning(f"Invalid request {request_id} - Missing entity ID")
-            raise HTTPException(status_code=400, detail="ID d'entité manquant")
-        # Simulation d'un scoring de risque (à remplacer par un vrai modèle)
-        risk_score = simulate_risk_scoring(request.transaction)
-        
-        # Déterminer le niveau de risque
-        if risk_score < ai_settings.RISK_THRESHOLD_LOW:
-            risk_level = "low"
-        elif risk_score < ai_settings.RISK_THRESHOLD_MEDIUM:
-            risk_level = "medium"
-        elif risk_score < ai_settings.RISK_THRESHOLD_HIGH:
-            risk_level = "high"
-        else:
-            risk_level = "critical"
-        
-        # Facteurs de risque identifiés
-        risk_factors = identify_risk_factors(request.transaction)
-        
-        # Recommandations
-        recommendations = generate_recommendations(risk_level, risk_factors)
-        
-        response = RiskAssessmentResponse(
-            risk_score=risk_score,
-            risk_level=risk_level,
-            risk_factors=risk_factors,
-            recommendations=recommendations
-        )
+        result = await assess_transaction(request.transaction)
         
         # Log de la réponse
         processing_time = (datetime.utcnow() - start_time).total_seconds()
-        logger.info(f"Risk assessment completed {request_id} - Score: {risk_score}, Level: {risk_level}, Processing time: {processing_time:.3f}s")
+        logger.info(f"Risk assessment completed {request_id} - Score: {result['risk_score']}, Level: {result['risk_level']}, Processing time: {processing_time:.3f}s")
         
-        return response
+        return JSONResponse(content=result)
         
     except HTTPException:
         raise
@@ -180,23 +273,101 @@ async def assess_risk(request: RiskAssessmentRequest):
         logger.error(f"Risk assessment error {request_id} - {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'évaluation: {str(e)}")
 
+@app.post("/api/v1/risk-assessment/batch")
+async def assess_risk_batch(
+    request: BatchRiskAssessmentRequest,
+    output_format: str = Query("columnar", alias="format", pattern="^(columnar|ndjson)$"),
+    record: bool = Query(True, description="Mettre à jour les profils d'entités (désactiver pour un re-scoring d'historique)")
+):
+    """
+    Évaluer le risque d'un lot de transactions
+
+    Le scoring est vectorisé : une seule passe NumPy pour tout le lot. Les
+    facteurs et recommandations sont retournés sous forme de masques de bits,
+    accompagnés de leur légende. Format "columnar" (une liste par colonne) ou
+    "ndjson" (une ligne par transaction, diffusée par blocs).
+    """
+    start_time = datetime.utcnow()
+    transactions = request.transactions
+
+    try:
+        entity_ids = [t.entity_id for t in transactions]
+        context = entity_features.feature_store.context(entity_ids)
+        matrix = scoring.features(transactions, context)
+        columns = await inference_executor.score(matrix)
+        if record:
+            entity_features.feature_store.record(entity_ids, matrix[:, 0], columns["risk_score"])
+    except Exception as e:
+        logger.error(f"Batch risk assessment error - {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors de l'évaluation: {str(e)}")
+
+    processing_time = (datetime.utcnow() - start_time).total_seconds()
+    logger.info(f"Batch risk assessment completed - Count: {len(transactions)}, Processing time: {processing_time:.3f}s")
+
+    scores = columns["risk_score"].tolist()
+    levels = scoring.level_names(columns["risk_level"].tolist())
+    factor_masks = columns["risk_factors_mask"].tolist()
+    recommendation_masks = columns["recommendations_mask"].tolist()
+
+    if record:
+        # Le re-scoring d'historique (record=false) ne génère pas d'alertes
+        for i in np.flatnonzero(columns["risk_level"] >= scoring.RISK_LEVELS.index("high")).tolist():
+            emit_risk_alert(entity_ids[i], levels[i], scores[i])
+
+    if output_format == "ndjson":
+        def generate_lines():
+            chunk_size = ai_settings.BATCH_NDJSON_CHUNK_SIZE
+            for start in range(0, len(scores), chunk_size):
+                yield "".join(
+                    json.dumps({
+                        "index": i,
+                        "entity_id": entity_ids[i],
+                        "risk_score": scores[i],
+                        "risk_level": levels[i],
+                        "risk_factors_mask": factor_masks[i],
+                        "recommendations_mask": recommendation_masks[i]
+                    }) + "\n"
+                    for i in range(start, min(start + chunk_size, len(scores)))
+                )
+
+        return StreamingResponse(generate_lines(), media_type="application/x-ndjson")
+
+    return {
+        "count": len(scores),
+        "entity_id": entity_ids,
+        "risk_score": scores,
+        "risk_level": levels,
+        "risk_factors_mask": factor_masks,
+        "recommendations_mask": recommendation_masks,
+        "risk_factors_legend": scoring.FACTOR_LABELS,
+        "recommendations_legend": scoring.RECOMMENDATION_LABELS,
+        "processing_time": processing_time
+    }
+
+@app.get("/api/v1/entities/{entity_id}/profile")
+async def get_entity_profile(entity_id: str):
+    """Profil de risque d'une entité (agrégats 1/7/30 jours, alertes ouvertes, dernier score)"""
+    profile = entity_features.feature_store.profile(entity_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Entité inconnue")
+    return profile
+
 @app.post("/api/v1/anomaly-detection")
-async def detect_anomalies(transaction_data: list):
+async def detect_anomalies(transactions: List[TransactionData]):
     """
     Détecter les anomalies dans un ensemble de transactions
+
+    Chaque transaction est comparée à l'historique statistique de son entité
+    (entity_id), qui est ensuite mis à jour. L'état est sauvegardé
+    périodiquement en arrière-plan, pas à chaque requête.
     """
     try:
-        # Simulation de détection d'anomalies
         anomalies = []
         
-        for i, transaction in enumerate(transaction_data):
-            if transaction.get("amount", 0) > 1000000:  # Montant suspect
-                anomalies.append({
-                    "index": i,
-                    "type": "high_amount",
-                    "severity": "high",
-                    "description": "Transaction avec montant élevé"
-                })
+        for i, transaction in enumerate(transactions):
+            for found in anomaly_detector.observe(transaction.entity_id, transaction.amount):
+                anomalies.append({"index": i, "entity_id": transaction.entity_id, **found})
+                emit_anomaly_alert(transaction.entity_id, found)
         
         return {
             "anomalies_detected": len(anomalies),
@@ -206,61 +377,56 @@ async def detect_anomalies(transaction_data: list):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la détection: {str(e)}")
 
-def simulate_risk_scoring(transaction: TransactionData) -> float:
+@app.post("/api/v1/anomaly-detection/stream")
+async def detect_anomalies_stream(request: Request):
     """
-    Simulation d'un scoring de risque (à remplacer par un vrai modèle ML)
-    """
-    base_score = 0.5
-    
-    # Facteurs basés sur le montant
-    if transaction.amount > 1000000:
-        base_score += 0.3
-    elif transaction.amount > 500000:
-        base_score += 0.2
-    elif transaction.amount > 100000:
-        base_score += 0.1
-    
-    # Facteurs basés sur le type de transaction
-    if transaction.transaction_type in ["international_transfer", "cryptocurrency"]:
-        base_score += 0.2
-    
-    # Limiter entre 0 et 1
-    return min(max(base_score, 0.0), 1.0)
+    Détecter les anomalies sur un flux NDJSON de transactions
 
-def identify_risk_factors(transaction: TransactionData) -> list:
-    """
-    Identifier les facteurs de risque
+    Le corps est lu au fil de l'eau et traité par blocs de lignes : la mémoire
+    reste constante quelle que soit la taille du flux. Les anomalies (et les
+    lignes invalides) sont renvoyées en NDJSON dès qu'elles sont trouvées,
+    suivies d'une ligne de synthèse.
     """
-    factors = []
-    
-    if transaction.amount > 1000000:
-        factors.append("Montant élevé")
-    
-    if transaction.transaction_type in ["international_transfer", "cryptocurrency"]:
-        factors.append("Type de transaction à risque")
-    
-    if not transaction.description:
-        factors.append("Description manquante")
-    
-    return factors
+    chunk_size = ai_settings.ANOMALY_STREAM_CHUNK_SIZE
 
-def generate_recommendations(risk_level: str, risk_factors: list) -> list:
-    """
-    Générer des recommandations basées sur le niveau de risque
-    """
-    recommendations = []
-    
-    if risk_level == "high" or risk_level == "critical":
-        recommendations.append("Révision manuelle requise")
-        recommendations.append("Vérification des documents")
-    
-    if "Montant élevé" in risk_factors:
-        recommendations.append("Vérification de la source des fonds")
-    
-    if "Type de transaction à risque" in risk_factors:
-        recommendations.append("Validation des autorisations")
-    
-    return recommendations
+    def process(lines: List[bytes], first_index: int) -> str:
+        output = []
+        for offset, line in enumerate(lines):
+            index = first_index + offset
+            try:
+                transaction = TransactionData(**json.loads(line))
+            except (ValueError, TypeError) as e:
+                output.append(json.dumps({"index": index, "error": str(e)}) + "\n")
+                continue
+            for found in anomaly_detector.observe(transaction.entity_id, transaction.amount):
+                output.append(json.dumps({"index": index, "entity_id": transaction.entity_id, **found}) + "\n")
+                emit_anomaly_alert(transaction.entity_id, found)
+        return "".join(output)
+
+    async def generate():
+        buffer = b""
+        pending: List[bytes] = []
+        processed = 0
+
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            pending.extend(line for line in lines if line.strip())
+            if len(pending) >= chunk_size:
+                yield process(pending, processed)
+                processed += len(pending)
+                pending = []
+
+        if buffer.strip():
+            pending.append(buffer)
+        if pending:
+            yield process(pending, processed)
+            processed += len(pending)
+
+        logger.info(f"Anomaly stream completed - Transactions: {processed}")
+        yield json.dumps({"processed": processed}) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Benchmark de charge et de latence du service IA (en processus, sans réseau).
+
+L'application est démarrée dans le processus courant et appelée via le
+transport ASGI de httpx. Des transactions synthétiques (mélange réaliste de
+devises, types, montants et entités) sont envoyées à :
+- /api/v1/risk-assessment        (une transaction par requête)
+- /api/v1/anomaly-detection      (--anomaly-batch transactions par requête)
+
+Pour chaque niveau de concurrence : débit (requêtes/s), latences p50/p95/p99
+et taux d'erreur. Un niveau avec des réponses en erreur (non 2xx) est marqué
+en échec, sans débit ni latences, et le script retourne 1. Le résultat est
+écrit en JSON ; --baseline compare avec un résultat précédent et retourne 1
+si le débit baisse ou si le p99 augmente de plus de --tolerance.
+
+Usage :
+    python benchmark.py [--concurrency 1 8 32 128] [--requests 2000]
+                        [--output benchmark.json] [--baseline previous.json]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SERVICE_DIR)
+
+# Poids relatifs des devises et types de transaction
+CURRENCY_WEIGHTS = {"XOF": 70, "EUR": 15, "USD": 10, "GBP": 3, "CAD": 2}
+TYPE_WEIGHTS = {
+    "purchase": 45,
+    "payment": 30,
+    "transfer": 15,
+    "international_transfer": 8,
+    "cryptocurrency": 2,
+}
+
+
+def synthetic_transactions(count: int, entities: int, seed: int) -> List[Dict]:
+    """Générer des transactions synthétiques reproductibles"""
+    rng = random.Random(seed)
+    currencies = rng.choices(list(CURRENCY_WEIGHTS), weights=list(CURRENCY_WEIGHTS.values()), k=count)
+    types = rng.choices(list(TYPE_WEIGHTS), weights=list(TYPE_WEIGHTS.values()), k=count)
+    transactions = []
+    for i in range(count):
+        # Montants log-normaux (médiane ~ 150 000, queue jusqu'à plusieurs millions)
+        amount = round(rng.lognormvariate(12, 1.2), 2)
+        transactions.append({
+            "amount": max(amount, 1.0),
+            "currency": currencies[i],
+            "transaction_type": types[i],
+            "entity_id": f"ENT-{rng.randrange(entities):05d}",
+            "description": "" if rng.random() < 0.15 else f"Commande fournisseur {i}",
+        })
+    return transactions
+
+
+class BenchmarkError(Exception):
+    """Scénario inutilisable (réponses en erreur)"""
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Percentile par rang le plus proche"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_level(client, path: str, payloads: List, concurrency: int) -> Dict:
+    """Envoyer toutes les requêtes avec `concurrency` appelants simultanés"""
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def caller():
+        nonlocal next_index, errors
+        while next_index < len(payloads):
+            payload = payloads[next_index]
+            next_index += 1
+            start = time.perf_counter()
+            response = await client.post(path, json=payload)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not response.is_success:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+        "failed": errors > 0,
+        "duration_s": round(elapsed, 3),
+    }
+    if errors:
+        # Des réponses en erreur ne mesurent pas le service : pas de débit ni de latences
+        return {**result, "throughput_rps": None, "p50_ms": None, "p95_ms": None, "p99_ms": None}
+
+    latencies.sort()
+    return {
+        **result,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SERVICE_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def benchmark(args) -> Dict:
+    import httpx
+    from app import app
+    from config import ai_settings
+
+    transactions = synthetic_transactions(args.requests * args.anomaly_batch, args.entities, args.seed)
+    scenarios = {
+        "risk_assessment": (
+            "/api/v1/risk-assessment",
+            [{"transaction": t} for t in transactions[:args.requests]]
+        ),
+        "anomaly_detection": (
+            "/api/v1/anomaly-detection",
+            [
+                transactions[i:i + args.anomaly_batch]
+                for i in range(0, args.requests * args.anomaly_batch, args.anomaly_batch)
+            ]
+        ),
+    }
+
+    # Le transport ASGI n'exécute pas les événements de démarrage / arrêt
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            # Préchauffage (imports paresseux, pool de processus) ; un scénario
+            # déjà en erreur ici arrête le benchmark
+            for name, (path, payloads) in scenarios.items():
+                warmup = await run_level(client, path, payloads[:args.warmup], 1)
+                if name in args.scenarios and warmup["failed"]:
+                    raise BenchmarkError(f"{name} : {warmup['errors']} réponses en erreur au préchauffage")
+
+            results = {}
+            for name in args.scenarios:
+                path, payloads = scenarios[name]
+                results[name] = [
+                    await run_level(client, path, payloads, concurrency)
+                    for concurrency in args.concurrency
+                ]
+                for level in results[name]:
+                    if level["failed"]:
+                        print(
+                            f"{name:<18} c={level['concurrency']:<4} ÉCHEC  "
+                            f"errors={level['errors']}/{level['requests']}",
+                            file=sys.stderr
+                        )
+                        continue
+                    print(
+                        f"{name:<18} c={level['concurrency']:<4} {level['throughput_rps']:>9} req/s  "
+                        f"p50={level['p50_ms']}ms p95={level['p95_ms']}ms p99={level['p99_ms']}ms "
+                        f"errors={level['errors']}",
+                        file=sys.stderr
+                    )
+    finally:
+        await app.router.shutdown()
+
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "requests": args.requests,
+            "anomaly_batch": args.anomaly_batch,
+            "entities": args.entities,
+            "seed": args.seed,
+            "inference_workers": ai_settings.INFERENCE_WORKERS,
+            "coalesce_enabled": ai_settings.COALESCE_ENABLED,
+            "result_cache_enabled": ai_settings.RESULT_CACHE_ENABLED,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Lister les régressions (débit en baisse, p99 en hausse) au-delà de la tolérance"""
+    regressions = []
+    for name, levels in current["results"].items():
+        previous = {level["concurrency"]: level for level in baseline.get("results", {}).get(name, [])}
+        for level in levels:
+            before = previous.get(level["concurrency"])
+            if not before or level.get("failed") or before.get("failed"):
+                continue
+            if level["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+                regressions.append(
+                    f"{name} c={level['concurrency']}: débit {before['throughput_rps']} -> {level['throughput_rps']} req/s"
+                )
+            if level["p99_ms"] > before["p99_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{name} c={level['concurrency']}: p99 {before['p99_ms']} -> {level['p99_ms']} ms"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark du service IA")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128],
+                        help="Niveaux de concurrence")
+    parser.add_argument("--requests", type=int, default=2000, help="Requêtes par niveau")
+    parser.add_argument("--anomaly-batch", type=int, default=20,
+                        help="Transactions par requête de détection d'anomalies")
+    parser.add_argument("--entities", type=int, default=500, help="Nombre d'entités distinctes")
+    parser.add_argument("--seed", type=int, default=42, help="Graine des données synthétiques")
+    parser.add_argument("--warmup", type=int, default=50, help="Requêtes de préchauffage par scénario")
+    parser.add_argument("--scenarios", nargs="+", default=["risk_assessment", "anomaly_detection"],
+                        choices=["risk_assessment", "anomaly_detection"])
+    parser.add_argument("--workers", type=int, help="INFERENCE_WORKERS pour ce benchmark")
+    parser.add_argument("--result-cache", action="store_true",
+                        help="Garder le cache de résultats (les mêmes transactions sont rejouées à chaque niveau)")
+    parser.add_argument("--output", default="benchmark.json", help="Fichier JSON de résultats")
+    parser.add_argument("--baseline", help="Résultat précédent à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Écart relatif toléré avant de signaler une régression")
+    args = parser.parse_args()
+
+    # Isoler l'état persistant (détecteur d'anomalies, modèles) du service réel
+    # avant l'import de config, qui lit l'environnement
+    os.environ.setdefault("MODEL_PATH", tempfile.mkdtemp(prefix="ai-benchmark-"))
+    os.environ.setdefault("MODEL_RELOAD_INTERVAL", "0")
+    if args.workers is not None:
+        os.environ["INFERENCE_WORKERS"] = str(args.workers)
+    if not args.result_cache:
+        os.environ["RESULT_CACHE_ENABLED"] = "False"
+    os.environ.setdefault("ALERTS_ENABLED", "False")
+
+    try:
+        report = asyncio.run(benchmark(args))
+    except BenchmarkError as e:
+        print(f"ÉCHEC {e}", file=sys.stderr)
+        return 1
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Résultats écrits dans {args.output}", file=sys.stderr)
+
+    failed = [
+        f"{name} c={level['concurrency']}"
+        for name, levels in report["results"].items()
+        for level in levels if level["failed"]
+    ]
+    for level in failed:
+        print(f"ÉCHEC {level} : réponses en erreur", file=sys.stderr)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"RÉGRESSION {regression}", file=sys.stderr)
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark du coût CPU de validation par requête d'évaluation de risque.
+
+Compare, pour un même corps JSON et un même résultat de scoring :
+- "legacy"  : validateurs @validator reconstruisant leurs listes à chaque
+              appel, revérifications dans le handler, réponse revalidée
+              (modèle construit puis validé par response_model)
+- "current" : Literal compilés par Pydantic, réponse renvoyée sans
+              revalidation
+
+Usage :
+    python benchmark_validation.py [--iterations 20000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SERVICE_DIR)
+
+from pydantic import BaseModel, Field, validator  # noqa: E402
+
+from app import RiskAssessmentRequest  # noqa: E402
+
+
+class LegacyTransactionData(BaseModel):
+    """Copie du modèle d'origine (validateurs Python par appel)"""
+    amount: float = Field(..., gt=0)
+    currency: str = Field(default="XOF")
+    transaction_type: str = Field(..., min_length=1)
+    entity_id: str = Field(..., min_length=1)
+    description: str = Field(default="", max_length=500)
+
+    @validator('currency')
+    def validate_currency(cls, v):
+        allowed_currencies = ['XOF', 'USD', 'EUR', 'GBP', 'CAD']
+        if v not in allowed_currencies:
+            raise ValueError(f'Devise non supportée. Devises autorisées: {allowed_currencies}')
+        return v
+
+    @validator('transaction_type')
+    def validate_transaction_type(cls, v):
+        allowed_types = ['purchase', 'payment', 'transfer', 'international_transfer', 'cryptocurrency']
+        if v not in allowed_types:
+            raise ValueError(f'Type de transaction non supporté. Types autorisés: {allowed_types}')
+        return v
+
+
+class LegacyRiskAssessmentRequest(BaseModel):
+    transaction: LegacyTransactionData
+    entity_data: Dict = Field(default_factory=dict)
+
+
+class LegacyRiskAssessmentResponse(BaseModel):
+    risk_score: float = Field(..., ge=0.0, le=1.0)
+    risk_level: str
+    risk_factors: List[str]
+    recommendations: List[str]
+
+    @validator('risk_level')
+    def validate_risk_level(cls, v):
+        allowed_levels = ['low', 'medium', 'high', 'critical']
+        if v not in allowed_levels:
+            raise ValueError(f'Niveau de risque invalide. Niveaux autorisés: {allowed_levels}')
+        return v
+
+
+BODY = json.dumps({
+    "transaction": {
+        "amount": 750000.0,
+        "currency": "EUR",
+        "transaction_type": "international_transfer",
+        "entity_id": "ENT-00042",
+        "description": "Règlement fournisseur",
+    },
+    "entity_data": {},
+}).encode("utf-8")
+
+RESULT = {
+    "risk_score": 0.9,
+    "risk_level": "critical",
+    "risk_factors": ["Type de transaction à risque"],
+    "recommendations": ["Révision manuelle requise", "Vérification des documents", "Validation des autorisations"],
+}
+
+
+def legacy_path() -> bytes:
+    request = LegacyRiskAssessmentRequest(**json.loads(BODY))
+    if not request.transaction or not request.transaction.amount:
+        raise ValueError
+    if request.transaction.amount < 0:
+        raise ValueError
+    if not request.transaction.entity_id:
+        raise ValueError
+    response = LegacyRiskAssessmentResponse(**RESULT)
+    # response_model : validation puis sérialisation de la valeur retournée
+    validated = LegacyRiskAssessmentResponse.model_validate(response.model_dump())
+    return json.dumps(validated.model_dump()).encode("utf-8")
+
+
+def current_path() -> bytes:
+    request = RiskAssessmentRequest.model_validate(json.loads(BODY))
+    assert request.transaction.amount
+    return json.dumps(RESULT).encode("utf-8")
+
+
+def measure(func, iterations: int) -> float:
+    """Temps CPU moyen par appel, en microsecondes"""
+    for _ in range(min(iterations, 1000)):
+        func()
+    start = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - start) / iterations * 1_000_000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmark de la validation des requêtes")
+    parser.add_argument("--iterations", type=int, default=20000, help="Appels par chemin")
+    args = parser.parse_args()
+
+    results = {
+        "legacy_us": round(measure(legacy_path, args.iterations), 2),
+        "current_us": round(measure(current_path, args.iterations), 2),
+    }
+    results["current_speedup"] = round(results["legacy_us"] / max(results["current_us"], 1e-6), 2)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,164 @@
+"""
+Regroupement des appels unitaires d'évaluation de risque
+
+Les clients appellent /api/v1/risk-assessment une transaction à la fois. Le
+coalesceur réunit les requêtes concurrentes jusqu'à COALESCE_MAX_BATCH
+transactions ou COALESCE_MAX_DELAY_MS millisecondes, calcule les
+caractéristiques et le scoring en une seule passe vectorisée, puis résout le
+futur de chaque appelant avec son propre résultat. L'API publique ne change
+pas. Si le lot échoue, il est rejoué transaction par transaction : seul
+l'appelant de la transaction fautive reçoit l'erreur. Les lots partagent la
+limite de lots en cours de l'exécuteur d'inférence.
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import entity_features
+import scoring
+from config import ai_settings
+from inference import inference_executor
+from metrics import (
+    COALESCER_REQUESTS_TOTAL, COALESCER_BATCHES_TOTAL,
+    COALESCER_BATCH_SIZE, COALESCING_RATIO
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RequestCoalescer:
+    """Regroupement des transactions unitaires en lots"""
+
+    def __init__(self):
+        self.max_batch = ai_settings.COALESCE_MAX_BATCH
+        self.max_delay = ai_settings.COALESCE_MAX_DELAY_MS / 1000
+        self.queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._dispatches: Dict[asyncio.Task, List[Tuple[object, np.ndarray, asyncio.Future]]] = {}
+        self._requests = 0
+        self._batches = 0
+
+    async def start(self) -> None:
+        self.queue = asyncio.Queue()
+        self._collector = asyncio.create_task(self._collect())
+        logger.info(f"Request coalescer started - Max batch: {self.max_batch}, Max delay: {self.max_delay * 1000:.1f}ms")
+
+    async def stop(self) -> None:
+        if self._collector is not None:
+            self._collector.cancel()
+            self._collector = None
+        # Lots en cours et transactions en file : les appelants reçoivent l'annulation
+        for task, pending in list(self._dispatches.items()):
+            task.cancel()
+            for _, _, future in pending:
+                future.cancel()
+        while self.queue is not None and not self.queue.empty():
+            self.queue.get_nowait()[2].cancel()
+
+    async def assess(self, transaction, context: np.ndarray) -> Dict:
+        """
+        Évaluer une transaction via le lot courant
+
+        `context` est la ligne de contexte de l'entité (CONTEXT_COLUMNS).
+        Retourne risk_score, risk_level, risk_factors et recommendations.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((transaction, context, future))
+        COALESCER_REQUESTS_TOTAL.inc()
+        return await future
+
+    async def _collect(self) -> None:
+        """Constituer les lots selon la taille maximale et le budget de latence"""
+        loop = asyncio.get_running_loop()
+        while True:
+            pending: List[Tuple[object, np.ndarray, asyncio.Future]] = [await self.queue.get()]
+            try:
+                deadline = loop.time() + self.max_delay
+
+                while len(pending) < self.max_batch:
+                    # Vider sans attendre ce qui est déjà en file
+                    if not self.queue.empty():
+                        pending.append(self.queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        pending.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                # run_batch contourne la file de l'exécuteur : prendre sa place
+                # parmi les lots en cours avant d'envoyer le lot au pool
+                await inference_executor._in_flight.acquire()
+            except asyncio.CancelledError:
+                for _, _, future in pending:
+                    future.cancel()
+                raise
+
+            task = asyncio.create_task(self._dispatch(pending))
+            # Référence forte jusqu'à la fin du lot (sinon collectable en cours d'exécution)
+            self._dispatches[task] = pending
+            task.add_done_callback(self._dispatches.pop)
+
+    async def _dispatch(self, pending: List[Tuple[object, np.ndarray, asyncio.Future]]) -> None:
+        """Scorer un lot et résoudre le futur de chaque appelant"""
+        self._requests += len(pending)
+        self._batches += 1
+        COALESCER_BATCHES_TOTAL.inc()
+        COALESCER_BATCH_SIZE.observe(len(pending))
+        COALESCING_RATIO.set(self._requests / self._batches)
+
+        try:
+            await self._score(pending)
+        except Exception as e:
+            if len(pending) == 1:
+                self._fail(pending, e)
+                return
+            # Une transaction invalide ne doit pas faire échouer les autres
+            # appelants : le lot est rejoué transaction par transaction
+            logger.warning(f"Coalesced batch of {len(pending)} failed, scoring items individually - {str(e)}")
+            for item in pending:
+                try:
+                    await self._score([item])
+                except Exception as item_error:
+                    self._fail([item], item_error)
+        finally:
+            inference_executor._in_flight.release()
+
+    @staticmethod
+    def _fail(pending: List[Tuple[object, np.ndarray, asyncio.Future]], error: Exception) -> None:
+        for _, _, future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    @staticmethod
+    async def _score(pending: List[Tuple[object, np.ndarray, asyncio.Future]]) -> None:
+        """Scoring vectorisé d'un lot ; lève une exception sans résoudre aucun futur"""
+        transactions = [item[0] for item in pending]
+        matrix = scoring.features(transactions, np.vstack([item[1] for item in pending]))
+        columns = await inference_executor.run_batch(matrix)
+
+        scores = columns["risk_score"].tolist()
+        entity_features.feature_store.record(
+            [t.entity_id for t in transactions], matrix[:, 0], scores
+        )
+        levels = scoring.level_names(columns["risk_level"].tolist())
+        factor_masks = columns["risk_factors_mask"].tolist()
+        recommendation_masks = columns["recommendations_mask"].tolist()
+
+        for i, (_, _, future) in enumerate(pending):
+            if future.done():
+                continue
+            future.set_result({
+                "risk_score": scores[i],
+                "risk_level": levels[i],
+                "risk_factors": scoring.decode_mask(factor_masks[i], scoring.FACTOR_LABELS),
+                "recommendations": scoring.decode_mask(recommendation_masks[i], scoring.RECOMMENDATION_LABELS),
+            })
+
+
+# Instance globale du coalesceur
+request_coalescer = RequestCoalescer()
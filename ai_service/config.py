@@ -33,11 +33,64 @@ class AISettings:
     ANOMALY_DETECTION_MODEL: str = "anomaly_detection_model.pkl"
     FRAUD_DETECTION_MODEL: str = "fraud_detection_model.pkl"
     
+    # Registre des modèles : "manifest" (MODEL_PATH/MODEL_MANIFEST) ou "database" (table ai_models)
+    MODEL_REGISTRY_SOURCE: str = os.getenv("MODEL_REGISTRY_SOURCE", "manifest")
+    MODEL_MANIFEST: str = os.getenv("MODEL_MANIFEST", "manifest.json")
+    MODEL_RELOAD_INTERVAL: int = int(os.getenv("MODEL_RELOAD_INTERVAL", "30"))  # secondes, 0 = désactivé
+    
+    # Exécuteur d'inférence (pool de processus, 0 = scoring dans le processus courant)
+    INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", str(min(os.cpu_count() or 1, 4))))
+    INFERENCE_MAX_BATCH: int = int(os.getenv("INFERENCE_MAX_BATCH", "256"))
+    INFERENCE_BATCH_WINDOW_MS: float = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "2"))
+    
+    # Regroupement des appels unitaires /api/v1/risk-assessment
+    COALESCE_ENABLED: bool = os.getenv("COALESCE_ENABLED", "True").lower() == "true"
+    COALESCE_MAX_BATCH: int = int(os.getenv("COALESCE_MAX_BATCH", "32"))
+    COALESCE_MAX_DELAY_MS: float = float(os.getenv("COALESCE_MAX_DELAY_MS", "5"))
+    
+    # Magasin de caractéristiques des entités (contexte du scoring)
+    ENTITY_FEATURES_FILE: str = os.getenv("ENTITY_FEATURES_FILE", "entity_features.npz")
+    ENTITY_FEATURES_SNAPSHOT_INTERVAL: int = int(os.getenv("ENTITY_FEATURES_SNAPSHOT_INTERVAL", "60"))  # secondes
+    ENTITY_FEATURES_BOOTSTRAP_FROM_DB: bool = os.getenv("ENTITY_FEATURES_BOOTSTRAP_FROM_DB", "False").lower() == "true"
+    ENTITY_ALERTS_RESYNC_INTERVAL: int = int(os.getenv("ENTITY_ALERTS_RESYNC_INTERVAL", "300"))  # secondes, 0 = désactivé
+    ENTITY_VELOCITY_THRESHOLD: int = int(os.getenv("ENTITY_VELOCITY_THRESHOLD", "20"))  # transactions / jour
+    ENTITY_UNUSUAL_AMOUNT_RATIO: float = float(os.getenv("ENTITY_UNUSUAL_AMOUNT_RATIO", "5"))
+    ENTITY_MIN_HISTORY: int = int(os.getenv("ENTITY_MIN_HISTORY", "5"))
+    
+    # Pipeline d'alertes (table alerts)
+    ALERTS_ENABLED: bool = os.getenv("ALERTS_ENABLED", "True").lower() == "true"
+    ALERT_QUEUE_SIZE: int = int(os.getenv("ALERT_QUEUE_SIZE", "10000"))
+    ALERT_BATCH_SIZE: int = int(os.getenv("ALERT_BATCH_SIZE", "500"))
+    ALERT_FLUSH_INTERVAL: float = float(os.getenv("ALERT_FLUSH_INTERVAL", "1.0"))  # secondes
+    ALERT_DEDUP_WINDOW: int = int(os.getenv("ALERT_DEDUP_WINDOW", "3600"))  # secondes
+    ALERT_ESCALATION_COUNT: int = int(os.getenv("ALERT_ESCALATION_COUNT", "5"))
+    
+    # Cache des résultats de scoring (empreinte de la transaction + version du modèle)
+    RESULT_CACHE_ENABLED: bool = os.getenv("RESULT_CACHE_ENABLED", "True").lower() == "true"
+    RESULT_CACHE_SIZE: int = int(os.getenv("RESULT_CACHE_SIZE", "10000"))
+    RESULT_CACHE_TTL: int = int(os.getenv("RESULT_CACHE_TTL", "3600"))  # secondes
+    RESULT_CACHE_REDIS_URL: str = os.getenv("RESULT_CACHE_REDIS_URL", "")
+    
     # Paramètres de scoring
     RISK_THRESHOLD_LOW: float = 0.3
     RISK_THRESHOLD_MEDIUM: float = 0.6
     RISK_THRESHOLD_HIGH: float = 0.8
     
+    # Évaluation par lot
+    BATCH_MAX_TRANSACTIONS: int = int(os.getenv("BATCH_MAX_TRANSACTIONS", "50000"))
+    BATCH_NDJSON_CHUNK_SIZE: int = int(os.getenv("BATCH_NDJSON_CHUNK_SIZE", "1000"))
+    
+    # Détection d'anomalies en flux (statistiques par entité)
+    ANOMALY_STATE_FILE: str = os.getenv("ANOMALY_STATE_FILE", "anomaly_state.npz")
+    ANOMALY_WINDOW: int = int(os.getenv("ANOMALY_WINDOW", "32"))
+    ANOMALY_MIN_HISTORY: int = int(os.getenv("ANOMALY_MIN_HISTORY", "5"))
+    ANOMALY_EWMA_ALPHA: float = float(os.getenv("ANOMALY_EWMA_ALPHA", "0.1"))
+    ANOMALY_Z_THRESHOLD: float = float(os.getenv("ANOMALY_Z_THRESHOLD", "3.0"))
+    ANOMALY_MAD_THRESHOLD: float = float(os.getenv("ANOMALY_MAD_THRESHOLD", "3.5"))
+    ANOMALY_MIN_SCALE: float = float(os.getenv("ANOMALY_MIN_SCALE", "0.1"))  # dispersion plancher en log(1 + montant), ~10 %
+    ANOMALY_STREAM_CHUNK_SIZE: int = int(os.getenv("ANOMALY_STREAM_CHUNK_SIZE", "500"))
+    ANOMALY_SNAPSHOT_INTERVAL: int = int(os.getenv("ANOMALY_SNAPSHOT_INTERVAL", "60"))  # secondes, 0 = à l'arrêt uniquement
+    
     # Environnement
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
@@ -0,0 +1,323 @@
+"""
+Magasin de caractéristiques des entités pour le service IA CAMEG-CHAIN
+
+Profil de risque par entité (entity_id), maintenu au fil des transactions
+scorées et servi en O(1) depuis des tableaux NumPy indexés par case :
+- nombre et montant des transactions sur 1, 7 et 30 jours (30 compartiments
+  journaliers circulaires par entité)
+- nombre d'alertes ouvertes
+- dernier score de risque
+
+Le magasin est sauvegardé périodiquement dans MODEL_PATH. Sans sauvegarde,
+il peut être initialisé depuis les tables transactions, alerts et
+risk_assessments (ENTITY_FEATURES_BOOTSTRAP_FROM_DB). Les alertes ouvertes
+sont résolues hors du service : leur nombre est recalculé depuis la table
+alerts toutes les ENTITY_ALERTS_RESYNC_INTERVAL secondes.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from config import ai_settings
+from scoring import CONTEXT_COLUMNS
+
+try:
+    import psycopg2
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    psycopg2 = None
+
+logger = logging.getLogger(__name__)
+
+# Nombre de compartiments journaliers conservés
+WINDOW_DAYS = 30
+
+SECONDS_PER_DAY = 86400
+
+# Alertes non résolues par entité
+OPEN_ALERTS_SQL = (
+    "SELECT entity_id::text, COUNT(*) FROM alerts "
+    "WHERE entity_id IS NOT NULL AND status IN ('open', 'investigating') "
+    "GROUP BY 1"
+)
+
+
+def current_day(timestamp: Optional[float] = None) -> int:
+    """Numéro de jour UTC (jours depuis l'époque)"""
+    return int((timestamp if timestamp is not None else time.time()) // SECONDS_PER_DAY)
+
+
+class EntityFeatureStore:
+    """Profils d'entités dans des tableaux contigus"""
+
+    def __init__(self, capacity: int = 1024):
+        self.slots: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.dirty = False
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._alerts_task: Optional[asyncio.Task] = None
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        self.day_counts = np.zeros((capacity, WINDOW_DAYS), dtype=np.int32)
+        self.day_amounts = np.zeros((capacity, WINDOW_DAYS), dtype=np.float64)
+        # Jour auquel correspond chaque compartiment (-1 = vide)
+        self.bucket_days = np.full((capacity, WINDOW_DAYS), -1, dtype=np.int32)
+        self.open_alerts = np.zeros(capacity, dtype=np.int32)
+        self.last_score = np.full(capacity, np.nan, dtype=np.float64)
+        self.last_scored_at = np.zeros(capacity, dtype=np.float64)
+
+    def _grow(self) -> None:
+        """Doubler la capacité des tableaux"""
+        capacity = len(self.open_alerts) * 2
+        for name in ("day_counts", "day_amounts", "bucket_days", "open_alerts", "last_score", "last_scored_at"):
+            current = getattr(self, name)
+            fill = -1 if name == "bucket_days" else (np.nan if name == "last_score" else 0)
+            grown = np.full((capacity,) + current.shape[1:], fill, dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, name, grown)
+
+    def _slot(self, entity_id: str) -> int:
+        slot = self.slots.get(entity_id)
+        if slot is None:
+            slot = len(self.slots)
+            if slot >= len(self.open_alerts):
+                self._grow()
+            self.slots[entity_id] = slot
+        return slot
+
+    def _add(self, slot: int, day: int, count: int, amount: float) -> None:
+        """Ajouter des transactions au compartiment d'un jour"""
+        bucket = day % WINDOW_DAYS
+        if self.bucket_days[slot, bucket] != day:
+            # Compartiment d'un jour sorti de la fenêtre : le réinitialiser
+            self.bucket_days[slot, bucket] = day
+            self.day_counts[slot, bucket] = 0
+            self.day_amounts[slot, bucket] = 0.0
+        self.day_counts[slot, bucket] += count
+        self.day_amounts[slot, bucket] += amount
+
+    def record(self, entity_ids: List[str], amounts: Iterable[float], scores: Iterable[float]) -> None:
+        """Enregistrer des transactions scorées"""
+        now = time.time()
+        day = current_day(now)
+        with self.lock:
+            for entity_id, amount, score in zip(entity_ids, amounts, scores):
+                slot = self._slot(entity_id)
+                self._add(slot, day, 1, float(amount))
+                self.last_score[slot] = score
+                self.last_scored_at[slot] = now
+            self.dirty = True
+
+    def alert_opened(self, entity_id: str, count: int = 1) -> None:
+        with self.lock:
+            self.open_alerts[self._slot(entity_id)] += count
+            self.dirty = True
+
+    def alert_closed(self, entity_id: str, count: int = 1) -> None:
+        with self.lock:
+            slot = self.slots.get(entity_id)
+            if slot is not None:
+                self.open_alerts[slot] = max(0, self.open_alerts[slot] - count)
+                self.dirty = True
+
+    def _window_sums(self, slots: np.ndarray, days: int) -> tuple:
+        """Nombres et montants sur les `days` derniers jours pour des cases"""
+        today = current_day()
+        in_window = self.bucket_days[slots] > today - days
+        counts = np.where(in_window, self.day_counts[slots], 0).sum(axis=1)
+        amounts = np.where(in_window, self.day_amounts[slots], 0.0).sum(axis=1)
+        return counts, amounts
+
+    def context(self, entity_ids: List[str]) -> np.ndarray:
+        """
+        Contexte (n, len(CONTEXT_COLUMNS)) pour le scoring ; nul pour les
+        entités inconnues
+        """
+        matrix = np.zeros((len(entity_ids), len(CONTEXT_COLUMNS)), dtype=np.float64)
+        with self.lock:
+            rows = [i for i, entity_id in enumerate(entity_ids) if entity_id in self.slots]
+            if not rows:
+                return matrix
+            slots = np.fromiter((self.slots[entity_ids[i]] for i in rows), dtype=np.int64, count=len(rows))
+            count_1d, _ = self._window_sums(slots, 1)
+            count_30d, amount_30d = self._window_sums(slots, 30)
+            matrix[rows, 0] = self.open_alerts[slots]
+            matrix[rows, 1] = count_1d
+            matrix[rows, 2] = count_30d
+            matrix[rows, 3] = np.divide(
+                amount_30d, count_30d, out=np.zeros(len(rows)), where=count_30d > 0
+            )
+        return matrix
+
+    def profile(self, entity_id: str) -> Optional[Dict]:
+        """Profil complet d'une entité"""
+        with self.lock:
+            slot = self.slots.get(entity_id)
+            if slot is None:
+                return None
+            slots = np.array([slot])
+            profile = {"entity_id": entity_id}
+            for days in (1, 7, 30):
+                counts, amounts = self._window_sums(slots, days)
+                profile[f"tx_count_{days}d"] = int(counts[0])
+                profile[f"tx_amount_{days}d"] = float(amounts[0])
+            profile["open_alerts"] = int(self.open_alerts[slot])
+            last_score = self.last_score[slot]
+            profile["last_risk_score"] = None if np.isnan(last_score) else float(last_score)
+            profile["last_scored_at"] = float(self.last_scored_at[slot]) or None
+        return profile
+
+    def save(self, path: str) -> None:
+        """Sauvegarder le magasin (copie sous verrou, écriture atomique hors verrou)"""
+        with self.lock:
+            size = len(self.slots)
+            arrays = {
+                name: getattr(self, name)[:size].copy()
+                for name in ("day_counts", "day_amounts", "bucket_days", "open_alerts", "last_score", "last_scored_at")
+            }
+            arrays["entity_ids"] = np.array(list(self.slots), dtype=str)
+            self.dirty = False
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["EntityFeatureStore"]:
+        """Recharger une sauvegarde (None si absente)"""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            entity_ids = data["entity_ids"].tolist()
+            size = len(entity_ids)
+            store = cls(capacity=max(1024, size))
+            for name in ("day_counts", "day_amounts", "bucket_days", "open_alerts", "last_score", "last_scored_at"):
+                getattr(store, name)[:size] = data[name]
+            store.slots = {entity_id: i for i, entity_id in enumerate(entity_ids)}
+        logger.info(f"Entity features loaded - {len(store.slots)} entities")
+        return store
+
+    def bootstrap_from_database(self) -> None:
+        """Initialiser les profils depuis transactions, alerts et risk_assessments"""
+        if psycopg2 is None:
+            raise RuntimeError("psycopg2 n'est pas installé")
+
+        connection = psycopg2.connect(ai_settings.DATABASE_URL, connect_timeout=5)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT entity_id::text, FLOOR(EXTRACT(EPOCH FROM created_at) / 86400)::int AS day, "
+                    "COUNT(*), COALESCE(SUM(amount), 0) FROM transactions "
+                    "WHERE entity_id IS NOT NULL AND created_at >= NOW() - INTERVAL '30 days' "
+                    "GROUP BY 1, 2"
+                )
+                daily = cursor.fetchall()
+                cursor.execute(OPEN_ALERTS_SQL)
+                alerts = cursor.fetchall()
+                cursor.execute(
+                    "SELECT DISTINCT ON (entity_id) entity_id::text, risk_score, "
+                    "EXTRACT(EPOCH FROM created_at) FROM risk_assessments "
+                    "WHERE entity_id IS NOT NULL ORDER BY entity_id, created_at DESC"
+                )
+                last_scores = cursor.fetchall()
+        finally:
+            connection.close()
+
+        with self.lock:
+            for entity_id, day, count, amount in daily:
+                self._add(self._slot(entity_id), day, int(count), float(amount))
+            for entity_id, count in alerts:
+                self.open_alerts[self._slot(entity_id)] = count
+            for entity_id, score, scored_at in last_scores:
+                slot = self._slot(entity_id)
+                self.last_score[slot] = float(score)
+                self.last_scored_at[slot] = float(scored_at)
+            self.dirty = True
+        logger.info(f"Entity features bootstrapped from database - {len(self.slots)} entities")
+
+    def set_open_alerts(self, counts: Dict[str, int]) -> None:
+        """Remplacer le nombre d'alertes ouvertes de toutes les entités"""
+        with self.lock:
+            self.open_alerts[:] = 0
+            for entity_id, count in counts.items():
+                self.open_alerts[self._slot(entity_id)] = count
+            self.dirty = True
+
+    def resync_open_alerts(self) -> None:
+        """Recalculer les alertes ouvertes depuis la table alerts (alertes résolues comprises)"""
+        if psycopg2 is None:
+            raise RuntimeError("psycopg2 n'est pas installé")
+
+        connection = psycopg2.connect(ai_settings.DATABASE_URL, connect_timeout=5)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(OPEN_ALERTS_SQL)
+                counts = {entity_id: int(count) for entity_id, count in cursor.fetchall()}
+        finally:
+            connection.close()
+        self.set_open_alerts(counts)
+
+    async def start(self) -> None:
+        """Démarrer la sauvegarde périodique et la resynchronisation des alertes ouvertes"""
+        if ai_settings.ENTITY_FEATURES_SNAPSHOT_INTERVAL > 0:
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+        if ai_settings.ENTITY_ALERTS_RESYNC_INTERVAL > 0 and psycopg2 is not None:
+            self._alerts_task = asyncio.create_task(self._alerts_loop())
+
+    async def stop(self) -> None:
+        if self._alerts_task is not None:
+            self._alerts_task.cancel()
+            self._alerts_task = None
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            self._snapshot_task = None
+        if self.dirty:
+            await asyncio.to_thread(self.save, features_path())
+
+    async def _snapshot_loop(self) -> None:
+        while True:
+            await asyncio.sleep(ai_settings.ENTITY_FEATURES_SNAPSHOT_INTERVAL)
+            if self.dirty:
+                try:
+                    await asyncio.to_thread(self.save, features_path())
+                except Exception as e:
+                    logger.error(f"Entity features snapshot error - {str(e)}")
+
+    async def _alerts_loop(self) -> None:
+        # Première synchronisation au démarrage : corrige une sauvegarde ancienne
+        while True:
+            try:
+                await asyncio.to_thread(self.resync_open_alerts)
+            except Exception as e:
+                logger.warning(f"Open alerts resync failed - {str(e)}")
+            await asyncio.sleep(ai_settings.ENTITY_ALERTS_RESYNC_INTERVAL)
+
+
+def features_path() -> str:
+    """Chemin de la sauvegarde du magasin"""
+    return os.path.join(ai_settings.MODEL_PATH, ai_settings.ENTITY_FEATURES_FILE)
+
+
+def load_feature_store() -> EntityFeatureStore:
+    """Charger la sauvegarde, sinon initialiser depuis la base si configuré"""
+    store = EntityFeatureStore.load(features_path())
+    if store is not None:
+        return store
+
+    store = EntityFeatureStore()
+    if ai_settings.ENTITY_FEATURES_BOOTSTRAP_FROM_DB:
+        try:
+            store.bootstrap_from_database()
+        except Exception as e:
+            logger.warning(f"Entity features database bootstrap failed - {str(e)}")
+    return store
+
+
+# Instance globale (remplacée au démarrage par `load_feature_store`)
+feature_store = EntityFeatureStore()
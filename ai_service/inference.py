@@ -0,0 +1,193 @@
+"""
+Exécuteur d'inférence du service IA CAMEG-CHAIN
+
+Les prédictions (CPU) sont déportées dans un pool de processus pour ne pas
+bloquer la boucle d'événements. Chaque worker charge le modèle actif une
+seule fois (initialiseur) et ne le recharge que si la version demandée
+change. Les appels concurrents sont regroupés en micro-lots pendant une
+courte fenêtre (INFERENCE_BATCH_WINDOW_MS) pour amortir le coût d'un aller-
+retour vers un worker.
+
+Avec INFERENCE_WORKERS = 0, le scoring s'exécute dans un thread du processus
+courant (développement, tests).
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import scoring
+from config import ai_settings
+from metrics import (
+    INFERENCE_QUEUE_DEPTH, INFERENCE_BATCH_SIZE, INFERENCE_LATENCY,
+    INFERENCE_IN_FLIGHT, INFERENCE_ERRORS_TOTAL
+)
+from registry import ModelSnapshot, load_artifact, model_registry
+
+logger = logging.getLogger(__name__)
+
+# État propre à chaque processus worker
+_worker_model = None
+_worker_version: Optional[str] = None
+
+
+def _load_worker_model(version_key: str, paths: Dict[str, str]) -> None:
+    """Charger (en mmap) le modèle de scoring dans le worker"""
+    global _worker_model, _worker_version
+    path = paths.get("risk_scoring")
+    _worker_model = load_artifact(path) if path else None
+    _worker_version = version_key
+
+
+def _init_worker(version_key: str, paths: Dict[str, str]) -> None:
+    """Initialiseur du pool : chargement unique du modèle actif"""
+    _load_worker_model(version_key, paths)
+
+
+def _score_in_worker(matrix: np.ndarray, version_key: str, paths: Dict[str, str]) -> Dict[str, np.ndarray]:
+    """Scoring d'une matrice dans un worker (rechargement si la version a changé)"""
+    if version_key != _worker_version:
+        _load_worker_model(version_key, paths)
+    return scoring.score_matrix(matrix, _worker_model)
+
+
+class InferenceExecutor:
+    """Pool de processus avec micro-lots"""
+
+    def __init__(self):
+        self.workers = ai_settings.INFERENCE_WORKERS
+        self.max_batch = ai_settings.INFERENCE_MAX_BATCH
+        self.window = ai_settings.INFERENCE_BATCH_WINDOW_MS / 1000
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._dispatches: Dict[asyncio.Task, List[Tuple[np.ndarray, asyncio.Future]]] = {}
+
+    async def start(self) -> None:
+        """Démarrer le pool et la tâche de regroupement"""
+        if self.workers > 0:
+            snapshot = model_registry.current
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(snapshot.version_key, snapshot.paths)
+            )
+        self.queue = asyncio.Queue()
+        self._in_flight = asyncio.Semaphore(max(self.workers, 1) * 2)
+        self._collector = asyncio.create_task(self._collect())
+        logger.info(f"Inference executor started - Workers: {self.workers}, Max batch: {self.max_batch}")
+
+    async def stop(self) -> None:
+        if self._collector is not None:
+            self._collector.cancel()
+            self._collector = None
+        # Micro-lots en cours et demandes en file : les demandeurs reçoivent l'annulation
+        for task, pending in list(self._dispatches.items()):
+            task.cancel()
+            for _, future in pending:
+                future.cancel()
+        while self.queue is not None and not self.queue.empty():
+            self.queue.get_nowait()[1].cancel()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    async def run_batch(self, matrix: np.ndarray) -> Dict[str, np.ndarray]:
+        """Exécuter directement un lot déjà constitué dans le pool (ou dans un thread sans pool)"""
+        snapshot: ModelSnapshot = model_registry.current
+        INFERENCE_BATCH_SIZE.observe(len(matrix))
+        start = time.perf_counter()
+        try:
+            if self.pool is not None:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(
+                    self.pool, _score_in_worker, matrix, snapshot.version_key, snapshot.paths
+                )
+                mode = "process"
+            else:
+                result = await asyncio.to_thread(scoring.score_matrix, matrix, snapshot.get("risk_scoring"))
+                mode = "thread"
+        except Exception:
+            INFERENCE_ERRORS_TOTAL.inc()
+            raise
+        INFERENCE_LATENCY.labels(mode=mode).observe(time.perf_counter() - start)
+        return result
+
+    async def score(self, matrix: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Évaluer une matrice de caractéristiques
+
+        Les petites matrices passent par la file de micro-lots ; les grandes
+        sont découpées en lots de INFERENCE_MAX_BATCH répartis sur le pool.
+        """
+        if len(matrix) >= self.max_batch:
+            chunks = [matrix[i:i + self.max_batch] for i in range(0, len(matrix), self.max_batch)]
+            results = await asyncio.gather(*(self.run_batch(chunk) for chunk in chunks))
+            return {key: np.concatenate([r[key] for r in results]) for key in results[0]}
+
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((matrix, future))
+        INFERENCE_QUEUE_DEPTH.set(self.queue.qsize())
+        return await future
+
+    async def _collect(self) -> None:
+        """Regrouper les demandes pendant la fenêtre de micro-lot puis les envoyer au pool"""
+        loop = asyncio.get_running_loop()
+        while True:
+            pending: List[Tuple[np.ndarray, asyncio.Future]] = [await self.queue.get()]
+            try:
+                rows = len(pending[0][0])
+                deadline = loop.time() + self.window
+
+                while rows < self.max_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self.queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    pending.append(item)
+                    rows += len(item[0])
+
+                INFERENCE_QUEUE_DEPTH.set(self.queue.qsize())
+                await self._in_flight.acquire()
+            except asyncio.CancelledError:
+                for _, future in pending:
+                    future.cancel()
+                raise
+
+            task = asyncio.create_task(self._dispatch(pending))
+            # Référence forte jusqu'à la fin du micro-lot (sinon collectable en cours d'exécution)
+            self._dispatches[task] = pending
+            task.add_done_callback(self._dispatches.pop)
+
+    async def _dispatch(self, pending: List[Tuple[np.ndarray, asyncio.Future]]) -> None:
+        """Scorer un micro-lot et répartir les résultats entre les demandeurs"""
+        INFERENCE_IN_FLIGHT.inc()
+        try:
+            matrix = np.concatenate([item[0] for item in pending])
+            result = await self.run_batch(matrix)
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            INFERENCE_IN_FLIGHT.dec()
+            self._in_flight.release()
+
+        offset = 0
+        for part, future in pending:
+            end = offset + len(part)
+            if not future.done():
+                future.set_result({key: values[offset:end] for key, values in result.items()})
+            offset = end
+
+
+# Instance globale de l'exécuteur
+inference_executor = InferenceExecutor()
@@ -0,0 +1,83 @@
+"""
+Métriques Prometheus du service IA CAMEG-CHAIN
+"""
+from prometheus_client import Counter, Histogram, Gauge
+
+# Exécuteur d'inférence (pool de processus)
+INFERENCE_QUEUE_DEPTH = Gauge(
+    'ai_inference_queue_depth',
+    'Number of scoring requests waiting for a worker batch'
+)
+
+INFERENCE_BATCH_SIZE = Histogram(
+    'ai_inference_batch_size',
+    'Number of rows scored per worker call',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+)
+
+INFERENCE_LATENCY = Histogram(
+    'ai_inference_latency_seconds',
+    'Time spent in a worker scoring call',
+    ['mode']
+)
+
+INFERENCE_IN_FLIGHT = Gauge(
+    'ai_inference_batches_in_flight',
+    'Number of batches currently being scored by the worker pool'
+)
+
+INFERENCE_ERRORS_TOTAL = Counter(
+    'ai_inference_errors_total',
+    'Total number of failed worker scoring calls'
+)
+
+# Regroupement des appels unitaires /api/v1/risk-assessment
+COALESCER_REQUESTS_TOTAL = Counter(
+    'ai_coalescer_requests_total',
+    'Total number of single risk-assessment requests submitted to the coalescer'
+)
+
+COALESCER_BATCHES_TOTAL = Counter(
+    'ai_coalescer_batches_total',
+    'Total number of batches formed by the coalescer'
+)
+
+COALESCER_BATCH_SIZE = Histogram(
+    'ai_coalescer_batch_size',
+    'Number of single requests merged into one batch',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+COALESCING_RATIO = Gauge(
+    'ai_coalescer_ratio',
+    'Average number of single requests per scored batch'
+)
+
+# Cache des résultats d'évaluation de risque
+RESULT_CACHE_REQUESTS_TOTAL = Counter(
+    'ai_result_cache_requests_total',
+    'Total number of result cache lookups',
+    ['result']
+)
+
+RESULT_CACHE_HIT_RATIO = Gauge(
+    'ai_result_cache_hit_ratio',
+    'Result cache hit ratio (0-1)'
+)
+
+# Pipeline d'alertes
+ALERTS_EVENTS_TOTAL = Counter(
+    'ai_alert_events_total',
+    'Total number of alert events by outcome',
+    ['result']
+)
+
+ALERTS_WRITTEN_TOTAL = Counter(
+    'ai_alerts_written_total',
+    'Total number of alerts inserted into the alerts table'
+)
+
+ALERTS_QUEUE_DEPTH = Gauge(
+    'ai_alert_queue_depth',
+    'Number of alert events waiting to be flushed'
+)
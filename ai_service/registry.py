@@ -0,0 +1,245 @@
+"""
+Registre des modèles du service IA CAMEG-CHAIN
+
+Le registre résout la version active de chaque modèle (manifeste JSON dans
+MODEL_PATH ou table ai_models), charge les artefacts en mémoire partagée
+(mmap) puis publie un instantané immuable. Les requêtes lisent l'instantané
+courant une seule fois ; un rechargement construit un nouvel instantané à
+côté et le remplace d'une seule affectation, sans interrompre les requêtes en
+cours.
+
+Formats d'artefacts :
+- .npy / .npz : tableaux NumPy ouverts en mmap_mode="r" (pages partagées
+  entre les workers Uvicorn)
+- .pkl / .joblib : modèles joblib, tableaux internes ouverts en mmap
+"""
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from config import ai_settings
+from scoring import model_scores, FEATURE_COUNT
+
+try:
+    import joblib
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    joblib = None
+
+try:
+    import psycopg2
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    psycopg2 = None
+
+logger = logging.getLogger(__name__)
+
+# Types de modèles gérés et fichier par défaut de chacun
+MODEL_FILES: Dict[str, str] = {
+    "risk_scoring": ai_settings.RISK_SCORING_MODEL,
+    "anomaly_detection": ai_settings.ANOMALY_DETECTION_MODEL,
+    "fraud_detection": ai_settings.FRAUD_DETECTION_MODEL,
+}
+
+
+class ModelSnapshot:
+    """Ensemble immuable de modèles chargés et de leurs versions"""
+
+    def __init__(self, models: Dict[str, object], versions: Dict[str, str], paths: Dict[str, str]):
+        self.models = models
+        self.versions = versions
+        self.paths = paths
+        self.loaded_at = datetime.utcnow()
+
+    @property
+    def version_key(self) -> str:
+        """Identifiant compact des versions actives (clé de cache)"""
+        return ",".join(f"{kind}={version}" for kind, version in sorted(self.versions.items())) or "simulation"
+
+    def get(self, kind: str) -> Optional[object]:
+        return self.models.get(kind)
+
+
+def _file_version(path: str) -> str:
+    """Version implicite d'un fichier sans manifeste : taille et date de modification"""
+    stat = os.stat(path)
+    return f"{int(stat.st_mtime)}-{stat.st_size}"
+
+
+def resolve_from_manifest() -> Dict[str, Dict[str, str]]:
+    """
+    Lire le manifeste MODEL_PATH/MODEL_MANIFEST
+
+    Format : {"risk_scoring": {"version": "1.2.0", "file": "risk_scoring-1.2.0.npy"}, ...}
+    Sans manifeste, les fichiers par défaut présents dans MODEL_PATH sont utilisés.
+    """
+    manifest_path = os.path.join(ai_settings.MODEL_PATH, ai_settings.MODEL_MANIFEST)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        return {
+            kind: {"version": str(entry["version"]), "file": entry["file"]}
+            for kind, entry in manifest.items()
+            if kind in MODEL_FILES
+        }
+
+    resolved = {}
+    for kind, filename in MODEL_FILES.items():
+        path = os.path.join(ai_settings.MODEL_PATH, filename)
+        if os.path.exists(path):
+            resolved[kind] = {"version": _file_version(path), "file": filename}
+    return resolved
+
+
+def resolve_from_database() -> Dict[str, Dict[str, str]]:
+    """Lire la version active de chaque modèle dans la table ai_models"""
+    if psycopg2 is None:
+        raise RuntimeError("psycopg2 n'est pas installé")
+
+    connection = psycopg2.connect(ai_settings.DATABASE_URL, connect_timeout=5)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT model_type, version, file_path FROM ai_models "
+                "WHERE is_active = TRUE AND file_path IS NOT NULL "
+                "ORDER BY updated_at DESC"
+            )
+            rows = cursor.fetchall()
+    finally:
+        connection.close()
+
+    resolved = {}
+    for model_type, version, file_path in rows:
+        # La version la plus récemment activée l'emporte
+        if model_type in MODEL_FILES and model_type not in resolved:
+            resolved[model_type] = {"version": version, "file": file_path}
+    return resolved
+
+
+def resolve_active_versions() -> Dict[str, Dict[str, str]]:
+    """Résoudre les versions actives selon MODEL_REGISTRY_SOURCE"""
+    if ai_settings.MODEL_REGISTRY_SOURCE == "database":
+        try:
+            return resolve_from_database()
+        except Exception as e:
+            logger.warning(f"Model registry database lookup failed, using manifest - {str(e)}")
+    return resolve_from_manifest()
+
+
+def load_artifact(path: str) -> object:
+    """Charger un artefact en mémoire partagée selon son extension"""
+    if path.endswith((".npy", ".npz")):
+        return np.load(path, mmap_mode="r")
+    if joblib is None:
+        raise RuntimeError("joblib n'est pas installé")
+    return joblib.load(path, mmap_mode="r")
+
+
+def warmup(kind: str, model: object) -> None:
+    """Exécuter une prédiction factice pour initialiser le modèle de scoring"""
+    if kind == "risk_scoring":
+        model_scores(model, np.zeros((1, FEATURE_COUNT), dtype=np.float64))
+
+
+class ModelRegistry:
+    """Registre des modèles avec rechargement à chaud"""
+
+    def __init__(self):
+        self.current = ModelSnapshot({}, {}, {})
+        self.listeners: List[Callable[[ModelSnapshot], None]] = []
+        self.errors: Dict[str, str] = {}
+        self._reload_task: Optional[asyncio.Task] = None
+
+    def on_change(self, listener: Callable[[ModelSnapshot], None]) -> None:
+        """Enregistrer une fonction appelée après chaque changement de version"""
+        self.listeners.append(listener)
+
+    def build_snapshot(self, resolved: Dict[str, Dict[str, str]]) -> ModelSnapshot:
+        """Charger et préchauffer les modèles résolus (réutilise ceux inchangés)"""
+        current = self.current
+        models, versions, paths, errors = {}, {}, {}, {}
+
+        for kind, entry in resolved.items():
+            if current.versions.get(kind) == entry["version"] and kind in current.models:
+                models[kind] = current.models[kind]
+                versions[kind] = entry["version"]
+                paths[kind] = current.paths[kind]
+                continue
+
+            path = entry["file"]
+            if not os.path.isabs(path):
+                path = os.path.join(ai_settings.MODEL_PATH, path)
+            try:
+                model = load_artifact(path)
+                warmup(kind, model)
+            except Exception as e:
+                errors[kind] = str(e)
+                logger.error(f"Model {kind} {entry['version']} failed to load from {path} - {str(e)}")
+                # Conserver la version précédente si elle existe
+                if kind in current.models:
+                    models[kind] = current.models[kind]
+                    versions[kind] = current.versions[kind]
+                    paths[kind] = current.paths[kind]
+                continue
+
+            models[kind] = model
+            versions[kind] = entry["version"]
+            paths[kind] = path
+            logger.info(f"Model {kind} {entry['version']} loaded from {path}")
+
+        self.errors = errors
+        return ModelSnapshot(models, versions, paths)
+
+    def reload(self) -> bool:
+        """Recharger si une version active a changé ; retourne True en cas de changement"""
+        resolved = resolve_active_versions()
+        wanted = {kind: entry["version"] for kind, entry in resolved.items()}
+        if wanted == self.current.versions and not self.errors:
+            return False
+
+        snapshot = self.build_snapshot(resolved)
+        if snapshot.versions == self.current.versions:
+            return False
+
+        # Remplacement atomique : les requêtes en cours gardent l'ancien instantané
+        self.current = snapshot
+        for listener in self.listeners:
+            listener(snapshot)
+        logger.info(f"Model registry switched to {snapshot.version_key}")
+        return True
+
+    async def start(self) -> None:
+        """Chargement initial puis surveillance périodique des versions"""
+        await asyncio.to_thread(self.reload)
+        if ai_settings.MODEL_RELOAD_INTERVAL > 0:
+            self._reload_task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+            self._reload_task = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(ai_settings.MODEL_RELOAD_INTERVAL)
+            try:
+                await asyncio.to_thread(self.reload)
+            except Exception as e:
+                logger.error(f"Model registry reload error - {str(e)}")
+
+    def status(self) -> Dict:
+        """État du registre pour /health"""
+        snapshot = self.current
+        return {
+            "models_loaded": bool(snapshot.models),
+            "models": snapshot.versions,
+            "loaded_at": snapshot.loaded_at.isoformat(),
+            "errors": self.errors,
+        }
+
+
+# Instance globale du registre
+model_registry = ModelRegistry()
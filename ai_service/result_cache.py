@@ -0,0 +1,156 @@
+"""
+Cache des résultats d'évaluation de risque
+
+Le scoring est une fonction pure de la transaction et de la version du
+modèle : une transaction rejouée ou dupliquée reçoit le résultat déjà
+calculé. La clé est une empreinte SHA-256 canonique (montant, devise, type,
+entité, description) préfixée par la version active du registre et par les
+facteurs de contexte de l'entité.
+
+Niveaux :
+- LRU local borné avec durée de vie (RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+- Redis optionnel (RESULT_CACHE_REDIS_URL), partagé entre les workers
+
+Un changement de version du registre vide le cache local ; les entrées Redis
+de l'ancienne version ne sont plus jamais lues (préfixe différent) et
+expirent avec leur TTL.
+"""
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from config import ai_settings
+from metrics import RESULT_CACHE_REQUESTS_TOTAL, RESULT_CACHE_HIT_RATIO
+from registry import ModelSnapshot, model_registry
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(transaction, version_key: str, context_key: int = 0) -> str:
+    """
+    Empreinte canonique d'une transaction pour une version de modèle
+
+    `context_key` résume le contexte de l'entité qui influe sur le résultat
+    (masque des facteurs de contexte) : un profil qui change donne une autre clé.
+    """
+    canonical = json.dumps(
+        [
+            repr(float(transaction.amount)),
+            transaction.currency,
+            transaction.transaction_type,
+            transaction.entity_id,
+            transaction.description,
+        ],
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return f"{version_key}:{context_key}:{digest}"
+
+
+class ResultCache:
+    """Cache LRU avec TTL, doublé d'un Redis optionnel"""
+
+    def __init__(self):
+        self.max_size = ai_settings.RESULT_CACHE_SIZE
+        self.ttl = ai_settings.RESULT_CACHE_TTL
+        self.entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self.redis = None
+        self.hits = 0
+        self.misses = 0
+
+    async def start(self) -> None:
+        """Connexion Redis optionnelle et abonnement aux changements du registre"""
+        model_registry.on_change(self.invalidate)
+        if ai_settings.RESULT_CACHE_REDIS_URL and redis_asyncio is not None:
+            try:
+                client = redis_asyncio.from_url(ai_settings.RESULT_CACHE_REDIS_URL, decode_responses=True)
+                await client.ping()
+                self.redis = client
+                logger.info("Result cache Redis backend connected")
+            except Exception as e:
+                logger.warning(f"Result cache Redis unavailable, using local cache only - {str(e)}")
+
+    async def stop(self) -> None:
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+
+    def invalidate(self, snapshot: Optional[ModelSnapshot] = None) -> None:
+        """Vider le cache local (appelé à chaque changement de version)"""
+        # Remplacement plutôt que clear() : le registre notifie depuis un thread
+        self.entries = OrderedDict()
+        logger.info("Result cache invalidated")
+
+    def _record(self, tier: str) -> None:
+        if tier == "miss":
+            self.misses += 1
+        else:
+            self.hits += 1
+        RESULT_CACHE_REQUESTS_TOTAL.labels(result=tier).inc()
+        RESULT_CACHE_HIT_RATIO.set(self.hits / (self.hits + self.misses))
+
+    async def get(self, key: str) -> Optional[Dict]:
+        """Lire un résultat (local puis Redis)"""
+        entries = self.entries
+        entry = entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                entries.move_to_end(key)
+                self._record("local")
+                return value
+            del entries[key]
+
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(f"ai:risk:{key}")
+            except Exception as e:
+                logger.warning(f"Result cache Redis read error - {str(e)}")
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self._store_local(key, value)
+                self._record("redis")
+                return value
+
+        self._record("miss")
+        return None
+
+    async def set(self, key: str, value: Dict) -> None:
+        """Enregistrer un résultat"""
+        self._store_local(key, value)
+        if self.redis is not None:
+            try:
+                await self.redis.set(f"ai:risk:{key}", json.dumps(value), ex=self.ttl)
+            except Exception as e:
+                logger.warning(f"Result cache Redis write error - {str(e)}")
+
+    def _store_local(self, key: str, value: Dict) -> None:
+        entries = self.entries
+        entries[key] = (time.monotonic() + self.ttl, value)
+        entries.move_to_end(key)
+        while len(entries) > self.max_size:
+            entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "redis": self.redis is not None,
+        }
+
+
+# Instance globale du cache de résultats
+result_cache = ResultCache()
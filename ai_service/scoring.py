@@ -0,0 +1,218 @@
+"""
+Scoring de risque vectorisé pour le service IA CAMEG-CHAIN
+
+Règles de scoring de simulation, facteurs de risque et recommandations,
+appliqués à un lot de transactions en quelques opérations sur des tableaux
+au lieu d'une boucle Python par transaction. Les facteurs et
+recommandations sont encodés en masques de bits ; le contexte de l'entité
+(magasin de caractéristiques) ajoute ses propres facteurs.
+"""
+from typing import Dict, Iterable, List, Literal, Optional, get_args
+
+import numpy as np
+
+from config import ai_settings
+
+# Types de transaction considérés à risque
+HIGH_RISK_TYPES = frozenset({"international_transfer", "cryptocurrency"})
+
+# Valeurs autorisées (validées par Pydantic sans code Python par appel)
+CurrencyCode = Literal["XOF", "USD", "EUR", "GBP", "CAD"]
+TransactionType = Literal["purchase", "payment", "transfer", "international_transfer", "cryptocurrency"]
+RiskLevel = Literal["low", "medium", "high", "critical"]
+
+# Ordre des catégories dans le vecteur de caractéristiques des modèles
+CURRENCIES = get_args(CurrencyCode)
+TRANSACTION_TYPES = get_args(TransactionType)
+CURRENCY_INDEX = {currency: i for i, currency in enumerate(CURRENCIES)}
+TRANSACTION_TYPE_INDEX = {transaction_type: i for i, transaction_type in enumerate(TRANSACTION_TYPES)}
+
+# montant, log(1 + montant), type à risque, description présente, devises, types
+FEATURE_COUNT = 4 + len(CURRENCIES) + len(TRANSACTION_TYPES)
+
+# Contexte de l'entité (magasin de caractéristiques), ajouté après les
+# caractéristiques du modèle dans la matrice d'entrée
+CONTEXT_COLUMNS = ("open_alerts", "tx_count_1d", "tx_count_30d", "avg_amount_30d")
+INPUT_WIDTH = FEATURE_COUNT + len(CONTEXT_COLUMNS)
+
+# Niveaux de risque, indexés par le code retourné par `risk_level_codes`
+RISK_LEVELS = get_args(RiskLevel)
+
+# Facteurs de risque (bits)
+FACTOR_HIGH_AMOUNT = 1
+FACTOR_RISKY_TYPE = 2
+FACTOR_MISSING_DESCRIPTION = 4
+FACTOR_OPEN_ALERTS = 8
+FACTOR_HIGH_VELOCITY = 16
+FACTOR_UNUSUAL_FOR_ENTITY = 32
+
+FACTOR_LABELS: Dict[int, str] = {
+    FACTOR_HIGH_AMOUNT: "Montant élevé",
+    FACTOR_RISKY_TYPE: "Type de transaction à risque",
+    FACTOR_MISSING_DESCRIPTION: "Description manquante",
+    FACTOR_OPEN_ALERTS: "Alertes ouvertes sur l'entité",
+    FACTOR_HIGH_VELOCITY: "Fréquence de transactions élevée",
+    FACTOR_UNUSUAL_FOR_ENTITY: "Montant inhabituel pour l'entité",
+}
+
+# Facteurs issus du contexte de l'entité
+CONTEXT_FACTORS = FACTOR_OPEN_ALERTS | FACTOR_HIGH_VELOCITY | FACTOR_UNUSUAL_FOR_ENTITY
+
+# Recommandations (bits)
+RECOMMEND_MANUAL_REVIEW = 1
+RECOMMEND_DOCUMENT_CHECK = 2
+RECOMMEND_FUNDS_ORIGIN = 4
+RECOMMEND_AUTHORIZATIONS = 8
+RECOMMEND_ENTITY_REVIEW = 16
+
+RECOMMENDATION_LABELS: Dict[int, str] = {
+    RECOMMEND_MANUAL_REVIEW: "Révision manuelle requise",
+    RECOMMEND_DOCUMENT_CHECK: "Vérification des documents",
+    RECOMMEND_FUNDS_ORIGIN: "Vérification de la source des fonds",
+    RECOMMEND_AUTHORIZATIONS: "Validation des autorisations",
+    RECOMMEND_ENTITY_REVIEW: "Revue du profil de l'entité",
+}
+
+
+def score_amounts(amounts: np.ndarray, risky_type: np.ndarray, open_alerts: np.ndarray) -> np.ndarray:
+    """Scores de risque (0-1) selon le montant, le type de transaction et les alertes ouvertes"""
+    base = 0.5 + np.select(
+        [amounts > 1000000, amounts > 500000, amounts > 100000],
+        [0.3, 0.2, 0.1],
+        default=0.0
+    )
+    base = base + np.where(risky_type, 0.2, 0.0)
+    return np.clip(base + np.where(open_alerts > 0, 0.1, 0.0), 0.0, 1.0)
+
+
+def risk_level_codes(scores: np.ndarray) -> np.ndarray:
+    """Codes de niveau (index dans RISK_LEVELS) selon les seuils RISK_THRESHOLD_*"""
+    thresholds = np.array([
+        ai_settings.RISK_THRESHOLD_LOW,
+        ai_settings.RISK_THRESHOLD_MEDIUM,
+        ai_settings.RISK_THRESHOLD_HIGH,
+    ])
+    return np.searchsorted(thresholds, scores, side="right").astype(np.int8)
+
+
+def factor_masks(amounts: np.ndarray, risky_type: np.ndarray, has_description: np.ndarray) -> np.ndarray:
+    """Masques de bits des facteurs de risque"""
+    masks = np.zeros(len(amounts), dtype=np.int8)
+    masks |= np.where(amounts > 1000000, FACTOR_HIGH_AMOUNT, 0).astype(np.int8)
+    masks |= np.where(risky_type, FACTOR_RISKY_TYPE, 0).astype(np.int8)
+    masks |= np.where(has_description, 0, FACTOR_MISSING_DESCRIPTION).astype(np.int8)
+    return masks
+
+
+def context_factor_masks(amounts: np.ndarray, context: np.ndarray) -> np.ndarray:
+    """Masques de bits des facteurs issus du contexte de l'entité (colonnes CONTEXT_COLUMNS)"""
+    open_alerts, tx_count_1d, tx_count_30d, avg_amount_30d = context.T
+    unusual = (tx_count_30d >= ai_settings.ENTITY_MIN_HISTORY) & (
+        amounts > ai_settings.ENTITY_UNUSUAL_AMOUNT_RATIO * avg_amount_30d
+    )
+    masks = np.zeros(len(amounts), dtype=np.int8)
+    masks |= np.where(open_alerts > 0, FACTOR_OPEN_ALERTS, 0).astype(np.int8)
+    masks |= np.where(tx_count_1d >= ai_settings.ENTITY_VELOCITY_THRESHOLD, FACTOR_HIGH_VELOCITY, 0).astype(np.int8)
+    masks |= np.where(unusual, FACTOR_UNUSUAL_FOR_ENTITY, 0).astype(np.int8)
+    return masks
+
+
+def recommendation_masks(level_codes: np.ndarray, masks: np.ndarray) -> np.ndarray:
+    """Masques de bits des recommandations"""
+    high_or_critical = level_codes >= RISK_LEVELS.index("high")
+    recommendations = np.where(high_or_critical, RECOMMEND_MANUAL_REVIEW | RECOMMEND_DOCUMENT_CHECK, 0)
+    recommendations |= np.where(masks & FACTOR_HIGH_AMOUNT, RECOMMEND_FUNDS_ORIGIN, 0)
+    recommendations |= np.where(masks & FACTOR_RISKY_TYPE, RECOMMEND_AUTHORIZATIONS, 0)
+    recommendations |= np.where(masks & CONTEXT_FACTORS, RECOMMEND_ENTITY_REVIEW, 0)
+    return recommendations.astype(np.int8)
+
+
+def features(transactions: List, context: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Matrice d'entrée (n, INPUT_WIDTH) d'un lot de transactions : caractéristiques
+    du modèle suivies du contexte des entités (nul si non fourni)
+    """
+    count = len(transactions)
+    matrix = np.zeros((count, INPUT_WIDTH), dtype=np.float64)
+    if context is not None:
+        matrix[:, FEATURE_COUNT:] = context
+    amounts = np.fromiter((t.amount for t in transactions), dtype=np.float64, count=count)
+    matrix[:, 0] = amounts
+    matrix[:, 1] = np.log1p(amounts)
+    matrix[:, 2] = np.fromiter(
+        (t.transaction_type in HIGH_RISK_TYPES for t in transactions), dtype=bool, count=count
+    )
+    matrix[:, 3] = np.fromiter((bool(t.description) for t in transactions), dtype=bool, count=count)
+
+    rows = np.arange(count)
+    currency_index = np.fromiter((CURRENCY_INDEX[t.currency] for t in transactions), dtype=np.int64, count=count)
+    type_index = np.fromiter(
+        (TRANSACTION_TYPE_INDEX[t.transaction_type] for t in transactions), dtype=np.int64, count=count
+    )
+    matrix[rows, 4 + currency_index] = 1.0
+    matrix[rows, 4 + len(CURRENCIES) + type_index] = 1.0
+    return matrix
+
+
+def model_scores(model, matrix: np.ndarray) -> np.ndarray:
+    """
+    Scores (0-1) d'un modèle chargé par le registre
+
+    Formats acceptés : estimateur scikit-learn (predict_proba / predict),
+    vecteur NumPy [biais, poids...] ou archive .npz avec "coef" et "intercept"
+    (régression logistique).
+    """
+    if hasattr(model, "predict_proba"):
+        scores = model.predict_proba(matrix)[:, -1]
+    elif hasattr(model, "predict"):
+        scores = model.predict(matrix)
+    else:
+        if isinstance(model, np.ndarray):
+            intercept, coef = model[0], model[1:]
+        else:
+            intercept, coef = model["intercept"], model["coef"]
+        scores = 1.0 / (1.0 + np.exp(-(matrix @ np.ravel(coef) + np.ravel(intercept)[0])))
+    return np.clip(np.asarray(scores, dtype=np.float64), 0.0, 1.0)
+
+
+def score_matrix(matrix: np.ndarray, model=None) -> Dict[str, np.ndarray]:
+    """
+    Évaluer une matrice de caractéristiques (voir `features`)
+
+    Sans modèle, les règles de simulation sont appliquées. Retourne des
+    colonnes NumPy : score, code de niveau, masques de facteurs et de
+    recommandations.
+    """
+    amounts = matrix[:, 0]
+    risky_type = matrix[:, 2].astype(bool)
+    has_description = matrix[:, 3].astype(bool)
+    context = matrix[:, FEATURE_COUNT:]
+
+    if model is not None:
+        scores = model_scores(model, matrix[:, :FEATURE_COUNT])
+    else:
+        scores = score_amounts(amounts, risky_type, context[:, 0])
+    levels = risk_level_codes(scores)
+    masks = factor_masks(amounts, risky_type, has_description) | context_factor_masks(amounts, context)
+
+    return {
+        "risk_score": scores,
+        "risk_level": levels,
+        "risk_factors_mask": masks,
+        "recommendations_mask": recommendation_masks(levels, masks),
+    }
+
+
+def score_batch(transactions: List, model=None, context: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """Évaluer un lot de transactions (objets avec amount, currency, transaction_type, description)"""
+    return score_matrix(features(transactions, context), model)
+
+
+def decode_mask(mask: int, labels: Dict[int, str]) -> List[str]:
+    """Convertir un masque de bits en libellés"""
+    return [label for bit, label in labels.items() if mask & bit]
+
+
+def level_names(level_codes: Iterable[int]) -> List[str]:
+    """Convertir des codes de niveau en libellés"""
+    return [RISK_LEVELS[code] for code in level_codes]
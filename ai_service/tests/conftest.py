@@ -0,0 +1,34 @@
+"""
+Configuration des tests du service IA CAMEG-CHAIN
+"""
+import pytest
+
+from app import TransactionData
+from config import ai_settings
+from inference import InferenceExecutor
+
+
+@pytest.fixture
+def transaction_factory():
+    """Fabrique de transactions validées (valeurs par défaut surchargeables)"""
+    def create(**values) -> TransactionData:
+        data = {
+            "amount": 50000.0,
+            "currency": "XOF",
+            "transaction_type": "purchase",
+            "entity_id": "entity-1",
+            "description": "Achat de médicaments",
+        }
+        data.update(values)
+        return TransactionData(**data)
+
+    return create
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    """Exécuteur d'inférence sans pool de processus (à démarrer dans la boucle du test)"""
+    monkeypatch.setattr(ai_settings, "INFERENCE_WORKERS", 0)
+    monkeypatch.setattr(ai_settings, "INFERENCE_MAX_BATCH", 4)
+    monkeypatch.setattr(ai_settings, "INFERENCE_BATCH_WINDOW_MS", 50)
+    return InferenceExecutor()
@@ -0,0 +1,118 @@
+"""
+Tests pour le pipeline d'alertes (déduplication, escalade, insertion groupée)
+"""
+import asyncio
+
+import pytest
+
+import entity_features
+from alerts import AlertPipeline
+from config import ai_settings
+from entity_features import EntityFeatureStore
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Pipeline avec une fenêtre d'une heure et une escalade toutes les 5 occurrences"""
+    monkeypatch.setattr(ai_settings, "ALERT_DEDUP_WINDOW", 3600)
+    monkeypatch.setattr(ai_settings, "ALERT_ESCALATION_COUNT", 5)
+    monkeypatch.setattr(entity_features, "feature_store", EntityFeatureStore())
+    return AlertPipeline()
+
+
+@pytest.fixture
+def inserted(pipeline, monkeypatch):
+    """Lots insérés (sans base) ; toutes les entités sont rattachées"""
+    batches = []
+
+    def insert(rows):
+        batches.append(rows)
+        return [row[0] for row in rows]
+
+    monkeypatch.setattr(pipeline, "_insert", insert)
+    return batches
+
+
+def event(at: float, severity: str = "medium", entity_id: str = "entity-1", alert_type: str = "high_risk_transaction"):
+    return (entity_id, alert_type, severity, "Transaction à risque", at)
+
+
+class TestDeduplicate:
+    """Une alerte par (entité, type) et par fenêtre, sauf escalade"""
+
+    def test_duplicates_in_window_suppressed(self, pipeline):
+        rows = pipeline.deduplicate([event(0.0), event(10.0)])
+
+        assert rows == [("entity-1", "high_risk_transaction", "medium", "Transaction à risque")]
+        assert pipeline.deduplicate([event(20.0)]) == []
+
+    def test_new_window_after_expiry(self, pipeline):
+        pipeline.deduplicate([event(0.0)])
+
+        assert len(pipeline.deduplicate([event(3601.0)])) == 1
+        assert pipeline.windows[("entity-1", "high_risk_transaction")] == [3601.0, 1, "medium"]
+
+    def test_keys_are_independent(self, pipeline):
+        rows = pipeline.deduplicate([
+            event(0.0), event(1.0, entity_id="entity-2"), event(2.0, alert_type="amount_deviation")
+        ])
+
+        assert len(rows) == 3
+
+    def test_higher_severity_escalates(self, pipeline):
+        """Une sévérité plus haute dans la fenêtre est émise ; une plus basse ne l'est pas"""
+        rows = pipeline.deduplicate([event(0.0, "medium"), event(5.0, "high"), event(6.0, "medium")])
+
+        assert [row[2] for row in rows] == ["medium", "high"]
+        assert rows[1][3] == "Transaction à risque (escaladée : 2 occurrences en 5s)"
+        assert pipeline.windows[("entity-1", "high_risk_transaction")][2] == "high"
+
+    def test_repetition_escalates(self, pipeline):
+        """Toutes les ALERT_ESCALATION_COUNT occurrences, un niveau de plus (plafonné à critical)"""
+        events = [event(float(i), "medium") for i in range(15)]
+
+        rows = pipeline.deduplicate(events)
+
+        assert [row[2] for row in rows] == ["medium", "high", "critical"]
+        assert rows[1][3] == "Transaction à risque (escaladée : 5 occurrences en 4s)"
+        assert pipeline.deduplicate([event(15.0 + i, "medium") for i in range(5)]) == []
+
+
+class TestFlush:
+    """Insertion groupée et nouvelle tentative"""
+
+    def test_rows_inserted_and_entities_counted(self, pipeline, inserted):
+        asyncio.run(pipeline._flush([event(0.0), event(1.0), event(2.0, entity_id="entity-2")]))
+
+        assert [len(rows) for rows in inserted] == [2]
+        assert entity_features.feature_store.context(["entity-1", "entity-2"])[:, 0].tolist() == [1, 1]
+
+    def test_failed_insert_retried_once(self, pipeline, monkeypatch):
+        attempts = []
+
+        def failing(rows):
+            attempts.append(len(rows))
+            raise RuntimeError("base indisponible")
+
+        monkeypatch.setattr(pipeline, "_insert", failing)
+
+        asyncio.run(pipeline._flush([event(0.0)]))
+        assert len(pipeline.retry) == 1
+        asyncio.run(pipeline._flush([event(0.0, entity_id="entity-2")]))
+
+        assert attempts == [1, 2]
+        assert [row[0] for row in pipeline.retry] == ["entity-2"]
+
+    def test_emitted_events_written_on_stop(self, pipeline, inserted, monkeypatch):
+        monkeypatch.setattr(ai_settings, "ALERTS_ENABLED", True)
+        monkeypatch.setattr(ai_settings, "ALERT_FLUSH_INTERVAL", 60.0)
+
+        async def scenario():
+            await pipeline.start()
+            for _ in range(3):
+                pipeline.emit("entity-1", "high_risk_transaction", "high", "Transaction à risque")
+            await pipeline.stop()
+
+        asyncio.run(scenario())
+
+        assert [row[2] for rows in inserted for row in rows] == ["high"]
@@ -0,0 +1,153 @@
+"""
+Tests pour la détection d'anomalies en flux
+"""
+import numpy as np
+import pytest
+
+import anomaly
+from anomaly import AnomalyDetector, EntityStateStore, MAD_SCALE
+from config import ai_settings
+
+
+HISTORY = [1000.0, 2000.0, 1500.0, 1200.0, 1800.0, 900.0]
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    """Détecteur sur un état vide, paramètres par défaut fixés"""
+    monkeypatch.setattr(ai_settings, "ANOMALY_MIN_HISTORY", 5)
+    monkeypatch.setattr(ai_settings, "ANOMALY_Z_THRESHOLD", 3.0)
+    monkeypatch.setattr(ai_settings, "ANOMALY_MAD_THRESHOLD", 3.5)
+    monkeypatch.setattr(ai_settings, "ANOMALY_EWMA_ALPHA", 0.1)
+    monkeypatch.setattr(ai_settings, "ANOMALY_MIN_SCALE", 0.1)
+    return AnomalyDetector(EntityStateStore(window=8))
+
+
+def observe_all(detector, amounts, entity_id="entity-1") -> list:
+    return [detector.observe(entity_id, amount) for amount in amounts]
+
+
+def by_type(anomalies) -> dict:
+    return {found["type"]: found for found in anomalies}
+
+
+class TestScores:
+    """Z-scores calculés sur l'historique avant prise en compte du montant"""
+
+    def test_z_scores_against_known_history(self, detector):
+        observe_all(detector, HISTORY)
+        history = np.log1p(HISTORY)
+        value = np.log1p(500000.0)
+
+        found = by_type(detector.observe("entity-1", 500000.0))
+
+        z = (value - history.mean()) / history.std(ddof=1)
+        assert found["amount_deviation"]["score"] == round(z, 3)
+        assert found["amount_deviation"]["severity"] == "high"
+
+        ewma, ewm_var = history[0], 0.0
+        for past in history[1:]:
+            diff = past - ewma
+            ewma += 0.1 * diff
+            ewm_var = 0.9 * (ewm_var + diff * 0.1 * diff)
+        assert found["recent_trend_deviation"]["score"] == pytest.approx(round((value - ewma) / np.sqrt(ewm_var), 3))
+
+        median = np.median(history)
+        mad = np.median(np.abs(history - median))
+        assert found["robust_outlier"]["score"] == round(MAD_SCALE * (value - median) / mad, 3)
+
+    def test_usual_amount_not_flagged(self, detector):
+        observe_all(detector, HISTORY)
+
+        assert detector.observe("entity-1", 1400.0) == []
+
+    def test_entities_are_independent(self, detector):
+        observe_all(detector, HISTORY, "entity-1")
+        observe_all(detector, [400000.0] * len(HISTORY), "entity-2")
+
+        assert detector.observe("entity-2", 450000.0) == []
+        assert detector.observe("entity-1", 450000.0) != []
+
+
+class TestMinHistory:
+    """Aucun score statistique avant ANOMALY_MIN_HISTORY observations"""
+
+    def test_gate(self, detector):
+        results = observe_all(detector, [1000.0, 1000.0, 1000.0, 1000.0, 900000.0])
+
+        assert results == [[]] * 5
+        assert by_type(detector.observe("entity-1", 900000.0))
+
+    def test_high_amount_ignores_gate(self, detector):
+        """Le seuil absolu s'applique dès la première transaction"""
+        assert list(by_type(detector.observe("entity-1", 2000000.0))) == ["high_amount"]
+
+
+class TestConstantHistory:
+    """Un historique constant (écart-type et MAD nuls) signale quand même une rupture"""
+
+    def test_jump_flagged(self, detector):
+        observe_all(detector, [1000.0] * 10)
+
+        found = by_type(detector.observe("entity-1", 900000.0))
+
+        assert set(found) == {"amount_deviation", "recent_trend_deviation", "robust_outlier"}
+        assert found["amount_deviation"]["severity"] == "high"
+        assert found["robust_outlier"]["score"] == round((np.log1p(900000.0) - np.log1p(1000.0)) / 0.1, 3)
+
+    def test_small_variation_not_flagged(self, detector):
+        observe_all(detector, [1000.0] * 10)
+
+        assert detector.observe("entity-1", 1100.0) == []
+
+
+class TestWindow:
+    """Fenêtre circulaire des derniers montants"""
+
+    def test_wraparound_keeps_latest_values(self, detector):
+        amounts = [float(amount) for amount in range(1000, 1011)]
+        observe_all(detector, amounts)
+
+        slot = detector.store.slots["entity-1"]
+        window = detector.store.window
+        assert sorted(detector.store.recent[slot]) == sorted(np.log1p(amounts[-window:]))
+        assert detector.store.count[slot] == len(amounts)
+
+    def test_median_uses_window_only(self, detector):
+        """Les montants sortis de la fenêtre ne comptent plus pour la médiane / MAD"""
+        observe_all(detector, [900000.0] * 8 + [1000.0] * 8)
+
+        found = by_type(detector.observe("entity-1", 900000.0))
+
+        assert found["robust_outlier"]["severity"] == "high"
+
+
+class TestPersistence:
+    """Sauvegarde et rechargement de l'état (.npz)"""
+
+    def test_round_trip(self, detector, tmp_path):
+        observe_all(detector, HISTORY, "entity-1")
+        observe_all(detector, [50.0, 60.0], "entity-2")
+        path = str(tmp_path / "anomaly_state.npz")
+
+        detector.store.save(path)
+        loaded = EntityStateStore.load(path, detector.store.window)
+
+        assert detector.store.dirty is False
+        assert loaded.slots == detector.store.slots
+        size = len(loaded.slots)
+        for name in ("count", "mean", "m2", "ewma", "ewm_var", "recent"):
+            np.testing.assert_array_equal(getattr(loaded, name)[:size], getattr(detector.store, name)[:size])
+        assert AnomalyDetector(loaded).observe("entity-1", 500000.0) == detector.observe("entity-1", 500000.0)
+
+    def test_window_change_discards_state(self, detector, tmp_path):
+        observe_all(detector, HISTORY)
+        path = str(tmp_path / "anomaly_state.npz")
+        detector.store.save(path)
+
+        assert EntityStateStore.load(path, detector.store.window * 2).slots == {}
+
+    def test_missing_file(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(ai_settings, "MODEL_PATH", str(tmp_path))
+
+        assert anomaly.load_detector().store.slots == {}
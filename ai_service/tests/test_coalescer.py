@@ -0,0 +1,142 @@
+"""
+Tests pour le regroupement des appels unitaires
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+import coalescer
+import entity_features
+import scoring
+from coalescer import RequestCoalescer
+from config import ai_settings
+from entity_features import EntityFeatureStore
+
+# Montant refusé par le scoring simulé ci-dessous
+BAD_AMOUNT = 666.0
+
+
+@pytest.fixture
+def request_coalescer(executor, monkeypatch):
+    """Coalesceur branché sur l'exécuteur de test et un magasin de profils vide"""
+    monkeypatch.setattr(ai_settings, "COALESCE_MAX_BATCH", 8)
+    monkeypatch.setattr(ai_settings, "COALESCE_MAX_DELAY_MS", 50)
+    monkeypatch.setattr(coalescer, "inference_executor", executor)
+    monkeypatch.setattr(entity_features, "feature_store", EntityFeatureStore())
+    return RequestCoalescer()
+
+
+@pytest.fixture
+def batches(executor, monkeypatch):
+    """Lots reçus par run_batch ; un lot contenant BAD_AMOUNT échoue"""
+    received = []
+    run_batch = executor.run_batch
+
+    async def spy(matrix):
+        received.append({"rows": len(matrix), "free_slots": executor._in_flight._value})
+        if (matrix[:, 0] == BAD_AMOUNT).any():
+            raise ValueError("transaction invalide")
+        return await run_batch(matrix)
+
+    monkeypatch.setattr(executor, "run_batch", spy)
+    return received
+
+
+def run(executor, request_coalescer, transactions):
+    """Évaluer des transactions concurrentes ; exceptions retournées avec les résultats"""
+    context = np.zeros(len(scoring.CONTEXT_COLUMNS))
+
+    async def scenario():
+        await executor.start()
+        await request_coalescer.start()
+        try:
+            return await asyncio.gather(
+                *(request_coalescer.assess(transaction, context) for transaction in transactions),
+                return_exceptions=True
+            )
+        finally:
+            await request_coalescer.stop()
+            await executor.stop()
+
+    return asyncio.run(scenario())
+
+
+def expected(transaction) -> dict:
+    columns = scoring.score_batch([transaction], context=np.zeros((1, len(scoring.CONTEXT_COLUMNS))))
+    return {
+        "risk_score": float(columns["risk_score"][0]),
+        "risk_level": scoring.RISK_LEVELS[int(columns["risk_level"][0])],
+        "risk_factors": scoring.decode_mask(int(columns["risk_factors_mask"][0]), scoring.FACTOR_LABELS),
+        "recommendations": scoring.decode_mask(int(columns["recommendations_mask"][0]), scoring.RECOMMENDATION_LABELS),
+    }
+
+
+class TestCoalescing:
+    """Transactions concurrentes scorées en un seul lot"""
+
+    def test_concurrent_calls_share_a_batch(self, executor, request_coalescer, batches, transaction_factory):
+        transactions = [
+            transaction_factory(amount=amount, entity_id=f"entity-{i}")
+            for i, amount in enumerate((1000.0, 200000.0, 2500000.0))
+        ]
+
+        results = run(executor, request_coalescer, transactions)
+
+        assert [batch["rows"] for batch in batches] == [3]
+        assert results == [expected(transaction) for transaction in transactions]
+        assert set(entity_features.feature_store.slots) == {t.entity_id for t in transactions}
+        assert request_coalescer._dispatches == {}
+
+    def test_batch_holds_an_executor_slot(self, executor, request_coalescer, batches, transaction_factory):
+        """run_batch contourne la file de l'exécuteur : le lot prend une place parmi les lots en cours"""
+        run(executor, request_coalescer, [transaction_factory()])
+
+        assert batches[0]["free_slots"] == 1
+        assert executor._in_flight._value == 2
+
+    def test_waits_for_a_free_executor_slot(self, executor, request_coalescer, batches, transaction_factory):
+        context = np.zeros(len(scoring.CONTEXT_COLUMNS))
+
+        async def scenario():
+            await executor.start()
+            await request_coalescer.start()
+            try:
+                for _ in range(2):
+                    await executor._in_flight.acquire()
+                call = asyncio.create_task(request_coalescer.assess(transaction_factory(), context))
+                await asyncio.sleep(0.1)
+                dispatched_while_full = len(batches)
+                executor._in_flight.release()
+                await call
+                return dispatched_while_full
+            finally:
+                await request_coalescer.stop()
+                await executor.stop()
+
+        assert asyncio.run(scenario()) == 0
+        assert len(batches) == 1
+
+
+class TestPerItemFallback:
+    """Un lot en échec est rejoué transaction par transaction"""
+
+    def test_bad_item_fails_alone(self, executor, request_coalescer, batches, transaction_factory):
+        transactions = [
+            transaction_factory(amount=1000.0),
+            transaction_factory(amount=BAD_AMOUNT),
+            transaction_factory(amount=600000.0, transaction_type="cryptocurrency"),
+        ]
+
+        first, failed, last = run(executor, request_coalescer, transactions)
+
+        assert [batch["rows"] for batch in batches] == [3, 1, 1, 1]
+        assert isinstance(failed, ValueError)
+        assert first == expected(transactions[0])
+        assert last == expected(transactions[2])
+
+    def test_single_item_batch_fails(self, executor, request_coalescer, batches, transaction_factory):
+        (failed,) = run(executor, request_coalescer, [transaction_factory(amount=BAD_AMOUNT)])
+
+        assert isinstance(failed, ValueError)
+        assert len(batches) == 1
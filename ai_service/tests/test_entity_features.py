@@ -0,0 +1,120 @@
+"""
+Tests pour le magasin de caractéristiques des entités
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import entity_features
+from config import ai_settings
+from entity_features import EntityFeatureStore, SECONDS_PER_DAY, WINDOW_DAYS
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Horloge contrôlée par le test (secondes depuis l'époque)"""
+    now = SimpleNamespace(value=1000 * SECONDS_PER_DAY + 3600.0)
+    monkeypatch.setattr(entity_features, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def context_row(store, entity_id) -> list:
+    return store.context([entity_id])[0].tolist()
+
+
+class TestContext:
+    """Contexte servi au scoring (open_alerts, tx_count_1d, tx_count_30d, avg_amount_30d)"""
+
+    def test_recorded_transactions(self, clock):
+        store = EntityFeatureStore()
+        store.record(["entity-1", "entity-1", "entity-2"], [100.0, 300.0, 50.0], [0.2, 0.4, 0.9])
+
+        matrix = store.context(["entity-2", "unknown", "entity-1"])
+
+        assert matrix.tolist() == [[0, 1, 1, 50.0], [0, 0, 0, 0], [0, 2, 2, 200.0]]
+
+    def test_days_roll_over(self, clock):
+        """Le compteur du jour repart à zéro ; les jours sortis des 30 jours sont oubliés"""
+        store = EntityFeatureStore()
+        store.record(["entity-1"] * 2, [100.0, 100.0], [0.1, 0.1])
+
+        clock.value += SECONDS_PER_DAY
+        store.record(["entity-1"], [400.0], [0.1])
+        assert context_row(store, "entity-1") == [0, 1, 3, 200.0]
+
+        clock.value += (WINDOW_DAYS - 1) * SECONDS_PER_DAY
+        assert context_row(store, "entity-1") == [0, 0, 1, 400.0]
+
+        # Même compartiment circulaire que le premier jour : il est réinitialisé
+        clock.value += SECONDS_PER_DAY
+        store.record(["entity-1"], [10.0], [0.1])
+        assert context_row(store, "entity-1") == [0, 1, 1, 10.0]
+
+    def test_open_alerts(self, clock):
+        store = EntityFeatureStore()
+        store.alert_opened("entity-1", 3)
+        store.alert_closed("entity-1")
+        store.alert_closed("unknown")
+
+        assert context_row(store, "entity-1")[0] == 2
+
+        store.set_open_alerts({"entity-2": 1})
+        assert store.context(["entity-1", "entity-2"])[:, 0].tolist() == [0, 1]
+
+    def test_capacity_grows(self, clock):
+        store = EntityFeatureStore(capacity=2)
+        entity_ids = [f"entity-{i}" for i in range(5)]
+        store.alert_opened("entity-0")
+
+        store.record(entity_ids, [10.0] * 5, [0.5] * 5)
+
+        assert len(store.open_alerts) == 8
+        assert store.context(entity_ids)[:, :3].tolist() == [[1, 1, 1]] + [[0, 1, 1]] * 4
+        assert np.isnan(store.last_score[5:]).all()
+
+
+class TestProfile:
+    """Profil complet d'une entité (1, 7 et 30 jours)"""
+
+    def test_profile(self, clock):
+        store = EntityFeatureStore()
+        store.record(["entity-1"], [100.0], [0.3])
+        clock.value += 3 * SECONDS_PER_DAY
+        store.record(["entity-1"], [200.0], [0.7])
+
+        assert store.profile("entity-1") == {
+            "entity_id": "entity-1",
+            "tx_count_1d": 1, "tx_amount_1d": 200.0,
+            "tx_count_7d": 2, "tx_amount_7d": 300.0,
+            "tx_count_30d": 2, "tx_amount_30d": 300.0,
+            "open_alerts": 0,
+            "last_risk_score": 0.7,
+            "last_scored_at": clock.value,
+        }
+        assert store.profile("unknown") is None
+
+
+class TestPersistence:
+    """Sauvegarde et rechargement (.npz)"""
+
+    def test_round_trip(self, clock, tmp_path):
+        store = EntityFeatureStore()
+        store.record(["entity-1", "entity-2"], [100.0, 250.0], [0.2, 0.8])
+        store.alert_opened("entity-2")
+        path = str(tmp_path / "entity_features.npz")
+
+        store.save(path)
+        loaded = EntityFeatureStore.load(path)
+
+        assert store.dirty is False
+        assert loaded.slots == store.slots
+        np.testing.assert_array_equal(loaded.context(["entity-1", "entity-2"]), store.context(["entity-1", "entity-2"]))
+        assert loaded.profile("entity-2") == store.profile("entity-2")
+
+    def test_load_without_snapshot(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(ai_settings, "MODEL_PATH", str(tmp_path))
+        monkeypatch.setattr(ai_settings, "ENTITY_FEATURES_BOOTSTRAP_FROM_DB", False)
+
+        assert EntityFeatureStore.load(entity_features.features_path()) is None
+        assert entity_features.load_feature_store().slots == {}
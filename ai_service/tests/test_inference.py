@@ -0,0 +1,140 @@
+"""
+Tests pour l'exécuteur d'inférence (micro-lots et découpage)
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+import scoring
+
+
+def make_matrix(rows: int, start: int = 0) -> np.ndarray:
+    """Matrice d'entrée dont les montants croissent à partir de `start`"""
+    matrix = np.zeros((rows, scoring.INPUT_WIDTH))
+    matrix[:, 0] = np.arange(start, start + rows) * 100000.0
+    matrix[:, 3] = 1.0
+    return matrix
+
+
+@pytest.fixture
+def batch_sizes(executor, monkeypatch):
+    """Tailles des lots effectivement envoyés au scoring"""
+    sizes = []
+    run_batch = executor.run_batch
+
+    async def spy(matrix):
+        sizes.append(len(matrix))
+        return await run_batch(matrix)
+
+    monkeypatch.setattr(executor, "run_batch", spy)
+    return sizes
+
+
+def assert_scored(result, matrix):
+    for key, values in scoring.score_matrix(matrix).items():
+        np.testing.assert_array_equal(result[key], values, err_msg=key)
+
+
+class TestMicroBatch:
+    """Les petites demandes concurrentes sont regroupées en un seul lot"""
+
+    def test_concurrent_requests_grouped(self, executor, batch_sizes):
+        matrices = [make_matrix(1, 0), make_matrix(1, 5), make_matrix(1, 12)]
+
+        async def scenario():
+            await executor.start()
+            try:
+                return await asyncio.gather(*(executor.score(matrix) for matrix in matrices))
+            finally:
+                await executor.stop()
+
+        results = asyncio.run(scenario())
+
+        assert batch_sizes == [3]
+        for result, matrix in zip(results, matrices):
+            assert_scored(result, matrix)
+
+    def test_batch_closed_at_max_rows(self, executor, batch_sizes):
+        """Un lot plein part sans attendre la fin de la fenêtre"""
+        matrices = [make_matrix(2, i) for i in range(3)]
+
+        async def scenario():
+            await executor.start()
+            try:
+                return await asyncio.gather(*(executor.score(matrix) for matrix in matrices))
+            finally:
+                await executor.stop()
+
+        results = asyncio.run(scenario())
+
+        assert batch_sizes == [4, 2]
+        for result, matrix in zip(results, matrices):
+            assert_scored(result, matrix)
+
+    def test_error_reaches_every_requester(self, executor, monkeypatch):
+        async def failing(matrix):
+            raise RuntimeError("worker perdu")
+
+        monkeypatch.setattr(executor, "run_batch", failing)
+
+        async def scenario():
+            await executor.start()
+            try:
+                return await asyncio.gather(
+                    *(executor.score(make_matrix(1)) for _ in range(2)), return_exceptions=True
+                )
+            finally:
+                await executor.stop()
+
+        results = asyncio.run(scenario())
+
+        assert [str(result) for result in results] == ["worker perdu", "worker perdu"]
+
+
+class TestChunking:
+    """Les grandes matrices sont découpées en lots de INFERENCE_MAX_BATCH"""
+
+    def test_large_matrix_split(self, executor, batch_sizes):
+        matrix = make_matrix(10)
+
+        async def scenario():
+            await executor.start()
+            try:
+                return await executor.score(matrix)
+            finally:
+                await executor.stop()
+
+        result = asyncio.run(scenario())
+
+        assert batch_sizes == [4, 4, 2]
+        assert_scored(result, matrix)
+
+
+class TestStop:
+    """L'arrêt annule les micro-lots en cours"""
+
+    def test_in_flight_batch_cancelled(self, executor, monkeypatch):
+        started = None
+
+        async def hanging(matrix):
+            started.set()
+            await asyncio.Event().wait()
+
+        monkeypatch.setattr(executor, "run_batch", hanging)
+
+        async def scenario():
+            nonlocal started
+            started = asyncio.Event()
+            await executor.start()
+            request = asyncio.create_task(executor.score(make_matrix(1)))
+            await started.wait()
+            assert len(executor._dispatches) == 1
+
+            await executor.stop()
+            with pytest.raises(asyncio.CancelledError):
+                await request
+            await asyncio.sleep(0)
+            return executor._dispatches
+
+        assert asyncio.run(scenario()) == {}
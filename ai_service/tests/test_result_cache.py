@@ -0,0 +1,145 @@
+"""
+Tests pour le cache des résultats d'évaluation de risque
+"""
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+import app
+import entity_features
+import scoring
+from config import ai_settings
+from entity_features import EntityFeatureStore
+from registry import ModelSnapshot, model_registry
+from result_cache import ResultCache, fingerprint
+
+
+@pytest.fixture
+def service(executor, tmp_path, monkeypatch):
+    """assess_transaction sur un registre, un cache et un magasin de profils vides"""
+    monkeypatch.setattr(ai_settings, "MODEL_PATH", str(tmp_path))
+    monkeypatch.setattr(ai_settings, "COALESCE_ENABLED", False)
+    monkeypatch.setattr(ai_settings, "RESULT_CACHE_ENABLED", True)
+    monkeypatch.setattr(ai_settings, "RESULT_CACHE_REDIS_URL", "")
+    monkeypatch.setattr(model_registry, "current", ModelSnapshot({}, {}, {}))
+    monkeypatch.setattr(model_registry, "listeners", [])
+    monkeypatch.setattr(model_registry, "errors", {})
+    monkeypatch.setattr(app, "inference_executor", executor)
+    monkeypatch.setattr(app, "result_cache", ResultCache())
+    monkeypatch.setattr(entity_features, "feature_store", EntityFeatureStore())
+    return app
+
+
+@pytest.fixture
+def scored(executor, monkeypatch):
+    """Nombre de transactions effectivement scorées"""
+    rows = []
+    run_batch = executor.run_batch
+
+    async def spy(matrix):
+        rows.append(len(matrix))
+        return await run_batch(matrix)
+
+    monkeypatch.setattr(executor, "run_batch", spy)
+    return rows
+
+
+def publish_model(model_path, version: str, bias: float) -> None:
+    """Publier une version du modèle de scoring dans le manifeste"""
+    filename = f"risk_scoring-{version}.npy"
+    weights = np.zeros(scoring.FEATURE_COUNT + 1)
+    weights[0] = bias
+    np.save(model_path / filename, weights)
+    (model_path / ai_settings.MODEL_MANIFEST).write_text(
+        json.dumps({"risk_scoring": {"version": version, "file": filename}})
+    )
+
+
+def run(service, executor, scenario):
+    async def main():
+        await executor.start()
+        await service.result_cache.start()
+        try:
+            return await scenario()
+        finally:
+            await service.result_cache.stop()
+            await executor.stop()
+
+    return asyncio.run(main())
+
+
+class TestFingerprint:
+    """Clé de cache : version du modèle, contexte de l'entité et transaction"""
+
+    def test_key_includes_model_version_and_context(self, transaction_factory):
+        transaction = transaction_factory()
+
+        key = fingerprint(transaction, "risk_scoring=1.0", scoring.FACTOR_HIGH_VELOCITY)
+
+        assert key.startswith(f"risk_scoring=1.0:{scoring.FACTOR_HIGH_VELOCITY}:")
+        assert key == fingerprint(transaction_factory(), "risk_scoring=1.0", scoring.FACTOR_HIGH_VELOCITY)
+        assert key != fingerprint(transaction, "risk_scoring=1.1", scoring.FACTOR_HIGH_VELOCITY)
+        assert key != fingerprint(transaction, "risk_scoring=1.0", 0)
+
+    def test_every_field_changes_the_key(self, transaction_factory):
+        key = fingerprint(transaction_factory(), "simulation")
+        variants = [
+            {"amount": 50000.5}, {"currency": "EUR"}, {"transaction_type": "payment"},
+            {"entity_id": "entity-2"}, {"description": "Autre achat"},
+        ]
+
+        assert all(fingerprint(transaction_factory(**values), "simulation") != key for values in variants)
+
+
+class TestAssessTransaction:
+    """Cache de résultats dans assess_transaction"""
+
+    def test_replay_served_from_cache(self, service, executor, scored, transaction_factory):
+        transaction = transaction_factory()
+
+        async def scenario():
+            return [await service.assess_transaction(transaction) for _ in range(2)]
+
+        first, second = run(service, executor, scenario)
+
+        assert first == second
+        assert scored == [1]
+
+    def test_context_change_rescored(self, service, executor, scored, transaction_factory):
+        """Un profil d'entité qui change (montant devenu inhabituel) donne une autre clé"""
+        transaction = transaction_factory(amount=50000.0)
+        unusual = scoring.FACTOR_LABELS[scoring.FACTOR_UNUSUAL_FOR_ENTITY]
+
+        async def scenario():
+            before = await service.assess_transaction(transaction)
+            entity_features.feature_store.record([transaction.entity_id] * 5, [100.0] * 5, [0.1] * 5)
+            return before, await service.assess_transaction(transaction)
+
+        before, after = run(service, executor, scenario)
+
+        assert scored == [1, 1]
+        assert unusual not in before["risk_factors"]
+        assert unusual in after["risk_factors"]
+
+    def test_model_reload_invalidates(self, service, executor, scored, transaction_factory, tmp_path):
+        transaction = transaction_factory()
+        publish_model(tmp_path, "1.0", -3.0)
+
+        async def scenario():
+            model_registry.reload()
+            old = await service.assess_transaction(transaction)
+            cached = len(service.result_cache.entries)
+            publish_model(tmp_path, "2.0", 3.0)
+            assert model_registry.reload() is True
+            invalidated = len(service.result_cache.entries)
+            return old, cached, invalidated, await service.assess_transaction(transaction)
+
+        old, cached, invalidated, new = run(service, executor, scenario)
+
+        assert (cached, invalidated) == (1, 0)
+        assert scored == [1, 1]
+        assert old["risk_level"] == "low"
+        assert new["risk_level"] == "critical"
+        assert list(service.result_cache.entries)[0].startswith("risk_scoring=2.0:")
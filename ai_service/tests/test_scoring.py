@@ -0,0 +1,91 @@
+"""
+Tests pour le scoring vectorisé (lot et transaction isolée)
+"""
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+import scoring
+from app import BatchRiskAssessmentRequest
+from config import ai_settings
+
+
+# Montants de part et d'autre des seuils, types à risque ou non, avec et sans description
+CASES = [
+    {"amount": 1500.0},
+    {"amount": 150000.0, "transaction_type": "payment", "currency": "EUR"},
+    {"amount": 600000.0, "transaction_type": "international_transfer", "description": ""},
+    {"amount": 2500000.0, "transaction_type": "cryptocurrency", "currency": "USD"},
+    {"amount": 90000.0, "transaction_type": "transfer", "description": ""},
+]
+
+# open_alerts, tx_count_1d, tx_count_30d, avg_amount_30d
+CONTEXT = np.array([
+    [0, 0, 0, 0],
+    [1, 2, 10, 20000],
+    [0, 25, 40, 1000],
+    [3, 0, 6, 2000000],
+    [0, 1, 2, 100],
+], dtype=np.float64)
+
+# Régression logistique [biais, poids...] sur les caractéristiques du modèle
+WEIGHTS = np.linspace(-1.0, 1.0, scoring.FEATURE_COUNT + 1) / 1e6
+
+
+def assert_same_columns(batch, singles):
+    for key, values in batch.items():
+        np.testing.assert_array_equal(values, np.concatenate([single[key] for single in singles]), err_msg=key)
+
+
+class TestBatchMatchesSingle:
+    """Un lot donne, ligne par ligne, le résultat de chaque transaction évaluée seule"""
+
+    @pytest.mark.parametrize("model", [None, WEIGHTS], ids=["simulation", "model"])
+    def test_batch_equals_single_requests(self, transaction_factory, model):
+        transactions = [transaction_factory(**case) for case in CASES]
+
+        batch = scoring.score_batch(transactions, model, CONTEXT)
+        singles = [
+            scoring.score_batch([transaction], model, CONTEXT[i:i + 1])
+            for i, transaction in enumerate(transactions)
+        ]
+
+        assert_same_columns(batch, singles)
+
+    def test_decoded_labels(self, transaction_factory):
+        """Les masques du lot se décodent en facteurs et recommandations attendus"""
+        columns = scoring.score_batch([transaction_factory(**case) for case in CASES], context=CONTEXT)
+
+        assert scoring.level_names(columns["risk_level"].tolist()) == ["medium", "high", "critical", "critical", "medium"]
+        assert scoring.decode_mask(int(columns["risk_factors_mask"][3]), scoring.FACTOR_LABELS) == [
+            "Montant élevé", "Type de transaction à risque", "Alertes ouvertes sur l'entité"
+        ]
+        assert scoring.decode_mask(int(columns["recommendations_mask"][2]), scoring.RECOMMENDATION_LABELS) == [
+            "Révision manuelle requise", "Vérification des documents",
+            "Validation des autorisations", "Revue du profil de l'entité"
+        ]
+
+    def test_missing_context_is_zero(self, transaction_factory):
+        """Sans contexte, le résultat est celui d'une entité sans historique"""
+        transactions = [transaction_factory(**case) for case in CASES]
+
+        assert_same_columns(
+            scoring.score_batch(transactions),
+            [scoring.score_batch(transactions, context=np.zeros((len(CASES), len(scoring.CONTEXT_COLUMNS))))]
+        )
+
+
+class TestBatchRequest:
+    """Bornes du nombre de transactions d'un lot"""
+
+    def test_empty_batch_rejected(self):
+        with pytest.raises(ValidationError):
+            BatchRiskAssessmentRequest(transactions=[])
+
+    def test_oversized_batch_rejected(self, transaction_factory):
+        transaction = transaction_factory()
+        limit = ai_settings.BATCH_MAX_TRANSACTIONS
+
+        assert len(BatchRiskAssessmentRequest(transactions=[transaction] * limit).transactions) == limit
+        with pytest.raises(ValidationError):
+            BatchRiskAssessmentRequest(transactions=[transaction] * (limit + 1))
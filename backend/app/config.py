@@ -2,8 +2,9 @@
 Configuration sécurisée de l'application backend
 """
 import os
+import json
 import secrets
-from typing import List
+from typing import Dict, List
 from dotenv import load_dotenv
 
 # Charger les variables d'environnement
@@ -75,7 +76,11 @@ class Settings:
         "Content-Type",
         "Accept",
         "Origin",
-        "X-Requested-With"
+        "X-Requested-With",
+        "If-None-Match",
+        "If-Modified-Since",
+        "Range",
+        "Upload-Offset"
     ]
     
     # JWT - Configuration sécurisée
@@ -88,6 +93,75 @@ class Settings:
     MAX_LOGIN_ATTEMPTS: int = int(os.getenv("MAX_LOGIN_ATTEMPTS", "5"))
     LOCKOUT_DURATION_MINUTES: int = int(os.getenv("LOCKOUT_DURATION_MINUTES", "15"))
     
+    # Réponses des listes : lignes SQL sérialisées directement par orjson
+    # (désactiver pour repasser par les modèles Pydantic)
+    FAST_LIST_RESPONSES: bool = os.getenv("FAST_LIST_RESPONSES", "True").lower() == "true"
+    
+    # Évaluation des offres : taux de conversion vers le XOF, complétés ou
+    # remplacés par EXCHANGE_RATES_XOF (JSON, ex. {"USD": 610.5})
+    EXCHANGE_RATES_XOF: Dict[str, float] = {
+        "XOF": 1.0,
+        "EUR": 655.957,  # Parité fixe
+        "USD": 600.0,
+        "GBP": 760.0,
+        "CAD": 440.0,
+        **json.loads(os.getenv("EXCHANGE_RATES_XOF", "{}"))
+    }
+    
+    # Index d'éligibilité des fournisseurs : reconstruction complète après ce délai
+    # (rattrape les modifications faites par les autres processus)
+    ELIGIBILITY_INDEX_TTL: int = int(os.getenv("ELIGIBILITY_INDEX_TTL", "300"))  # secondes
+    
+    # Notifications des appels d'offres (worker de fond)
+    NOTIFICATIONS_ENABLED: bool = os.getenv("NOTIFICATIONS_ENABLED", "True").lower() == "true"
+    NOTIFICATION_QUEUE_SIZE: int = int(os.getenv("NOTIFICATION_QUEUE_SIZE", "1000"))
+    NOTIFICATION_CHUNK_SIZE: int = int(os.getenv("NOTIFICATION_CHUNK_SIZE", "5000"))
+    NOTIFICATION_UNREAD_TTL: int = int(os.getenv("NOTIFICATION_UNREAD_TTL", "300"))  # secondes
+    
+    # Planificateur du cycle de vie des AO (un seul processus actif via verrou consultatif)
+    SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "True").lower() == "true"
+    SCHEDULER_LOCK_KEY: int = int(os.getenv("SCHEDULER_LOCK_KEY", "7310044"))
+    SCHEDULER_RESYNC_INTERVAL: int = int(os.getenv("SCHEDULER_RESYNC_INTERVAL", "60"))  # secondes
+    SCHEDULER_LEADER_RETRY: int = int(os.getenv("SCHEDULER_LEADER_RETRY", "30"))  # secondes
+    # Recalcul de eoi_count / bids_count par le planificateur (0 = désactivé)
+    COUNTER_RECONCILE_INTERVAL: int = int(os.getenv("COUNTER_RECONCILE_INTERVAL", "3600"))  # secondes
+    
+    # File d'écriture des soumissions d'offres (pics de dépôt avant clôture)
+    SUBMISSION_QUEUE_ENABLED: bool = os.getenv("SUBMISSION_QUEUE_ENABLED", "True").lower() == "true"
+    SUBMISSION_QUEUE_SIZE: int = int(os.getenv("SUBMISSION_QUEUE_SIZE", "2000"))
+    SUBMISSION_BATCH_SIZE: int = int(os.getenv("SUBMISSION_BATCH_SIZE", "100"))
+    SUBMISSION_JOURNAL_DIR: str = os.getenv("SUBMISSION_JOURNAL_DIR", "./storage/submissions")  # demandes acceptées non écrites
+    SUBMISSION_RECEIPT_TTL: int = int(os.getenv("SUBMISSION_RECEIPT_TTL", "604800"))  # secondes (7 jours)
+    
+    # Stockage des documents (adressé par contenu) et téléversements par morceaux
+    DOCUMENT_STORAGE_DIR: str = os.getenv("DOCUMENT_STORAGE_DIR", "./storage/documents")
+    DOCUMENT_CHUNK_SIZE: int = int(os.getenv("DOCUMENT_CHUNK_SIZE", str(8 * 1024 * 1024)))  # octets par requête
+    DOCUMENT_MAX_SIZE: int = int(os.getenv("DOCUMENT_MAX_SIZE", str(200 * 1024 * 1024)))  # octets
+    DOCUMENT_UPLOAD_TTL: int = int(os.getenv("DOCUMENT_UPLOAD_TTL", "86400"))  # secondes
+    DOCUMENT_ALLOWED_MIME_TYPES: List[str] = os.getenv(
+        "DOCUMENT_ALLOWED_MIME_TYPES",
+        "application/pdf,image/jpeg,image/png,application/zip,"
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document,"
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    ).split(",")
+    # Téléchargements servis par nginx (X-Accel-Redirect vers DOCUMENT_ACCEL_PREFIX)
+    DOCUMENT_ACCEL_REDIRECT: bool = os.getenv("DOCUMENT_ACCEL_REDIRECT", "False").lower() == "true"
+    DOCUMENT_ACCEL_PREFIX: str = os.getenv("DOCUMENT_ACCEL_PREFIX", "/protected-documents/")
+    
+    # Analyse des documents de soumission (pool de processus en arrière-plan)
+    DOCUMENT_ANALYSIS_ENABLED: bool = os.getenv("DOCUMENT_ANALYSIS_ENABLED", "True").lower() == "true"
+    DOCUMENT_ANALYSIS_WORKERS: int = int(os.getenv("DOCUMENT_ANALYSIS_WORKERS", "0"))  # 0 = nombre de cœurs
+    DOCUMENT_ANALYSIS_QUEUE_SIZE: int = int(os.getenv("DOCUMENT_ANALYSIS_QUEUE_SIZE", "1000"))
+    DOCUMENT_ANALYSIS_TIMEOUT: int = int(os.getenv("DOCUMENT_ANALYSIS_TIMEOUT", "120"))  # secondes par document
+    DOCUMENT_ANALYSIS_CACHE_TTL: int = int(os.getenv("DOCUMENT_ANALYSIS_CACHE_TTL", str(30 * 86400)))  # secondes
+
+    # Événements temps réel des AO (Server-Sent Events, diffusés via Redis pub/sub)
+    TENDER_EVENTS_ENABLED: bool = os.getenv("TENDER_EVENTS_ENABLED", "True").lower() == "true"
+    TENDER_EVENTS_CHANNEL: str = os.getenv("TENDER_EVENTS_CHANNEL", "tenders:events")
+    TENDER_EVENTS_HEARTBEAT: int = int(os.getenv("TENDER_EVENTS_HEARTBEAT", "15"))  # secondes
+    TENDER_EVENTS_CLIENT_QUEUE: int = int(os.getenv("TENDER_EVENTS_CLIENT_QUEUE", "100"))  # événements par client
+    TENDER_EVENTS_MAX_CLIENTS: int = int(os.getenv("TENDER_EVENTS_MAX_CLIENTS", "5000"))  # par processus
+    
     # Rate limiting
     RATE_LIMIT_REQUESTS: int = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
     RATE_LIMIT_WINDOW: int = int(os.getenv("RATE_LIMIT_WINDOW", "60"))
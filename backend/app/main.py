@@ -3,17 +3,25 @@ Application principale FastAPI pour CAMEG-CHAIN
 """
 from fastapi import FastAPI, Depends, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 from datetime import datetime
+import asyncio
 import uvicorn
 
 from app.config import settings
-from app.database import test_connection, init_db, get_db_stats
+from app.database import test_connection, init_db, get_db_stats, SessionLocal
 from app.routes.auth import router as auth_router
 from app.routes.supplier import router as supplier_router
 from app.routes.tender import router as tender_router
 from app.routes.ai_supplier import router as ai_supplier_router
+from app.routes.notification import router as notification_router
+from app.routes.document import router as document_router
+from app.services.notifications import notification_pipeline
+from app.services.scheduler import tender_scheduler
+from app.services.submissions import bid_submission_queue
+from app.services.document_analysis import document_analysis_pipeline
+from app.services.tender_events import tender_broadcaster
 from app.middleware.security import security_middleware
 from app.middleware.sentry import init_sentry
 from app.utils.logger import setup_logging, get_logger, log_api_request
@@ -48,6 +56,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    default_response_class=ORJSONResponse,
     contact={
         "name": "Équipe CAMEG-CHAIN",
         "email": "support@cameg-chain.com",
@@ -125,7 +134,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         message = error["msg"]
         errors.append(f"{field}: {message}")
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=422,
         content={
             "detail": "; ".join(errors),
@@ -137,7 +146,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Gestionnaire d'erreurs HTTP"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "detail": exc.detail
@@ -162,6 +171,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=settings.ALLOWED_METHODS,
     allow_headers=settings.ALLOWED_HEADERS,
+    expose_headers=["ETag", "Last-Modified", "Upload-Offset", "Content-Range", "Accept-Ranges"],
 )
 
 # Inclure les routes
@@ -169,6 +179,8 @@ app.include_router(auth_router)
 app.include_router(supplier_router)
 app.include_router(tender_router)
 app.include_router(ai_supplier_router)
+app.include_router(notification_router)
+app.include_router(document_router)
 
 @app.on_event("startup")
 async def startup_event():
@@ -194,8 +206,40 @@ async def startup_event():
     else:
         logger.error("⚠️  Problème de connexion à la base de données")
     
+    # Worker d'envoi des notifications d'appels d'offres
+    notification_pipeline.start(SessionLocal)
+    
+    # Transitions datées des AO (ouverture, clôture)
+    tender_scheduler.start(SessionLocal)
+    
+    # Writer des soumissions d'offres (commit groupé)
+    bid_submission_queue.start(SessionLocal)
+    
+    # Analyse des documents de soumission (pool de processus)
+    document_analysis_pipeline.start(SessionLocal)
+    
+    # Événements temps réel des AO (écoute du canal Redis)
+    tender_broadcaster.start()
+    
     logger.info(f"🌐 API disponible sur http://{settings.API_HOST}:{settings.API_PORT}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Événement d'arrêt de l'application"""
+    # Les arrêts attendent la fin de threads (jusqu'à plusieurs dizaines de
+    # secondes) : ils s'exécutent hors de la boucle d'événements pour que les
+    # requêtes en cours et les flux SSE se terminent proprement
+    await asyncio.gather(
+        asyncio.to_thread(tender_scheduler.stop),
+        # Écrire les soumissions déjà acceptées avant l'arrêt
+        asyncio.to_thread(bid_submission_queue.stop),
+        asyncio.to_thread(document_analysis_pipeline.stop)
+    )
+    # Terminer les envois de notifications déjà en file (y compris ceux
+    # mis en file par le planificateur et les soumissions ci-dessus)
+    await asyncio.to_thread(notification_pipeline.stop)
+    await asyncio.to_thread(tender_broadcaster.stop)
+
 @app.get("/")
 async def root():
     """Point d'entrée principal de l'API"""
@@ -266,6 +310,10 @@ async def health_check():
             "connected": ai_service_status,
             "url": settings.AI_SERVICE_URL
         },
+        "scheduler": tender_scheduler.status(),
+        "submissions_queued": bid_submission_queue.pending(),
+        "document_analysis_queued": document_analysis_pipeline.pending(),
+        "tender_events": tender_broadcaster.status(),
         "security": {
             "middleware": "active",
             "rate_limiting": "enabled",
@@ -285,7 +333,7 @@ async def readiness_check():
     db_status = test_connection()
     
     if not db_status:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=503,
             content={"status": "not_ready", "reason": "database_unavailable"}
         )
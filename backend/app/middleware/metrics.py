@@ -45,6 +45,12 @@ SUPPLIER_REGISTRATIONS = Counter(
     ['phase', 'status']
 )
 
+DOCUMENT_UPLOADS = Counter(
+    'document_uploads_total',
+    'Total completed document uploads',
+    ['document_type', 'result']
+)
+
 API_ERRORS = Counter(
     'api_errors_total',
     'Total API errors',
@@ -122,6 +128,10 @@ def record_supplier_registration(phase: str, status: str):
     """Enregistrer une inscription de fournisseur"""
     SUPPLIER_REGISTRATIONS.labels(phase=phase, status=status).inc()
 
+def record_document_upload(document_type: str, result: str):
+    """Enregistrer un téléversement de document terminé (stored / deduplicated)"""
+    DOCUMENT_UPLOADS.labels(document_type=document_type, result=result).inc()
+
 def record_database_connections(count: int):
     """Enregistrer le nombre de connexions à la base de données"""
     DATABASE_CONNECTIONS.set(count)
@@ -2,7 +2,7 @@
 Modèles pour l'évaluation IA proactive des fournisseurs
 Système d'analyse et de préqualification de nouveaux fournisseurs mondiaux
 """
-from sqlalchemy import Column, String, Boolean, DateTime, Float, Text, ForeignKey, JSON
+from sqlalchemy import Column, String, Boolean, DateTime, Float, Text, ForeignKey, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -84,6 +84,12 @@ class SupplierAI(Base):
     
     # Relations
     supplier = relationship("Supplier", backref="ai_evaluation")
+    
+    # Index pour les filtres de recherche IA
+    __table_args__ = (
+        Index('idx_suppliers_ai_prequalification', 'etat_prequalification'),
+        Index('idx_suppliers_ai_score_total', 'score_predictif_total'),
+    )
 
 class ExternalDataSource(Base):
     """Sources de données externes utilisées par l'IA"""
@@ -155,3 +161,8 @@ class SupplierRecommendation(Base):
     supplier_ai = relationship("SupplierAI", backref="recommendations")
     recommender = relationship("User", foreign_keys=[recommended_by])
     reviewer = relationship("User", foreign_keys=[reviewed_by])
+    
+    # Index pour les recommandations en attente
+    __table_args__ = (
+        Index('idx_supplier_recommendations_status', 'status'),
+    )
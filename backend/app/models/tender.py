@@ -1,10 +1,10 @@
 """
 Modèles pour la gestion des appels d'offres et soumissions
 """
-from sqlalchemy import Column, String, Boolean, DateTime, Enum, Text, ForeignKey, Integer, Float, JSON
+from sqlalchemy import Column, String, Boolean, DateTime, Enum, Text, ForeignKey, Integer, Float, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 import uuid
 import enum
 
@@ -116,6 +116,17 @@ class ExpressionOfInterest(Base):
     # Relations
     tender = relationship("Tender", back_populates="expressions_of_interest")
     supplier = relationship("Supplier")
+    
+    # Une seule manifestation active par fournisseur et par AO
+    # (cible de l'ON CONFLICT de TenderService.express_interest)
+    __table_args__ = (
+        Index(
+            'uq_expressions_of_interest_tender_supplier_active', 'tender_id', 'supplier_id',
+            unique=True,
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'")
+        ),
+    )
 
 class Bid(Base):
     """Soumission d'offre"""
@@ -165,6 +176,12 @@ class Bid(Base):
     supplier = relationship("Supplier")
     evaluator = relationship("User")
     documents = relationship("BidDocument", back_populates="bid")
+    
+    # Une seule soumission par fournisseur et par AO
+    # (cible de l'ON CONFLICT de TenderService.create_bid)
+    __table_args__ = (
+        Index('uq_bids_tender_supplier', 'tender_id', 'supplier_id', unique=True),
+    )
 
 class TenderDocument(Base):
     """Documents des appels d'offres"""
@@ -178,6 +195,7 @@ class TenderDocument(Base):
     file_path = Column(String(500), nullable=False)
     file_size = Column(Integer)
     mime_type = Column(String(100))
+    sha256 = Column(String(64), index=True)  # Empreinte du contenu (stockage adressé par contenu)
     
     # Visibilité
     is_public = Column(Boolean, default=True)
@@ -200,6 +218,7 @@ class BidDocument(Base):
     file_path = Column(String(500), nullable=False)
     file_size = Column(Integer)
     mime_type = Column(String(100))
+    sha256 = Column(String(64), index=True)  # Empreinte du contenu (stockage adressé par contenu)
     
     # Validation
     is_validated = Column(Boolean, default=False)
@@ -224,7 +243,7 @@ class TenderNotification(Base):
     tender_id = Column(UUID(as_uuid=True), ForeignKey("tenders.id"), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     
-    notification_type = Column(String(50), nullable=False)  # published, reminder, closed, awarded
+    notification_type = Column(String(50), nullable=False)  # published, closed, awarded, cancelled
     title = Column(String(200), nullable=False)
     message = Column(Text, nullable=False)
     
@@ -236,3 +255,8 @@ class TenderNotification(Base):
     # Relations
     tender = relationship("Tender")
     user = relationship("User")
+    
+    # Index pour la liste et le compteur de notifications non lues
+    __table_args__ = (
+        Index('idx_tender_notifications_user_unread', 'user_id', 'is_read'),
+    )
@@ -53,6 +53,7 @@ class User(Base):
     __table_args__ = (
         Index('idx_user_email', 'email'),
         Index('idx_user_status', 'status'),
+        Index('idx_user_status_id', 'status', 'id'),  # Pour les jointures suppliers -> users par statut
         Index('idx_user_role', 'role'),
         Index('idx_user_created_at', 'created_at'),
         Index('idx_user_last_login', 'last_login'),
@@ -128,6 +129,7 @@ class SupplierDocument(Base):
     file_path = Column(String(500), nullable=False)
     file_size = Column(String(20))
     mime_type = Column(String(100))
+    sha256 = Column(String(64), index=True)  # Empreinte du contenu (stockage adressé par contenu)
     
     # Validation
     is_validated = Column(Boolean, default=False)
@@ -4,9 +4,13 @@ Routes de l'application CAMEG-CHAIN
 from .auth import router as auth_router
 from .supplier import router as supplier_router
 from .tender import router as tender_router
+from .notification import router as notification_router
+from .document import router as document_router
 
 __all__ = [
     "auth_router",
     "supplier_router",
-    "tender_router"
+    "tender_router",
+    "notification_router",
+    "document_router"
 ]
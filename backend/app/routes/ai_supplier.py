@@ -2,7 +2,7 @@
 Routes pour l'évaluation IA des fournisseurs
 Système d'analyse et de préqualification proactive
 """
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request, Response
 from sqlalchemy.orm import Session
 from typing import Dict, List, Optional
 import asyncio
@@ -19,6 +19,9 @@ from app.schemas.ai_supplier import (
     RecommendationRequest, RecommendationResponse,
     SupplierAIResponse, ExternalDataSourceResponse
 )
+from app.utils.http_cache import (
+    CACHE_POLICIES, make_etag, is_not_modified, not_modified_response, apply_cache_headers
+)
 
 router = APIRouter(prefix="/ai/suppliers", tags=["AI Supplier Evaluation"])
 logger = logging.getLogger(__name__)
@@ -70,10 +73,14 @@ async def analyze_supplier(
 @router.get("/analysis/{supplier_id}", response_model=SupplierAIResponse)
 async def get_supplier_analysis(
     supplier_id: str,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
     Récupère les résultats de l'analyse IA d'un fournisseur
+    
+    Supporte les GET conditionnels (If-None-Match / If-Modified-Since).
     """
     try:
         supplier_ai = db.query(SupplierAI).filter(SupplierAI.supplier_id == supplier_id).first()
@@ -84,6 +91,19 @@ async def get_supplier_analysis(
         if not supplier:
             raise HTTPException(status_code=404, detail="Fournisseur non trouvé")
         
+        # Valider le cache client avant de sérialiser l'analyse
+        analysis_modified = supplier_ai.updated_at or supplier_ai.created_at
+        supplier_modified = supplier.updated_at or supplier.created_at
+        last_modified = max(
+            (value for value in (analysis_modified, supplier_modified) if value is not None),
+            default=None
+        )
+        etag = make_etag("supplier_analysis", supplier_ai.id, analysis_modified, supplier_modified)
+        cache_control = CACHE_POLICIES["supplier_analysis"]
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified, cache_control)
+        
+        apply_cache_headers(response, etag, last_modified, cache_control)
         return SupplierAIResponse(
             supplier_id=str(supplier_ai.supplier_id),
             company_name=supplier.company_name,
@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from datetime import timedelta
+from typing import Optional
 
 from app.database import get_db
 from app.services.auth import AuthService
@@ -21,6 +22,7 @@ from app.config import settings
 
 router = APIRouter(prefix="/api/v1/auth", tags=["Authentication"])
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -53,6 +55,15 @@ def get_current_user(
     
     return user
 
+def get_current_user_optional(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: Session = Depends(get_db)
+) -> Optional[User]:
+    """Obtenir l'utilisateur actuel s'il est authentifié (routes publiques)"""
+    if credentials is None:
+        return None
+    return get_current_user(credentials, db)
+
 @router.post("/register/phase1", response_model=SupplierPhase1Response)
 async def register_supplier_phase1(
     supplier_data: SupplierPhase1Create,
@@ -0,0 +1,87 @@
+"""
+Routes pour le téléversement et le téléchargement des documents
+"""
+from fastapi import APIRouter, Depends, Header, Request, status
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.database import get_db
+from app.services.documents import DocumentService
+from app.services.document_analysis import document_analysis_pipeline
+from app.schemas.tender import UploadSessionCreate, UploadSessionResponse
+from app.config import settings
+from app.models.user import User
+
+router = APIRouter(prefix="/api/v1/documents", tags=["Documents"])
+
+# Import de la fonction d'authentification depuis auth.py
+from app.routes.auth import get_current_user as get_current_user_from_auth
+from app.routes.auth import get_current_user_optional
+
+def upload_state(upload: dict, offset: int, document: Optional[dict] = None) -> UploadSessionResponse:
+    """État d'un téléversement"""
+    return UploadSessionResponse(
+        upload_id=upload["upload_id"],
+        offset=offset,
+        total_size=upload["total_size"],
+        chunk_size=settings.DOCUMENT_CHUNK_SIZE,
+        complete=document is not None,
+        document=document
+    )
+
+@router.post("/uploads", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    upload_data: UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_from_auth)
+):
+    """
+    Ouvrir un téléversement par morceaux (document fournisseur, d'appel d'offres ou de soumission)
+    """
+    upload = DocumentService.create_upload(db, current_user, upload_data)
+    return upload_state(upload, 0)
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_user_from_auth)
+):
+    """
+    Obtenir le décalage courant d'un téléversement (reprise après coupure)
+    """
+    upload = DocumentService.get_upload(current_user, upload_id)
+    return upload_state(upload, DocumentService.upload_offset(upload))
+
+@router.put("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_from_auth)
+):
+    """
+    Envoyer un morceau (corps brut) à partir du décalage Upload-Offset
+    
+    Le dernier morceau enregistre le document et le retourne ; un document de
+    soumission est ensuite analysé en arrière-plan.
+    """
+    upload = DocumentService.get_upload(current_user, upload_id)
+    offset, document = await DocumentService.append_chunk(db, upload, upload_offset, request)
+    if document is not None and upload["target"] == "bid":
+        document_analysis_pipeline.enqueue(document["id"])
+    return upload_state(upload, offset, document)
+
+@router.get("/{target}/{document_id}/download")
+async def download_document(
+    target: str,
+    document_id: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
+    """
+    Télécharger un document (supplier, tender ou bid) ; prend en charge l'en-tête Range
+    """
+    document = DocumentService.get_document_for_download(db, current_user, target, document_id)
+    return DocumentService.download_response(request, document)
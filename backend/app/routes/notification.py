@@ -0,0 +1,65 @@
+"""
+Routes pour les notifications des appels d'offres
+"""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.database import get_db
+from app.services.notifications import NotificationService
+from app.schemas.tender import NotificationResponse, UnreadCountResponse
+from app.models.user import User
+
+router = APIRouter(prefix="/api/v1/notifications", tags=["Notifications"])
+
+# Import de la fonction d'authentification depuis auth.py
+from app.routes.auth import get_current_user as get_current_user_from_auth
+
+@router.get("/", response_model=List[NotificationResponse])
+async def get_my_notifications(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    unread_only: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_from_auth)
+):
+    """
+    Obtenir mes notifications (les plus récentes d'abord)
+    """
+    notifications = NotificationService.get_user_notifications(
+        db, str(current_user.id), skip, limit, unread_only
+    )
+    return [NotificationResponse.from_orm(notification) for notification in notifications]
+
+@router.get("/unread-count", response_model=UnreadCountResponse)
+async def get_unread_count(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_from_auth)
+):
+    """
+    Obtenir le nombre de notifications non lues (mis en cache)
+    """
+    return UnreadCountResponse(unread_count=NotificationService.get_unread_count(db, str(current_user.id)))
+
+@router.put("/read-all", response_model=UnreadCountResponse)
+async def mark_all_notifications_read(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_from_auth)
+):
+    """
+    Marquer toutes mes notifications comme lues
+    """
+    NotificationService.mark_all_read(db, str(current_user.id))
+    return UnreadCountResponse(unread_count=0)
+
+@router.put("/{notification_id}/read", response_model=NotificationResponse)
+async def mark_notification_read(
+    notification_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_from_auth)
+):
+    """
+    Marquer une notification comme lue
+    """
+    notification = NotificationService.mark_read(db, str(current_user.id), notification_id)
+    return NotificationResponse.from_orm(notification)
@@ -1,17 +1,20 @@
 """
 Routes pour la gestion des fournisseurs
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.database import get_db
 from app.services.supplier import SupplierService
+from app.services.export import ExportService
 from app.services.auth import AuthService
 from app.schemas.user import (
     SupplierResponse,
     SupplierPhase2Update,
-    AdminDashboardResponse
+    AdminDashboardResponse,
+    SupplierBulkValidationRequest,
+    SupplierBulkValidationResponse
 )
 from app.models.user import User, UserRole
 
@@ -167,6 +170,38 @@ async def validate_supplier(
             detail=f"Erreur lors de la validation: {str(e)}"
         )
 
+@router.post("/admin/bulk-validate", response_model=SupplierBulkValidationResponse)
+async def bulk_validate_suppliers(
+    request: SupplierBulkValidationRequest,
+    db: Session = Depends(get_db),
+    admin = Depends(require_admin)
+):
+    """
+    Valider ou rejeter plusieurs fournisseurs en une requête
+    
+    Retourne le résultat de chaque fournisseur (approved, rejected,
+    unchanged ou not_found).
+    """
+    try:
+        results = SupplierService.validate_suppliers_bulk(
+            db, request.supplier_ids, request.action, request.notes, admin.id
+        )
+        return SupplierBulkValidationResponse(
+            action=request.action,
+            processed=len(results),
+            updated=len([r for r in results if r["outcome"] in ("approved", "rejected")]),
+            results=results
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la validation en lot: {str(e)}"
+        )
+
 @router.get("/admin/all", response_model=List[SupplierResponse])
 async def get_all_suppliers_admin(
     skip: int = 0,
@@ -179,3 +214,17 @@ async def get_all_suppliers_admin(
     """
     suppliers = SupplierService.get_all_suppliers(db, skip, limit)
     return [SupplierResponse.from_orm(s) for s in suppliers]
+
+@router.get("/admin/export")
+async def export_suppliers(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    status: Optional[str] = Query(None, description="Statut du compte (ex: en_attente_validation)"),
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    admin = Depends(require_admin)
+):
+    """
+    Exporter les fournisseurs en flux NDJSON ou CSV (admin)
+    """
+    query = ExportService.suppliers_query(status, skip, limit)
+    return ExportService.response(query, export_format, "suppliers")
@@ -1,27 +1,46 @@
 """
 Routes pour la gestion des appels d'offres
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
+from uuid import UUID
+import asyncio
 
+from app.config import settings
 from app.database import get_db
 from app.services.tender import TenderService
+from app.services.evaluation import EvaluationService
+from app.services.eligibility import eligibility_index
+from app.services.submissions import bid_submission_queue, SubmissionReceiptStore
+from app.services.tender_events import tender_broadcaster, format_sse
 from app.services.auth import AuthService
 from app.schemas.tender import (
     TenderCreate, TenderUpdate, TenderResponse, TenderListResponse,
     ExpressionOfInterestCreate, ExpressionOfInterestResponse,
-    BidCreate, BidUpdate, BidResponse, TenderPermissions,
-    TenderStats, SupplierTenderStats
+    BidCreate, BidUpdate, BidResponse, SubmissionReceipt, TenderPermissions,
+    TenderStats, SupplierTenderStats, TenderEvaluationResult, BulkEvaluationResponse,
+    EligibleSuppliersResponse
 )
 from app.models.user import User, UserRole
-from app.models.tender import TenderStatus, TenderType
+from app.models.tender import TenderStatus, TenderType, BidStatus
+from app.services.export import ExportService
+from app.utils.http_cache import (
+    CACHE_POLICIES, make_etag, is_not_modified, not_modified_response, apply_cache_headers,
+    cache_headers
+)
 
 router = APIRouter(prefix="/api/v1/tenders", tags=["Tenders"])
 
+# Champs de permission exposés par TenderResponse
+TENDER_PERMISSION_FIELDS = ["can_view", "can_express_interest", "can_submit_bid", "missing_requirements"]
+
 # Import de la fonction d'authentification depuis auth.py
 from app.routes.auth import get_current_user as get_current_user_from_auth
+from app.routes.auth import get_current_user_optional
 
 def require_admin_or_manager(current_user: User = Depends(get_current_user_from_auth)):
     """Vérifier que l'utilisateur est admin ou manager"""
@@ -35,48 +54,143 @@ def require_admin_or_manager(current_user: User = Depends(get_current_user_from_
 # Routes publiques (lecture seule)
 @router.get("/", response_model=TenderListResponse)
 async def get_tenders(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     status: Optional[TenderStatus] = Query(None),
     category: Optional[str] = Query(None),
     tender_type: Optional[TenderType] = Query(None),
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_from_auth)
+    current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     """
     Obtenir la liste des appels d'offres (public)
+    
+    Supporte les GET conditionnels (If-None-Match / If-Modified-Since).
     """
-    tenders = TenderService.get_tenders(db, skip, limit, status, category, tender_type)
+    if settings.FAST_LIST_RESPONSES:
+        tenders = TenderService.get_tender_rows(db, skip, limit, status, category, tender_type)
+    else:
+        tenders = TenderService.get_tenders(db, skip, limit, status, category, tender_type)
     
-    # Ajouter les permissions pour chaque AO
-    tender_responses = []
-    user_id = str(current_user.id) if current_user else None
+    # Valider le cache client avant de calculer les permissions et de sérialiser
+    last_modified = max(
+        (tender.updated_at or tender.created_at for tender in tenders),
+        default=None
+    )
+    etag = make_etag(
+        "tenders", skip, limit, status, category, tender_type,
+        TenderService.get_permission_context(current_user),
+        *[f"{tender.id}:{tender.updated_at or tender.created_at}" for tender in tenders]
+    )
+    cache_control = CACHE_POLICIES["tender_private" if current_user else "tender_public"]
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified, cache_control)
+    
+    # Permissions pour chaque AO (utilisateur et fournisseur chargés une seule fois)
+    supplier = current_user.supplier_profile if current_user else None
+    total = len(tenders)  # TODO: Implémenter le count total
+    pagination = {
+        "total": total,
+        "page": skip // limit + 1,
+        "size": limit,
+        "has_next": len(tenders) == limit,
+        "has_prev": skip > 0
+    }
     
+    if settings.FAST_LIST_RESPONSES:
+        # Chemin rapide : dictionnaires construits depuis les lignes, sans validation Pydantic
+        tender_items = []
+        for tender in tenders:
+            permissions = TenderService.compute_permissions(tender, current_user, supplier)
+            item = tender._asdict()
+            for field in TENDER_PERMISSION_FIELDS:
+                item[field] = permissions[field]
+            tender_items.append(item)
+        
+        return ORJSONResponse(
+            content={"tenders": tender_items, **pagination},
+            headers=cache_headers(etag, last_modified, cache_control)
+        )
+    
+    tender_responses = []
     for tender in tenders:
-        permissions = TenderService.get_tender_permissions(db, str(tender.id), user_id)
+        permissions = TenderService.compute_permissions(tender, current_user, supplier)
         tender_dict = tender.__dict__.copy()
         tender_dict.update(permissions)
         tender_responses.append(TenderResponse(**tender_dict))
     
-    total = len(tenders)  # TODO: Implémenter le count total
+    apply_cache_headers(response, etag, last_modified, cache_control)
+    return TenderListResponse(tenders=tender_responses, **pagination)
+
+@router.get("/events")
+async def stream_tender_events(
+    request: Request,
+    tender_id: List[str] = Query([]),
+    category: List[str] = Query([])
+):
+    """
+    Flux Server-Sent Events des changements d'appels d'offres (public)
+    
+    Filtrable par AO (tender_id) et/ou par catégorie (category), paramètres
+    répétables. Aucune session de base de données n'est tenue pendant le
+    flux : un commentaire de maintien est envoyé toutes les
+    TENDER_EVENTS_HEARTBEAT secondes, et un événement « resync » invite le
+    client à relire la liste s'il a manqué des événements.
+    """
+    if not settings.TENDER_EVENTS_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Flux d'événements désactivé"
+        )
+    
+    subscriber = tender_broadcaster.subscribe(tender_id, category)
+    if subscriber is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Trop de clients connectés au flux d'événements, veuillez réessayer plus tard",
+            headers={"Retry-After": "30"}
+        )
     
-    return TenderListResponse(
-        tenders=tender_responses,
-        total=total,
-        page=skip // limit + 1,
-        size=limit,
-        has_next=len(tenders) == limit,
-        has_prev=skip > 0
+    async def event_stream():
+        try:
+            # Délai de reconnexion automatique du navigateur (EventSource)
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                if subscriber.lagging:
+                    while not subscriber.queue.empty():
+                        subscriber.queue.get_nowait()
+                    subscriber.lagging = False
+                    yield format_sse({"event": "resync", "at": datetime.utcnow().isoformat()})
+                    continue
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), settings.TENDER_EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            tender_broadcaster.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 @router.get("/{tender_id}", response_model=TenderResponse)
 async def get_tender(
-    tender_id: str,
+    tender_id: UUID,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_from_auth)
+    current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     """
     Obtenir un appel d'offres par ID (public)
+    
+    Supporte les GET conditionnels (If-None-Match / If-Modified-Since).
     """
     tender = TenderService.get_tender_by_id(db, tender_id)
     if not tender:
@@ -85,9 +199,18 @@ async def get_tender(
             detail="Appel d'offres non trouvé"
         )
     
-    # Incrémenter le compteur de vues
-    tender.views_count += 1
-    db.commit()
+    # Incrémenter le compteur de vues (sans toucher updated_at)
+    TenderService.increment_views(db, tender_id)
+    
+    # Valider le cache client avant de calculer les permissions et de sérialiser
+    last_modified = tender.updated_at or tender.created_at
+    etag = make_etag(
+        "tender", tender.id, last_modified,
+        TenderService.get_permission_context(current_user)
+    )
+    cache_control = CACHE_POLICIES["tender_private" if current_user else "tender_public"]
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified, cache_control)
     
     # Ajouter les permissions
     user_id = str(current_user.id) if current_user else None
@@ -96,6 +219,7 @@ async def get_tender(
     tender_dict = tender.__dict__.copy()
     tender_dict.update(permissions)
     
+    apply_cache_headers(response, etag, last_modified, cache_control)
     return TenderResponse(**tender_dict)
 
 @router.get("/{tender_id}/permissions", response_model=TenderPermissions)
@@ -150,7 +274,7 @@ async def express_interest(
     return ExpressionOfInterestResponse.from_orm(eoi)
 
 # Routes pour les soumissions
-@router.post("/{tender_id}/bids", response_model=BidResponse)
+@router.post("/{tender_id}/bids", response_model=SubmissionReceipt, status_code=status.HTTP_202_ACCEPTED)
 async def create_bid(
     tender_id: str,
     bid_data: BidCreate,
@@ -159,7 +283,12 @@ async def create_bid(
 ):
     """
     Créer une soumission pour un appel d'offres
+    
+    La demande est horodatée à sa réception puis enregistrée par la file des
+    soumissions ; l'accusé retourné se consulte via /submissions/{receipt_id}.
     """
+    received_at = datetime.utcnow()
+    
     # Vérifier que l'utilisateur est un fournisseur
     if current_user.role != UserRole.SUPPLIER:
         raise HTTPException(
@@ -184,18 +313,23 @@ async def create_bid(
             detail=f"Vous n'êtes pas éligible pour soumettre une offre. {', '.join(permissions['missing_requirements'])}"
         )
     
-    bid = TenderService.create_bid(db, tender_id, str(supplier.id), bid_data)
-    return BidResponse.from_orm(bid)
+    # Journalisation durable (fsync) hors de la boucle asyncio
+    return await run_in_threadpool(
+        bid_submission_queue.submit,
+        db, "create", supplier.id, received_at, tender_id=tender_id, bid_data=bid_data
+    )
 
-@router.put("/bids/{bid_id}/submit", response_model=BidResponse)
+@router.put("/bids/{bid_id}/submit", response_model=SubmissionReceipt, status_code=status.HTTP_202_ACCEPTED)
 async def submit_bid(
     bid_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_from_auth)
 ):
     """
-    Soumettre une offre (passer de draft à submitted)
+    Soumettre une offre (passer de draft à submitted) via la file des soumissions
     """
+    received_at = datetime.utcnow()
+    
     # Vérifier que l'utilisateur est le propriétaire de la soumission
     from app.models.tender import Bid
     bid = db.query(Bid).filter(Bid.id == bid_id).first()
@@ -214,8 +348,31 @@ async def submit_bid(
             detail="Vous ne pouvez pas soumettre cette offre"
         )
     
-    bid = TenderService.submit_bid(db, bid_id)
-    return BidResponse.from_orm(bid)
+    return await run_in_threadpool(
+        bid_submission_queue.submit,
+        db, "submit", supplier.id, received_at, tender_id=bid.tender_id, bid_id=bid.id
+    )
+
+@router.get("/submissions/{receipt_id}", response_model=SubmissionReceipt)
+async def get_submission_receipt(
+    receipt_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_from_auth)
+):
+    """
+    Consulter l'accusé de réception d'une soumission mise en file
+    """
+    receipt = SubmissionReceiptStore.get(receipt_id)
+    
+    from app.services.supplier import SupplierService
+    supplier = SupplierService.get_supplier_by_user_id(db, str(current_user.id))
+    if not receipt or not supplier or receipt["supplier_id"] != str(supplier.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Accusé de réception non trouvé"
+        )
+    
+    return receipt
 
 @router.get("/bids/my-bids", response_model=List[BidResponse])
 async def get_my_bids(
@@ -260,22 +417,7 @@ async def update_tender(
     """
     Mettre à jour un appel d'offres (admin/manager)
     """
-    tender = TenderService.get_tender_by_id(db, tender_id)
-    if not tender:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Appel d'offres non trouvé"
-        )
-    
-    # Mettre à jour les champs fournis
-    update_dict = tender_data.dict(exclude_unset=True)
-    for field, value in update_dict.items():
-        setattr(tender, field, value)
-    
-    tender.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(tender)
-    
+    tender = TenderService.update_tender(db, tender_id, tender_data)
     return TenderResponse.from_orm(tender)
 
 @router.get("/admin/stats", response_model=TenderStats)
@@ -289,6 +431,58 @@ async def get_tender_stats(
     stats = TenderService.get_tender_stats(db)
     return TenderStats(**stats)
 
+@router.post("/admin/evaluate/closing-today", response_model=BulkEvaluationResponse)
+async def evaluate_tenders_closing_today(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin_or_manager)
+):
+    """
+    Reclasser les soumissions de tous les appels d'offres clôturant aujourd'hui (admin/manager)
+    """
+    results = EvaluationService.evaluate_closing_today(db, current_user.id)
+    return BulkEvaluationResponse(
+        tenders_evaluated=len(results),
+        bids_evaluated=sum(len(result["ranking"]) for result in results),
+        results=results
+    )
+
+@router.post("/admin/reconcile-counters")
+async def reconcile_tender_counters(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin_or_manager)
+):
+    """
+    Recalculer eoi_count et bids_count depuis les soumissions et manifestations d'intérêt (admin/manager)
+    """
+    return TenderService.reconcile_counters(db)
+
+@router.get("/admin/export/tenders")
+async def export_tenders(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    status: Optional[TenderStatus] = Query(None),
+    category: Optional[str] = Query(None),
+    tender_type: Optional[TenderType] = Query(None),
+    current_user: User = Depends(require_admin_or_manager)
+):
+    """
+    Exporter les appels d'offres en flux NDJSON ou CSV (admin/manager)
+    """
+    query = ExportService.tenders_query(status, category, tender_type)
+    return ExportService.response(query, export_format, "tenders")
+
+@router.get("/admin/export/bids")
+async def export_bids(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    tender_id: Optional[str] = Query(None),
+    status: Optional[BidStatus] = Query(None),
+    current_user: User = Depends(require_admin_or_manager)
+):
+    """
+    Exporter les soumissions en flux NDJSON ou CSV (admin/manager)
+    """
+    query = ExportService.bids_query(tender_id, status)
+    return ExportService.response(query, export_format, "bids")
+
 @router.get("/{tender_id}/bids", response_model=List[BidResponse])
 async def get_tender_bids(
     tender_id: str,
@@ -298,5 +492,53 @@ async def get_tender_bids(
     """
     Obtenir les soumissions d'un appel d'offres (admin/manager)
     """
+    if settings.FAST_LIST_RESPONSES:
+        # Chemin rapide : dictionnaires construits depuis les lignes, sans validation Pydantic
+        return ORJSONResponse(content=TenderService.get_tender_bid_rows(db, tender_id))
+    
     bids = TenderService.get_tender_bids(db, tender_id)
     return [BidResponse.from_orm(bid) for bid in bids]
+
+@router.get("/{tender_id}/eligible-suppliers", response_model=EligibleSuppliersResponse)
+async def get_eligible_suppliers(
+    tender_id: str,
+    action: str = Query("express_interest", pattern="^(express_interest|submit_bid)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin_or_manager)
+):
+    """
+    Lister les fournisseurs éligibles à un appel d'offres (admin/manager)
+    
+    Les règles d'éligibilité sont évaluées sur l'index inversé des
+    fournisseurs, sans parcours individuel.
+    """
+    tender = TenderService.get_tender_by_id(db, tender_id)
+    if not tender:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Appel d'offres non trouvé"
+        )
+    
+    supplier_ids = eligibility_index.eligible_suppliers(db, tender, action)
+    return EligibleSuppliersResponse(
+        tender_id=tender.id,
+        action=action,
+        total=len(supplier_ids),
+        supplier_ids=supplier_ids
+    )
+
+@router.post("/{tender_id}/evaluate", response_model=TenderEvaluationResult)
+async def evaluate_tender(
+    tender_id: str,
+    persist: bool = Query(True, description="Enregistrer les notes (désactiver pour un aperçu)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin_or_manager)
+):
+    """
+    Noter et classer les soumissions d'un appel d'offres (admin/manager)
+    
+    Note financière par la formule du prix le plus bas (montants convertis
+    dans une devise commune), pondérée avec la note technique selon les
+    critères d'évaluation de l'appel d'offres.
+    """
+    return EvaluationService.evaluate_tender(db, tender_id, current_user.id, persist)
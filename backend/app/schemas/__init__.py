@@ -13,6 +13,9 @@ from .user import (
     LoginRequest,
     TokenResponse,
     SupplierValidationRequest,
+    SupplierBulkValidationRequest,
+    SupplierValidationOutcome,
+    SupplierBulkValidationResponse,
     AdminDashboardResponse
 )
 
@@ -27,9 +30,14 @@ from .tender import (
     BidUpdate,
     BidResponse,
     TenderPermissions,
+    EligibleSuppliersResponse,
     BidEvaluation,
     BidEvaluationResponse,
+    BidRanking,
+    TenderEvaluationResult,
+    BulkEvaluationResponse,
     NotificationResponse,
+    UnreadCountResponse,
     TenderStats,
     SupplierTenderStats
 )
@@ -46,6 +54,9 @@ __all__ = [
     "LoginRequest",
     "TokenResponse",
     "SupplierValidationRequest",
+    "SupplierBulkValidationRequest",
+    "SupplierValidationOutcome",
+    "SupplierBulkValidationResponse",
     "AdminDashboardResponse",
     "TenderCreate",
     "TenderUpdate",
@@ -57,9 +68,14 @@ __all__ = [
     "BidUpdate",
     "BidResponse",
     "TenderPermissions",
+    "EligibleSuppliersResponse",
     "BidEvaluation",
     "BidEvaluationResponse",
+    "BidRanking",
+    "TenderEvaluationResult",
+    "BulkEvaluationResponse",
     "NotificationResponse",
+    "UnreadCountResponse",
     "TenderStats",
     "SupplierTenderStats"
 ]
@@ -29,6 +29,7 @@ class TenderBase(BaseModel):
 class TenderCreate(TenderBase):
     """Création d'un appel d'offres"""
     reference: str
+    status: TenderStatus = TenderStatus.DRAFT  # published / open : publication immédiate
     
     @validator('closing_date')
     def validate_closing_date(cls, v, values):
@@ -147,6 +148,17 @@ class BidResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class SubmissionReceipt(BaseModel):
+    """Accusé de réception d'une création ou d'un dépôt d'offre"""
+    receipt_id: UUID
+    operation: str  # create, submit
+    tender_id: Optional[UUID] = None
+    bid_id: Optional[UUID] = None
+    status: str  # queued, committed, rejected
+    received_at: datetime  # Heure de réception, qui fait foi pour la date de clôture
+    processed_at: Optional[datetime] = None
+    detail: Optional[str] = None
+
 # Schémas pour les documents
 class DocumentUpload(BaseModel):
     """Upload de document"""
@@ -168,7 +180,43 @@ class DocumentResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class UploadSessionCreate(BaseModel):
+    """Ouverture d'un téléversement par morceaux"""
+    target: str  # supplier, tender, bid
+    owner_id: Optional[UUID] = None  # AO ou soumission (le fournisseur est celui de l'utilisateur)
+    document_type: str
+    file_name: str
+    mime_type: str
+    total_size: int
+
+class StoredDocumentResponse(BaseModel):
+    """Document enregistré à la fin d'un téléversement"""
+    id: UUID
+    target: str
+    document_type: str
+    file_name: str
+    file_size: int
+    mime_type: Optional[str] = None
+    sha256: str
+    deduplicated: bool  # Contenu déjà présent dans le stockage
+
+class UploadSessionResponse(BaseModel):
+    """État d'un téléversement par morceaux"""
+    upload_id: UUID
+    offset: int  # Octets reçus ; le prochain morceau commence à ce décalage
+    total_size: int
+    chunk_size: int  # Taille maximale d'un morceau
+    complete: bool
+    document: Optional[StoredDocumentResponse] = None
+
 # Schémas pour les permissions
+class EligibleSuppliersResponse(BaseModel):
+    """Fournisseurs éligibles à un appel d'offres"""
+    tender_id: UUID
+    action: str  # express_interest, submit_bid
+    total: int
+    supplier_ids: List[UUID]
+
 class TenderPermissions(BaseModel):
     """Permissions d'un utilisateur sur un appel d'offres"""
     can_view: bool
@@ -199,6 +247,38 @@ class BidEvaluationResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class BidRanking(BaseModel):
+    """Position d'une soumission dans le classement d'un appel d'offres"""
+    rank: int
+    bid_id: UUID
+    bid_reference: str
+    supplier_id: UUID
+    total_amount: Optional[float] = None
+    currency: Optional[str] = None
+    converted_amount: Optional[float] = None  # Dans la devise de l'appel d'offres
+    financial_offer_valid: bool
+    technically_evaluated: bool  # Faux : aucune note technique saisie (comptée 0)
+    technical_score: Optional[float] = None
+    financial_score: float
+    total_score: float
+
+class TenderEvaluationResult(BaseModel):
+    """Résultat de l'évaluation d'un appel d'offres"""
+    tender_id: UUID
+    reference: str
+    currency: Optional[str] = None
+    technical_weight: float
+    financial_weight: float
+    lowest_amount: Optional[float] = None
+    evaluated_at: datetime
+    ranking: List[BidRanking]
+
+class BulkEvaluationResponse(BaseModel):
+    """Réponse du reclassement des appels d'offres clôturant aujourd'hui"""
+    tenders_evaluated: int
+    bids_evaluated: int
+    results: List[TenderEvaluationResult]
+
 # Schémas pour les notifications
 class NotificationResponse(BaseModel):
     """Réponse notification"""
@@ -214,6 +294,10 @@ class NotificationResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class UnreadCountResponse(BaseModel):
+    """Nombre de notifications non lues"""
+    unread_count: int
+
 # Schémas pour les statistiques
 class TenderStats(BaseModel):
     """Statistiques des appels d'offres"""
@@ -258,6 +258,26 @@ class SupplierValidationRequest(BaseModel):
     action: str  # "approve" ou "reject"
     notes: Optional[str] = None
 
+class SupplierBulkValidationRequest(BaseModel):
+    """Validation ou rejet de plusieurs fournisseurs en une requête"""
+    supplier_ids: List[UUID] = Field(..., min_length=1, max_length=1000)
+    action: str  # "approve" ou "reject"
+    notes: Optional[str] = None
+
+class SupplierValidationOutcome(BaseModel):
+    """Résultat de la validation d'un fournisseur"""
+    supplier_id: UUID
+    outcome: str  # approved, rejected, unchanged, not_found
+    previous_status: Optional[str] = None
+    status: Optional[str] = None
+
+class SupplierBulkValidationResponse(BaseModel):
+    """Réponse de la validation en lot"""
+    action: str
+    processed: int
+    updated: int
+    results: List[SupplierValidationOutcome]
+
 class AdminDashboardResponse(BaseModel):
     """Tableau de bord administrateur"""
     total_suppliers: int
@@ -4,9 +4,11 @@ Services de l'application CAMEG-CHAIN
 from .auth import AuthService
 from .supplier import SupplierService
 from .tender import TenderService
+from .evaluation import EvaluationService
 
 __all__ = [
     "AuthService",
     "SupplierService",
-    "TenderService"
+    "TenderService",
+    "EvaluationService"
 ]
@@ -16,6 +16,7 @@ import logging
 from app.models.user import User, UserRole, UserStatus
 from app.schemas.user import UserCreate, LoginRequest
 from app.config import settings
+from app.services.eligibility import eligibility_index
 
 # Configuration du logging
 logger = logging.getLogger(__name__)
@@ -289,6 +290,7 @@ class AuthService:
         user.status = status
         db.commit()
         db.refresh(user)
+        eligibility_index.refresh(db, user_ids=[user.id])
         
         return user
     
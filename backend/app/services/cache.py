@@ -4,7 +4,7 @@ Service de cache Redis pour CAMEG-CHAIN
 import json
 import pickle
 import os
-from typing import Any, Optional, Union
+from typing import Any, List, Optional, Union
 import redis
 from redis.exceptions import RedisError
 import logging
@@ -80,6 +80,16 @@ class RedisCache:
             logger.error(f"Erreur Redis DELETE {key}: {e}")
             return False
     
+    def delete_many(self, keys: List[str], chunk_size: int = 1000) -> int:
+        """Supprimer plusieurs clés (une commande DEL par bloc)"""
+        deleted = 0
+        try:
+            for start in range(0, len(keys), chunk_size):
+                deleted += self.redis_client.delete(*keys[start:start + chunk_size])
+        except RedisError as e:
+            logger.error(f"Erreur Redis DELETE ({len(keys)} clés): {e}")
+        return deleted
+    
     def exists(self, key: str) -> bool:
         """Vérifier si une clé existe"""
         try:
@@ -157,6 +167,10 @@ class MemoryCache:
         """Supprimer une clé du cache mémoire"""
         return self._cache.pop(key, None) is not None
     
+    def delete_many(self, keys: List[str], chunk_size: int = 1000) -> int:
+        """Supprimer plusieurs clés du cache mémoire"""
+        return sum(self._cache.pop(key, None) is not None for key in keys)
+    
     def exists(self, key: str) -> bool:
         """Vérifier si une clé existe"""
         return key in self._cache
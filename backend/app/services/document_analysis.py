@@ -0,0 +1,300 @@
+"""
+Analyse des documents de soumission en arrière-plan
+
+Chaque document de soumission téléversé met un travail en file (sans
+attendre l'analyse). Des threads de répartition confient l'extraction
+(signature, nombre de pages, texte) à un pool de processus borné par le
+nombre de cœurs, puis enregistrent le résultat dans bid_documents.ai_analysis
+et recalculent la conformité de la soumission : documents requis par l'AO
+présents, problèmes détectés par document, score de conformité.
+
+Le résultat d'extraction ne dépend que du contenu : il est mis en cache par
+empreinte SHA-256 (et retrouvé en base sur un autre document de même
+empreinte), si bien qu'un même certificat n'est jamais analysé deux fois.
+"""
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.tender import Bid, BidDocument
+from app.services.cache import get_cache
+from app.services.documents import DocumentStorage
+from app.utils.document_text import ANALYZER_VERSION, empty_result, extract_document
+
+logger = logging.getLogger(__name__)
+
+# Problème détecté -> message pour le fournisseur
+ISSUE_MESSAGES = {
+    "missing_file": "Le fichier du document {file_name} est introuvable",
+    "empty": "Le document {file_name} est vide",
+    "content_type_mismatch": "Le contenu de {file_name} ne correspond pas à son type déclaré",
+    "encrypted": "Le document {file_name} est protégé par un mot de passe",
+    "unreadable": "Le document {file_name} est illisible ou corrompu",
+    "no_text_layer": "Le document {file_name} ne contient pas de texte exploitable (numérisation sans OCR)",
+    "scanned_image": "Le document {file_name} est une image, une vérification manuelle est nécessaire",
+}
+
+# Problème détecté -> recommandation
+ISSUE_RECOMMENDATIONS = {
+    "missing_file": "Téléverser à nouveau {file_name}",
+    "empty": "Téléverser à nouveau {file_name}",
+    "content_type_mismatch": "Téléverser {file_name} dans son format d'origine",
+    "encrypted": "Fournir une version de {file_name} sans mot de passe",
+    "unreadable": "Téléverser à nouveau {file_name}",
+    "no_text_layer": "Fournir une version texte ou océrisée de {file_name}",
+    "scanned_image": "Fournir {file_name} au format PDF",
+}
+
+# Pondération du score de conformité (sur 100)
+COVERAGE_WEIGHT = 80.0  # Part des documents requis présents
+QUALITY_WEIGHT = 20.0   # Part des documents sans problème
+
+
+class AnalysisCache:
+    """Résultats d'extraction par empreinte de contenu"""
+
+    ANALYSIS_PREFIX = "documents:analysis:"
+
+    @classmethod
+    def get(cls, sha256: str) -> Optional[dict]:
+        return get_cache().get(f"{cls.ANALYSIS_PREFIX}{sha256}")
+
+    @classmethod
+    def set(cls, sha256: str, analysis: dict) -> None:
+        get_cache().set(f"{cls.ANALYSIS_PREFIX}{sha256}", analysis, settings.DOCUMENT_ANALYSIS_CACHE_TTL)
+
+
+class DocumentAnalysisService:
+    """Service d'analyse de conformité des soumissions"""
+
+    @staticmethod
+    def cached_analysis(db: Session, sha256: Optional[str]) -> Optional[dict]:
+        """Analyse déjà faite pour ce contenu (cache, puis autre document de même empreinte)"""
+        if not sha256:
+            return None
+
+        analysis = AnalysisCache.get(sha256)
+        if analysis is None:
+            analysis = db.execute(
+                select(BidDocument.ai_analysis)
+                .where(BidDocument.sha256 == sha256, BidDocument.ai_analysis.isnot(None))
+                .limit(1)
+            ).scalar()
+            if analysis:
+                AnalysisCache.set(sha256, analysis)
+
+        if not analysis or analysis.get("analyzer_version") != ANALYZER_VERSION:
+            return None
+        return analysis
+
+    @staticmethod
+    def compliance(
+        required_documents: Optional[List[str]],
+        documents: List[Tuple[str, str, Optional[dict]]]
+    ) -> dict:
+        """
+        Conformité d'une soumission
+
+        documents : (document_type, file_name, analyse ou None si en cours)
+        """
+        required = list(dict.fromkeys(required_documents or []))
+        uploaded_types = {document_type for document_type, _, _ in documents}
+        missing = [document_type for document_type in required if document_type not in uploaded_types]
+
+        issues = [f"Document requis manquant : {document_type}" for document_type in missing]
+        recommendations = [f"Ajouter le document requis : {document_type}" for document_type in missing]
+        clean_documents = 0
+        pending_documents = 0
+        for _, file_name, analysis in documents:
+            if analysis is None:
+                pending_documents += 1
+                continue
+            codes = analysis.get("issues", [])
+            if not codes:
+                clean_documents += 1
+            for code in codes:
+                issues.append(ISSUE_MESSAGES.get(code, code).format(file_name=file_name))
+                if code in ISSUE_RECOMMENDATIONS:
+                    recommendations.append(ISSUE_RECOMMENDATIONS[code].format(file_name=file_name))
+
+        coverage = (len(required) - len(missing)) / len(required) if required else 1.0
+        analyzed = len(documents) - pending_documents
+        quality = clean_documents / analyzed if analyzed else 0.0
+        return {
+            "score": round(COVERAGE_WEIGHT * coverage + QUALITY_WEIGHT * quality, 2),
+            "issues": issues,
+            "recommendations": list(dict.fromkeys(recommendations)),
+            "missing_documents": missing,
+            "pending_documents": pending_documents
+        }
+
+    @staticmethod
+    def update_bid_compliance(db: Session, bid_id) -> Optional[dict]:
+        """Recalculer et enregistrer la conformité d'une soumission"""
+        bid = db.query(Bid).filter(Bid.id == bid_id).first()
+        if not bid:
+            return None
+
+        documents = db.execute(
+            select(BidDocument.document_type, BidDocument.file_name, BidDocument.ai_analysis)
+            .where(BidDocument.bid_id == bid.id)
+        ).all()
+        result = DocumentAnalysisService.compliance(
+            bid.tender.required_documents,
+            [(row.document_type, row.file_name, row.ai_analysis) for row in documents]
+        )
+
+        bid.ai_compliance_score = result["score"]
+        bid.ai_issues = result["issues"]
+        bid.ai_recommendations = result["recommendations"]
+        db.commit()
+        return result
+
+
+class DocumentAnalysisPipeline:
+    """File des documents à analyser, threads de répartition et pool de processus"""
+
+    def __init__(self):
+        self.queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=settings.DOCUMENT_ANALYSIS_QUEUE_SIZE)
+        self.session_factory = None
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn : pas de fork d'un processus qui exécute déjà des threads
+        return ProcessPoolExecutor(
+            max_workers=len(self._workers) or 1,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def start(self, session_factory) -> None:
+        """Démarrer le pool et les threads de répartition"""
+        if not settings.DOCUMENT_ANALYSIS_ENABLED or self._workers:
+            return
+        self.session_factory = session_factory
+        worker_count = settings.DOCUMENT_ANALYSIS_WORKERS or os.cpu_count() or 1
+        self._workers = [
+            threading.Thread(target=self._run, name=f"document-analysis-{index}", daemon=True)
+            for index in range(worker_count)
+        ]
+        self.executor = self._new_executor()
+        for worker in self._workers:
+            worker.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Arrêter les threads après les documents déjà en file, puis le pool"""
+        if not self._workers:
+            return
+        for _ in self._workers:
+            self.queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = None
+
+    def enqueue(self, document_id) -> bool:
+        """Mettre un document en file (non bloquant ; False si la file est pleine)"""
+        if not self._workers:
+            return False
+        try:
+            self.queue.put_nowait(str(document_id))
+            return True
+        except queue.Full:
+            logger.error(f"File d'analyse des documents pleine - document {document_id} non analysé")
+            return False
+
+    def _replace_executor(self, executor: ProcessPoolExecutor, reason: str) -> None:
+        """Remplacer un pool interrompu ou bloqué (un seul thread le remplace)"""
+        with self._executor_lock:
+            if self.executor is not executor:
+                return
+            logger.warning(f"Pool d'analyse des documents {reason}, redémarrage")
+            self.executor = self._new_executor()
+        # Les processus bloqués ne sont jamais rendus au pool : les arrêter
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _extract(self, path: str, mime_type: str) -> dict:
+        """
+        Extraction dans le pool
+
+        Le pool est recréé si un processus a été tué ; un fichier dont
+        l'analyse dépasse DOCUMENT_ANALYSIS_TIMEOUT est déclaré illisible et
+        le pool, dont un processus reste bloqué dessus, est remplacé. Les
+        extractions interrompues par ce remplacement sont rejouées une fois.
+        """
+        for attempt in range(2):
+            executor = self.executor
+            try:
+                future = executor.submit(extract_document, path, mime_type)
+                return future.result(timeout=settings.DOCUMENT_ANALYSIS_TIMEOUT)
+            except (BrokenProcessPool, CancelledError, RuntimeError) as e:
+                if isinstance(e, BrokenProcessPool):
+                    # Un processus du pool a été tué
+                    self._replace_executor(executor, "interrompu")
+                elif self.executor is executor:
+                    # Erreur de l'extraction elle-même
+                    raise
+                # Sinon, pool remplacé par un autre thread : extraction annulée
+                # ou pool déjà arrêté au moment de l'envoi
+                if attempt:
+                    raise
+            except TimeoutError:
+                self._replace_executor(executor, "bloqué")
+                logger.warning(f"Analyse de {path} interrompue après {settings.DOCUMENT_ANALYSIS_TIMEOUT}s")
+                result = empty_result(mime_type)
+                result["issues"].append("unreadable")
+                return result
+
+    def analyze(self, document_id: str) -> None:
+        """Analyser un document et recalculer la conformité de sa soumission"""
+        db = self.session_factory()
+        try:
+            document = db.query(BidDocument).filter(BidDocument.id == document_id).first()
+            if not document:
+                return
+
+            analysis = DocumentAnalysisService.cached_analysis(db, document.sha256)
+            if analysis is None:
+                analysis = self._extract(
+                    DocumentStorage.absolute_path(document.file_path),
+                    document.mime_type or "application/octet-stream"
+                )
+                analysis["sha256"] = document.sha256
+                if document.sha256 and "missing_file" not in analysis["issues"]:
+                    AnalysisCache.set(document.sha256, analysis)
+
+            document.ai_analysis = analysis
+            db.commit()
+            DocumentAnalysisService.update_bid_compliance(db, document.bid_id)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erreur d'analyse du document {document_id}: {e}")
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while True:
+            document_id = self.queue.get()
+            if document_id is None:
+                return
+            self.analyze(document_id)
+
+    def pending(self) -> int:
+        return self.queue.qsize()
+
+
+# Instance globale du pipeline d'analyse des documents
+document_analysis_pipeline = DocumentAnalysisPipeline()
@@ -0,0 +1,558 @@
+"""
+Entrées / sorties des documents
+
+Téléversement par morceaux reprenable :
+- le client ouvre un téléversement (taille totale, type, cible) puis envoie
+  des morceaux d'au plus DOCUMENT_CHUNK_SIZE octets avec l'en-tête
+  Upload-Offset ; chaque morceau est écrit sur disque au fil de la lecture
+  du corps de la requête (mémoire constante) et l'empreinte SHA-256 est mise
+  à jour au passage ;
+- après une coupure, le client lit le décalage courant (taille du fichier
+  partiel) et reprend à partir de celui-ci ;
+- le dernier morceau déplace le fichier dans le stockage adressé par contenu
+  (blobs/<aa>/<bb>/<sha256>) : un contenu déjà présent (même certificat
+  envoyé par plusieurs fournisseurs) n'est conservé qu'une fois.
+
+L'état SHA-256 d'un téléversement est gardé en mémoire dans le processus qui
+reçoit ses morceaux (nginx route un même téléversement vers le même
+backend) ; ailleurs, il est recalculé à partir du fichier partiel.
+
+Téléchargement : derrière nginx, l'API vérifie les droits puis délègue
+l'envoi par X-Accel-Redirect (sendfile, requêtes Range) ; sinon le fichier
+est lu par blocs avec prise en charge de l'en-tête Range.
+"""
+import fcntl
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import quote
+
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.config import settings
+from app.models.tender import (
+    Tender, TenderStatus, Bid, BidStatus, ExpressionOfInterest, TenderDocument, BidDocument
+)
+from app.models.user import User, UserRole, Supplier, SupplierDocument
+from app.services.cache import get_cache
+from app.services.tender import TenderService
+from app.middleware.metrics import record_document_upload
+
+logger = logging.getLogger(__name__)
+
+# Cible -> (modèle du document, colonne du propriétaire)
+DOCUMENT_TARGETS = {
+    "supplier": (SupplierDocument, "supplier_id"),
+    "tender": (TenderDocument, "tender_id"),
+    "bid": (BidDocument, "bid_id"),
+}
+
+# Taille des lectures disque (recalcul d'empreinte, envoi sans nginx)
+READ_BLOCK_SIZE = 1024 * 1024
+
+# Documents immuables : leur contenu est identifié par l'empreinte
+DOCUMENT_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+class DocumentStorage:
+    """Stockage des fichiers adressé par contenu"""
+
+    @staticmethod
+    def absolute_path(relative_path: str) -> str:
+        """Chemin absolu d'un fichier du stockage (refuse les sorties du répertoire)"""
+        root = os.path.realpath(settings.DOCUMENT_STORAGE_DIR)
+        path = os.path.realpath(os.path.join(root, relative_path))
+        if os.path.commonpath([root, path]) != root:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Fichier non trouvé"
+            )
+        return path
+
+    @staticmethod
+    def blob_path(sha256: str) -> str:
+        """Chemin relatif d'un contenu"""
+        return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+    @staticmethod
+    def upload_path(upload_id: str) -> str:
+        """Fichier partiel d'un téléversement (même système de fichiers que les blobs)"""
+        return os.path.join(settings.DOCUMENT_STORAGE_DIR, "uploads", f"{upload_id}.part")
+
+    @staticmethod
+    def commit_blob(partial_path: str, sha256: str) -> Tuple[str, bool]:
+        """Déplacer un fichier complet vers son blob ; retourne (chemin relatif, déjà présent)"""
+        relative_path = DocumentStorage.blob_path(sha256)
+        target = DocumentStorage.absolute_path(relative_path)
+        if os.path.exists(target):
+            os.remove(partial_path)
+            return relative_path, True
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.chmod(partial_path, 0o644)
+        # Renommage atomique : un blob est toujours complet
+        os.replace(partial_path, target)
+        return relative_path, False
+
+    @staticmethod
+    def purge_stale_uploads() -> int:
+        """Supprimer les fichiers partiels abandonnés"""
+        directory = os.path.join(settings.DOCUMENT_STORAGE_DIR, "uploads")
+        if not os.path.isdir(directory):
+            return 0
+        limit = time.time() - settings.DOCUMENT_UPLOAD_TTL
+        removed = 0
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".part") and entry.stat().st_mtime < limit:
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+
+class UploadSessionStore:
+    """Téléversements en cours (partagés entre processus via le cache)"""
+
+    UPLOAD_PREFIX = "documents:upload:"
+
+    @classmethod
+    def save(cls, upload: dict) -> None:
+        get_cache().set(f"{cls.UPLOAD_PREFIX}{upload['upload_id']}", upload, settings.DOCUMENT_UPLOAD_TTL)
+
+    @classmethod
+    def get(cls, upload_id) -> Optional[dict]:
+        return get_cache().get(f"{cls.UPLOAD_PREFIX}{upload_id}")
+
+    @classmethod
+    def delete(cls, upload_id) -> None:
+        get_cache().delete(f"{cls.UPLOAD_PREFIX}{upload_id}")
+
+
+class UploadHashers:
+    """États SHA-256 des téléversements reçus par ce processus"""
+
+    def __init__(self):
+        self._hashers: Dict[str, Tuple[int, "hashlib._Hash"]] = {}
+        self._lock = threading.Lock()
+
+    def resume(self, upload_id: str, offset: int, partial_path: str):
+        """État au décalage donné, recalculé depuis le fichier partiel si besoin"""
+        with self._lock:
+            entry = self._hashers.pop(upload_id, None)
+        if entry is not None and entry[0] == offset:
+            return entry[1]
+
+        hasher = hashlib.sha256()
+        remaining = offset
+        with open(partial_path, "rb") as partial:
+            while remaining > 0:
+                block = partial.read(min(READ_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+        return hasher
+
+    def keep(self, upload_id: str, offset: int, hasher) -> None:
+        with self._lock:
+            self._hashers[upload_id] = (offset, hasher)
+
+    def discard(self, upload_id: str) -> None:
+        with self._lock:
+            self._hashers.pop(upload_id, None)
+
+
+# États SHA-256 des téléversements en cours dans ce processus
+upload_hashers = UploadHashers()
+
+_last_purge = 0.0
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Intervalle (début, fin inclus) d'un en-tête Range à un seul intervalle
+
+    Retourne None si l'en-tête est absent ou ignoré (plusieurs intervalles,
+    unité inconnue) ; lève une 416 si l'intervalle est hors du fichier.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    start_text, _, end_text = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = min(int(end_text), size - 1) if end_text else size - 1
+        else:
+            # Suffixe : les N derniers octets
+            start = max(size - int(end_text), 0)
+            end = size - 1
+    except ValueError:
+        return None
+
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Intervalle demandé hors du fichier",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+
+def iter_file(path: str, start: int, end: int) -> Iterator[bytes]:
+    """Lire un fichier par blocs entre deux décalages (fin incluse)"""
+    remaining = end - start + 1
+    with open(path, "rb") as file:
+        file.seek(start)
+        while remaining > 0:
+            block = file.read(min(READ_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+class DocumentService:
+    """Service de téléversement et de téléchargement des documents"""
+
+    @staticmethod
+    def _is_manager(user: Optional[User]) -> bool:
+        return user is not None and user.role in [UserRole.ADMIN, UserRole.MANAGER]
+
+    @staticmethod
+    def _supplier_of(db: Session, user: Optional[User]) -> Optional[Supplier]:
+        if user is None or user.role != UserRole.SUPPLIER:
+            return None
+        return db.query(Supplier).filter(Supplier.user_id == user.id).first()
+
+    @staticmethod
+    def _resolve_owner(db: Session, user: User, target: str, owner_id) -> str:
+        """Vérifier que l'utilisateur peut déposer un document sur la cible ; retourne son identifiant"""
+        if target == "supplier":
+            supplier = DocumentService._supplier_of(db, user)
+            if not supplier:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Seuls les fournisseurs peuvent déposer leurs documents"
+                )
+            return str(supplier.id)
+
+        if target == "tender":
+            if not DocumentService._is_manager(user):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Accès refusé. Droits administrateur ou manager requis."
+                )
+            if not db.query(Tender.id).filter(Tender.id == owner_id).first():
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Appel d'offres non trouvé"
+                )
+            return str(owner_id)
+
+        bid = db.query(Bid).filter(Bid.id == owner_id).first()
+        if not bid:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Soumission non trouvée"
+            )
+        supplier = DocumentService._supplier_of(db, user)
+        if not supplier or supplier.id != bid.supplier_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Vous ne pouvez pas déposer de document sur cette soumission"
+            )
+        if bid.status != BidStatus.DRAFT:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cette soumission a déjà été soumise"
+            )
+        return str(bid.id)
+
+    @staticmethod
+    def create_upload(db: Session, user: User, upload_data) -> dict:
+        """Ouvrir un téléversement par morceaux"""
+        global _last_purge
+
+        if upload_data.target not in DOCUMENT_TARGETS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cible de document inconnue"
+            )
+        if upload_data.mime_type not in settings.DOCUMENT_ALLOWED_MIME_TYPES:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Type de fichier non autorisé"
+            )
+        if not 0 < upload_data.total_size <= settings.DOCUMENT_MAX_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"La taille du fichier doit être comprise entre 1 et {settings.DOCUMENT_MAX_SIZE} octets"
+            )
+
+        owner_id = DocumentService._resolve_owner(db, user, upload_data.target, upload_data.owner_id)
+
+        # Nettoyage opportuniste des téléversements abandonnés
+        if time.time() - _last_purge > 3600:
+            _last_purge = time.time()
+            DocumentStorage.purge_stale_uploads()
+
+        upload = {
+            "upload_id": str(uuid.uuid4()),
+            "user_id": str(user.id),
+            "target": upload_data.target,
+            "owner_id": owner_id,
+            "document_type": upload_data.document_type,
+            "file_name": os.path.basename(upload_data.file_name)[:255],
+            "mime_type": upload_data.mime_type,
+            "total_size": upload_data.total_size,
+            "created_at": datetime.utcnow()
+        }
+        partial_path = DocumentStorage.upload_path(upload["upload_id"])
+        os.makedirs(os.path.dirname(partial_path), exist_ok=True)
+        open(partial_path, "xb").close()
+        UploadSessionStore.save(upload)
+        return upload
+
+    @staticmethod
+    def get_upload(user: User, upload_id: str) -> dict:
+        """Téléversement en cours de l'utilisateur"""
+        upload = UploadSessionStore.get(upload_id)
+        if not upload or upload["user_id"] != str(user.id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Téléversement non trouvé ou expiré"
+            )
+        return upload
+
+    @staticmethod
+    def upload_offset(upload: dict) -> int:
+        """Octets déjà reçus (taille du fichier partiel)"""
+        try:
+            return os.path.getsize(DocumentStorage.upload_path(upload["upload_id"]))
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Téléversement non trouvé ou expiré"
+            )
+
+    @staticmethod
+    async def append_chunk(db: Session, upload: dict, offset: int, request: Request) -> Tuple[int, Optional[dict]]:
+        """
+        Écrire un morceau au décalage donné en lisant le corps au fil de l'eau
+
+        Retourne (nouveau décalage, document enregistré si le fichier est complet).
+        """
+        upload_id = upload["upload_id"]
+        partial_path = DocumentStorage.upload_path(upload_id)
+        total_size = upload["total_size"]
+
+        try:
+            partial = open(partial_path, "ab")
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Téléversement non trouvé ou expiré"
+            )
+
+        with partial:
+            try:
+                # Verrou inter-processus : un seul morceau écrit à la fois
+                fcntl.flock(partial.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Un morceau est déjà en cours d'envoi pour ce téléversement"
+                )
+
+            current = os.fstat(partial.fileno()).st_size
+            if offset != current:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Décalage invalide, reprendre à l'octet {current}",
+                    headers={"Upload-Offset": str(current)}
+                )
+
+            # Sans état en mémoire (autre processus), l'empreinte est recalculée
+            # depuis le fichier partiel : lecture disque hors de la boucle d'événements
+            hasher = await run_in_threadpool(upload_hashers.resume, upload_id, current, partial_path)
+            limit = min(settings.DOCUMENT_CHUNK_SIZE, total_size - current)
+            received = 0
+            try:
+                async for piece in request.stream():
+                    received += len(piece)
+                    if received > limit:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"Morceau trop grand (au plus {limit} octets à ce décalage)"
+                        )
+                    partial.write(piece)
+                    hasher.update(piece)
+                partial.flush()
+            except BaseException:
+                # Morceau incomplet (coupure, dépassement) : revenir au décalage de départ
+                partial.truncate(current)
+                raise
+
+            offset = current + received
+            if offset < total_size:
+                upload_hashers.keep(upload_id, offset, hasher)
+                return offset, None
+
+            await run_in_threadpool(os.fsync, partial.fileno())
+
+        upload_hashers.discard(upload_id)
+        document = await run_in_threadpool(DocumentService._store_document, db, upload, hasher.hexdigest())
+        return offset, document
+
+    @staticmethod
+    def _store_document(db: Session, upload: dict, sha256: str) -> dict:
+        """Déplacer le fichier complet dans le stockage et enregistrer le document"""
+        relative_path, deduplicated = DocumentStorage.commit_blob(
+            DocumentStorage.upload_path(upload["upload_id"]), sha256
+        )
+
+        model, owner_column = DOCUMENT_TARGETS[upload["target"]]
+        file_size = upload["total_size"]
+        document = model(**{
+            owner_column: upload["owner_id"],
+            "document_type": upload["document_type"],
+            "file_name": upload["file_name"],
+            "file_path": relative_path,
+            # La taille des documents fournisseur est stockée en texte
+            "file_size": str(file_size) if model is SupplierDocument else file_size,
+            "mime_type": upload["mime_type"],
+            "sha256": sha256
+        })
+        db.add(document)
+        db.commit()
+        db.refresh(document)
+        UploadSessionStore.delete(upload["upload_id"])
+
+        record_document_upload(
+            upload["document_type"], "deduplicated" if deduplicated else "stored"
+        )
+        return {
+            "id": document.id,
+            "target": upload["target"],
+            "document_type": document.document_type,
+            "file_name": document.file_name,
+            "file_size": file_size,
+            "mime_type": document.mime_type,
+            "sha256": sha256,
+            "deduplicated": deduplicated
+        }
+
+    @staticmethod
+    def _can_read_tender_document(db: Session, user: Optional[User], document: TenderDocument) -> bool:
+        """
+        Droit de lecture d'un document d'appel d'offres (hors administrateurs)
+
+        Rien n'est visible tant que l'AO est en brouillon ; un document non
+        public est réservé aux fournisseurs éligibles ou participants.
+        """
+        tender = db.query(Tender).filter(Tender.id == document.tender_id).first()
+        if tender is None or tender.status == TenderStatus.DRAFT:
+            return False
+
+        if document.is_public:
+            return not document.requires_authentication or user is not None
+
+        supplier = DocumentService._supplier_of(db, user)
+        if supplier is None:
+            return False
+        interest = db.query(ExpressionOfInterest.id).filter(
+            ExpressionOfInterest.tender_id == tender.id,
+            ExpressionOfInterest.supplier_id == supplier.id,
+            ExpressionOfInterest.status == "active"
+        ).first()
+        bid = db.query(Bid.id).filter(Bid.tender_id == tender.id, Bid.supplier_id == supplier.id).first()
+        if interest is not None or bid is not None:
+            return True
+        return TenderService._check_eligibility(tender, supplier, user)["can_express_interest"]
+
+    @staticmethod
+    def get_document_for_download(db: Session, user: Optional[User], target: str, document_id: str):
+        """Document à télécharger, après vérification des droits"""
+        if target not in DOCUMENT_TARGETS:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document non trouvé"
+            )
+        model, _ = DOCUMENT_TARGETS[target]
+        document = db.query(model).filter(model.id == document_id).first()
+        if not document:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document non trouvé"
+            )
+
+        if DocumentService._is_manager(user):
+            allowed = True
+        elif target == "tender":
+            allowed = DocumentService._can_read_tender_document(db, user, document)
+        else:
+            supplier = DocumentService._supplier_of(db, user)
+            if target == "supplier":
+                allowed = supplier is not None and supplier.id == document.supplier_id
+            else:
+                allowed = supplier is not None and db.query(Bid.id).filter(
+                    Bid.id == document.bid_id, Bid.supplier_id == supplier.id
+                ).first() is not None
+
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Vous n'avez pas accès à ce document"
+            )
+        return document
+
+    @staticmethod
+    def download_response(request: Request, document) -> Response:
+        """Réponse de téléchargement (X-Accel-Redirect derrière nginx, lecture par blocs sinon)"""
+        headers = {
+            "Content-Disposition": f"attachment; filename*=UTF-8''{quote(document.file_name)}",
+            "Accept-Ranges": "bytes",
+        }
+        media_type = document.mime_type or "application/octet-stream"
+        if document.sha256:
+            etag = f'"{document.sha256}"'
+            headers.update({"ETag": etag, "Cache-Control": DOCUMENT_CACHE_CONTROL})
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        path = DocumentStorage.absolute_path(document.file_path)
+
+        if settings.DOCUMENT_ACCEL_REDIRECT:
+            # nginx envoie le fichier (sendfile) et traite lui-même l'en-tête Range
+            headers["X-Accel-Redirect"] = settings.DOCUMENT_ACCEL_PREFIX + quote(document.file_path.lstrip("/"))
+            return Response(headers=headers, media_type=media_type)
+
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Fichier non trouvé"
+            )
+
+        byte_range = parse_range(request.headers.get("range"), size)
+        if byte_range is None:
+            start, end, status_code = 0, size - 1, status.HTTP_200_OK
+        else:
+            (start, end), status_code = byte_range, status.HTTP_206_PARTIAL_CONTENT
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+
+        return StreamingResponse(
+            iter_file(path, start, end), status_code=status_code, media_type=media_type, headers=headers
+        )
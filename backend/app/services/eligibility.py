@@ -0,0 +1,217 @@
+"""
+Index inversé d'éligibilité des fournisseurs
+
+Répond à « quels fournisseurs sont éligibles à cet appel d'offres » sans
+parcourir les fournisseurs un par un. Chaque fournisseur occupe une case ;
+pour chaque valeur de pays, type de fournisseur, statut de profil, statut du
+compte et validation admin, l'index garde un bitmap (entier Python) des cases
+concernées. Les règles d'un appel d'offres (mêmes règles que
+TenderService._check_eligibility) s'évaluent en unions et intersections de
+bitmaps.
+
+L'index est construit à la première utilisation, tenu à jour par les
+services qui modifient fournisseurs et comptes, et reconstruit après
+ELIGIBILITY_INDEX_TTL secondes pour rattraper les modifications faites par
+d'autres processus.
+"""
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Iterable, Any
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.tender import TenderType
+from app.models.user import Supplier, User, UserStatus
+
+# Attributs indexés, dans l'ordre des colonnes de ELIGIBILITY_COLUMNS (après l'id)
+INDEXED_FIELDS = ("country", "supplier_type", "profile_status", "validated_by_admin", "user_status")
+
+ELIGIBILITY_COLUMNS = (
+    Supplier.id, Supplier.country, Supplier.supplier_type, Supplier.profile_status,
+    Supplier.validated_by_admin, User.status
+)
+
+# Statuts de profil autorisant une soumission sur un AO ouvert
+BID_PROFILE_STATUSES = ("profile_complete", "profile_partial")
+
+
+class EligibilityIndex:
+    """Bitmaps des fournisseurs par valeur d'attribut"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.loaded_at: Optional[float] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.slots: Dict[UUID, int] = {}
+        self.supplier_ids: List[Optional[UUID]] = []
+        self.attributes: List[Optional[tuple]] = []
+        self.free_slots: List[int] = []
+        self.postings: Dict[str, Dict[Any, int]] = {field: defaultdict(int) for field in INDEXED_FIELDS}
+
+    @staticmethod
+    def _normalize(row) -> tuple:
+        """Attributs indexés d'une ligne de ELIGIBILITY_COLUMNS"""
+        _, country, supplier_type, profile_status, validated, user_status = row
+        return (country, supplier_type, profile_status, bool(validated), str(getattr(user_status, "value", user_status)))
+
+    def _set(self, supplier_id: UUID, attributes: tuple) -> None:
+        """Placer ou déplacer un fournisseur dans les bitmaps (verrou tenu)"""
+        slot = self.slots.get(supplier_id)
+        if slot is None:
+            if self.free_slots:
+                slot = self.free_slots.pop()
+                self.supplier_ids[slot] = supplier_id
+                self.attributes[slot] = None
+            else:
+                slot = len(self.supplier_ids)
+                self.supplier_ids.append(supplier_id)
+                self.attributes.append(None)
+            self.slots[supplier_id] = slot
+
+        previous = self.attributes[slot]
+        if previous == attributes:
+            return
+        bit = 1 << slot
+        for field, old, new in zip(INDEXED_FIELDS, previous or (None,) * len(INDEXED_FIELDS), attributes):
+            if previous is not None and old == new:
+                continue
+            postings = self.postings[field]
+            if previous is not None:
+                postings[old] &= ~bit
+                if not postings[old]:
+                    del postings[old]
+            postings[new] |= bit
+        self.attributes[slot] = attributes
+
+    def _remove(self, supplier_id: UUID) -> None:
+        """Retirer un fournisseur de l'index (verrou tenu)"""
+        slot = self.slots.pop(supplier_id, None)
+        if slot is None:
+            return
+        bit = 1 << slot
+        for field, value in zip(INDEXED_FIELDS, self.attributes[slot]):
+            postings = self.postings[field]
+            postings[value] &= ~bit
+            if not postings[value]:
+                del postings[value]
+        self.supplier_ids[slot] = None
+        self.attributes[slot] = None
+        self.free_slots.append(slot)
+
+    def load(self, db: Session) -> None:
+        """Construire l'index depuis la base (une requête)"""
+        rows = db.execute(select(*ELIGIBILITY_COLUMNS).join(User, User.id == Supplier.user_id)).all()
+        with self.lock:
+            self._reset()
+            for row in rows:
+                self._set(row[0], self._normalize(row))
+            self.loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session) -> None:
+        """Construire l'index s'il est absent ou plus ancien que ELIGIBILITY_INDEX_TTL"""
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > settings.ELIGIBILITY_INDEX_TTL:
+            self.load(db)
+
+    def refresh(
+        self,
+        db: Session,
+        supplier_ids: Optional[Iterable[UUID]] = None,
+        user_ids: Optional[Iterable[UUID]] = None
+    ) -> None:
+        """
+        Mettre à jour les fournisseurs modifiés (par id fournisseur ou par id
+        utilisateur) ; sans effet tant que l'index n'est pas construit
+        """
+        if self.loaded_at is None:
+            return
+        query = select(*ELIGIBILITY_COLUMNS).join(User, User.id == Supplier.user_id)
+        if supplier_ids is not None:
+            supplier_ids = list(supplier_ids)
+            query = query.where(Supplier.id.in_(supplier_ids))
+        if user_ids is not None:
+            query = query.where(Supplier.user_id.in_(list(user_ids)))
+        rows = db.execute(query).all()
+
+        with self.lock:
+            for row in rows:
+                self._set(row[0], self._normalize(row))
+            if supplier_ids is not None:
+                # Fournisseurs supprimés entre-temps
+                found = {row[0] for row in rows}
+                for supplier_id in supplier_ids:
+                    key = supplier_id if isinstance(supplier_id, UUID) else UUID(str(supplier_id))
+                    if key not in found:
+                        self._remove(key)
+
+    def _any_of(self, field: str, values: Iterable[Any]) -> int:
+        postings = self.postings[field]
+        bitmap = 0
+        for value in values:
+            bitmap |= postings.get(value, 0)
+        return bitmap
+
+    def _bitmaps(self, tender) -> Dict[str, int]:
+        """Bitmaps des fournisseurs pouvant manifester leur intérêt / soumettre (verrou tenu)"""
+        eligible = self.postings["user_status"].get(UserStatus.ACTIVE.value, 0)
+
+        rules = tender.eligibility_rules or {}
+        if "countries" in rules:
+            eligible &= self._any_of("country", rules["countries"] or [])
+        if "supplier_types" in rules:
+            eligible &= self._any_of("supplier_type", rules["supplier_types"] or [])
+
+        if tender.tender_type == TenderType.OPEN:
+            interest = eligible
+            bid = eligible & self._any_of("profile_status", BID_PROFILE_STATUSES)
+        elif tender.tender_type == TenderType.RESTRICTED:
+            interest = bid = (
+                eligible
+                & self.postings["profile_status"].get("profile_complete", 0)
+                & self.postings["validated_by_admin"].get(True, 0)
+            )
+        else:
+            # AO négocié : aucune participation en libre accès
+            interest = bid = 0
+        return {"express_interest": interest, "submit_bid": bid}
+
+    def _decode(self, bitmap: int) -> List[UUID]:
+        """Identifiants des fournisseurs d'un bitmap (verrou tenu)"""
+        bits = bin(bitmap)[:1:-1]
+        supplier_ids = []
+        slot = bits.find("1")
+        while slot != -1:
+            supplier_ids.append(self.supplier_ids[slot])
+            slot = bits.find("1", slot + 1)
+        return supplier_ids
+
+    def eligible_suppliers(self, db: Session, tender, action: str = "express_interest") -> List[UUID]:
+        """Fournisseurs éligibles à un appel d'offres pour l'action donnée"""
+        self.ensure_loaded(db)
+        with self.lock:
+            return self._decode(self._bitmaps(tender)[action])
+
+    def eligible_counts(self, db: Session, tender) -> Dict[str, int]:
+        """Nombre de fournisseurs éligibles par action"""
+        self.ensure_loaded(db)
+        with self.lock:
+            return {action: bin(bitmap).count("1") for action, bitmap in self._bitmaps(tender).items()}
+
+    def stats(self) -> Dict[str, Any]:
+        """Taille de l'index"""
+        with self.lock:
+            return {
+                "suppliers": len(self.slots),
+                "countries": len(self.postings["country"]),
+                "supplier_types": len(self.postings["supplier_type"]),
+                "loaded": self.loaded_at is not None
+            }
+
+
+# Instance globale de l'index
+eligibility_index = EligibilityIndex()
@@ -0,0 +1,265 @@
+"""
+Moteur d'évaluation et de classement des soumissions
+
+Toutes les soumissions évaluables d'un ou plusieurs appels d'offres sont
+chargées en une requête dans des tableaux NumPy, puis notées et classées en
+une seule passe vectorisée :
+- note financière (formule du prix le plus bas) : 100 * prix minimal / prix,
+  les montants étant d'abord convertis dans une devise commune ;
+- note technique saisie par l'évaluateur ; une soumission sans note
+  technique compte pour 0 et est signalée comme non évaluée techniquement
+  (le score de conformité IA mesure la complétude du dossier, pas la valeur
+  technique de l'offre) ;
+- note totale pondérée par Tender.evaluation_criteria
+  ({"technical": 70, "financial": 30}).
+
+Les notes sont enregistrées par un seul UPDATE groupé.
+"""
+from typing import List, Dict, Any, Optional, Sequence
+from datetime import datetime, timedelta
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.models.tender import Tender, Bid, TenderStatus, BidStatus
+
+# Soumissions prises en compte dans le classement
+EVALUABLE_BID_STATUSES = [BidStatus.SUBMITTED, BidStatus.UNDER_REVIEW, BidStatus.EVALUATED]
+
+# Appels d'offres dont les soumissions peuvent être évaluées
+EVALUABLE_TENDER_STATUSES = [
+    TenderStatus.PUBLISHED, TenderStatus.OPEN, TenderStatus.CLOSED, TenderStatus.EVALUATED
+]
+
+# Pondération par défaut (critères absents ou invalides)
+DEFAULT_CRITERIA = {"technical": 70.0, "financial": 30.0}
+
+
+class EvaluationService:
+    """Service d'évaluation et de classement des soumissions"""
+
+    @staticmethod
+    def criteria_weights(criteria: Optional[Dict[str, Any]]) -> tuple:
+        """Poids (technique, financier) normalisés à 1"""
+        try:
+            technical = float((criteria or {}).get("technical", 0))
+            financial = float((criteria or {}).get("financial", 0))
+        except (TypeError, ValueError):
+            technical = financial = 0.0
+        if technical < 0 or financial < 0 or technical + financial <= 0:
+            technical, financial = DEFAULT_CRITERIA["technical"], DEFAULT_CRITERIA["financial"]
+        total = technical + financial
+        return technical / total, financial / total
+
+    @staticmethod
+    def score_bids(
+        group: np.ndarray,
+        amounts: np.ndarray,
+        rates: np.ndarray,
+        technical: np.ndarray,
+        submitted: np.ndarray,
+        weights: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        Noter et classer des soumissions de plusieurs appels d'offres
+
+        `group` donne l'indice de l'appel d'offres de chaque soumission et
+        `weights` (n_appels, 2) les poids technique / financier. Les montants
+        sont convertis par `rates` (taux vers le XOF, NaN si devise inconnue).
+        Retourne les notes, le rang dans l'appel d'offres (1 = meilleure offre),
+        la validité de l'offre financière et la présence d'une note technique
+        (NaN = soumission non évaluée techniquement, notée 0).
+        """
+        n_tenders = len(weights)
+        converted = amounts * rates
+        valid = np.isfinite(converted) & (converted > 0)
+
+        # Prix le plus bas par appel d'offres
+        prices = np.where(valid, converted, np.inf)
+        lowest = np.full(n_tenders, np.inf)
+        np.minimum.at(lowest, group, prices)
+
+        financial = np.zeros(len(group))
+        np.divide(100.0 * lowest[group], prices, out=financial, where=valid)
+        technically_evaluated = np.isfinite(technical)
+        technical = np.clip(np.nan_to_num(technical, nan=0.0), 0.0, 100.0)
+        total = weights[group, 0] * technical + weights[group, 1] * financial
+
+        # Classement : offres financières invalides en dernier, puis note
+        # décroissante, puis soumission la plus ancienne
+        order = np.lexsort((submitted, -total, ~valid, group))
+        counts = np.bincount(group, minlength=n_tenders)
+        starts = np.cumsum(counts) - counts
+        ranks = np.empty(len(group), dtype=np.int64)
+        ranks[order] = np.arange(len(group)) - starts[group[order]] + 1
+
+        return {
+            "converted": converted,
+            "lowest": lowest,
+            "technical": technical,
+            "financial": np.round(financial, 2),
+            "total": np.round(total, 2),
+            "valid": valid,
+            "technically_evaluated": technically_evaluated,
+            "rank": ranks,
+            "order": order
+        }
+
+    @staticmethod
+    def evaluate_tenders(
+        db: Session,
+        tender_ids: Sequence[UUID],
+        evaluator_id: Optional[UUID] = None,
+        persist: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Évaluer et classer les soumissions de plusieurs appels d'offres
+
+        Une requête pour les appels d'offres, une pour les soumissions, une
+        passe vectorisée et un UPDATE groupé pour les notes.
+        """
+        tenders = db.execute(
+            select(Tender.id, Tender.reference, Tender.currency, Tender.evaluation_criteria)
+            .where(Tender.id.in_(tender_ids))
+        ).all()
+        if not tenders:
+            return []
+        tender_index = {tender.id: i for i, tender in enumerate(tenders)}
+
+        bids = db.execute(
+            select(
+                Bid.id, Bid.tender_id, Bid.supplier_id, Bid.bid_reference,
+                Bid.total_amount, Bid.currency, Bid.technical_score, Bid.submitted_at
+            )
+            .where(Bid.tender_id.in_(list(tender_index)), Bid.status.in_(EVALUABLE_BID_STATUSES))
+        ).all()
+
+        rates_xof = settings.EXCHANGE_RATES_XOF
+        count = len(bids)
+        group = np.fromiter((tender_index[bid.tender_id] for bid in bids), dtype=np.int64, count=count)
+        amounts = np.fromiter(
+            (bid.total_amount if bid.total_amount is not None else np.nan for bid in bids),
+            dtype=np.float64, count=count
+        )
+        rates = np.fromiter(
+            (rates_xof.get((bid.currency or "XOF").upper(), np.nan) for bid in bids),
+            dtype=np.float64, count=count
+        )
+        technical = np.fromiter(
+            (bid.technical_score if bid.technical_score is not None else np.nan for bid in bids),
+            dtype=np.float64, count=count
+        )
+        submitted = np.fromiter(
+            (bid.submitted_at.timestamp() if bid.submitted_at else np.inf for bid in bids),
+            dtype=np.float64, count=count
+        )
+        weights = np.array([
+            EvaluationService.criteria_weights(tender.evaluation_criteria) for tender in tenders
+        ], dtype=np.float64)
+
+        scores = EvaluationService.score_bids(group, amounts, rates, technical, submitted, weights)
+        financial = scores["financial"].tolist()
+        total = scores["total"].tolist()
+
+        now = datetime.utcnow()
+        if persist and count:
+            # Mise à jour groupée par clé primaire
+            db.execute(update(Bid), [
+                {
+                    "id": bid.id,
+                    "financial_score": financial[i],
+                    "total_score": total[i],
+                    "evaluated_at": now,
+                    "evaluated_by": evaluator_id
+                }
+                for i, bid in enumerate(bids)
+            ])
+            db.commit()
+
+        # Montants exprimés dans la devise de chaque appel d'offres
+        tender_rates = np.array([
+            rates_xof.get((tender.currency or "XOF").upper(), 1.0) for tender in tenders
+        ], dtype=np.float64)
+        converted = (scores["converted"] / tender_rates[group]).tolist()
+        lowest = (scores["lowest"] / tender_rates).tolist()
+        technical_scores = scores["technical"].tolist()
+        valid = scores["valid"].tolist()
+        technically_evaluated = scores["technically_evaluated"].tolist()
+        ranks = scores["rank"].tolist()
+
+        results = [
+            {
+                "tender_id": tender.id,
+                "reference": tender.reference,
+                "currency": tender.currency,
+                "technical_weight": round(float(weights[i, 0]) * 100, 2),
+                "financial_weight": round(float(weights[i, 1]) * 100, 2),
+                "lowest_amount": lowest[i] if np.isfinite(lowest[i]) else None,
+                "evaluated_at": now,
+                "ranking": []
+            }
+            for i, tender in enumerate(tenders)
+        ]
+        for i in scores["order"].tolist():
+            bid = bids[i]
+            results[group[i]]["ranking"].append({
+                "rank": ranks[i],
+                "bid_id": bid.id,
+                "bid_reference": bid.bid_reference,
+                "supplier_id": bid.supplier_id,
+                "total_amount": bid.total_amount,
+                "currency": bid.currency,
+                "converted_amount": converted[i] if valid[i] else None,
+                "financial_offer_valid": valid[i],
+                "technically_evaluated": technically_evaluated[i],
+                "technical_score": technical_scores[i] if technically_evaluated[i] else None,
+                "financial_score": financial[i],
+                "total_score": total[i]
+            })
+        return results
+
+    @staticmethod
+    def evaluate_tender(
+        db: Session,
+        tender_id: str,
+        evaluator_id: Optional[UUID] = None,
+        persist: bool = True
+    ) -> Dict[str, Any]:
+        """Évaluer et classer les soumissions d'un appel d'offres"""
+        tender = db.query(Tender.id, Tender.status).filter(Tender.id == tender_id).first()
+        if not tender:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Appel d'offres non trouvé"
+            )
+
+        if tender.status not in EVALUABLE_TENDER_STATUSES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Les soumissions de cet appel d'offres ne peuvent pas être évaluées"
+            )
+
+        return EvaluationService.evaluate_tenders(db, [tender.id], evaluator_id, persist)[0]
+
+    @staticmethod
+    def evaluate_closing_today(
+        db: Session,
+        evaluator_id: Optional[UUID] = None,
+        now: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Reclasser les soumissions de tous les appels d'offres clôturant aujourd'hui (UTC)"""
+        start = (now or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+        tender_ids = db.execute(
+            select(Tender.id).where(
+                Tender.closing_date >= start,
+                Tender.closing_date < start + timedelta(days=1),
+                Tender.status.in_(EVALUABLE_TENDER_STATUSES)
+            )
+        ).scalars().all()
+        if not tender_ids:
+            return []
+        return EvaluationService.evaluate_tenders(db, tender_ids, evaluator_id)
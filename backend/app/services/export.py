@@ -0,0 +1,158 @@
+"""
+Service d'export en flux (NDJSON / CSV) des appels d'offres, soumissions et fournisseurs
+
+Les exports lisent la base avec un curseur côté serveur (stream_results /
+yield_per) et émettent un bloc d'octets par lot de lignes : la mémoire reste
+constante quelle que soit la taille de l'export.
+"""
+import csv
+import enum
+import io
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+import orjson
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, text
+from sqlalchemy.sql import Select
+
+from app.database import SessionLocal
+from app.models.tender import Tender, Bid, TenderStatus, TenderType, BidStatus
+from app.models.user import Supplier, User
+from app.schemas.user import SupplierResponse
+from app.services.tender import TENDER_LIST_COLUMNS, BID_RESPONSE_COLUMNS
+
+# Nombre de lignes lues par aller-retour du curseur serveur
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+SUPPLIER_EXPORT_COLUMNS = [
+    Supplier.__table__.c[name] for name in SupplierResponse.model_fields
+    if name in Supplier.__table__.c
+]
+
+
+def _csv_value(value: Any) -> Any:
+    """Convertir une valeur SQL en cellule CSV"""
+    if value is None:
+        return ""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode("utf-8")
+    return value
+
+
+def encode_ndjson(rows: List[Dict[str, Any]]) -> bytes:
+    """Encoder un lot de lignes en NDJSON"""
+    # Les lignes SQL (RowMapping) ne sont pas sérialisables telles quelles par orjson
+    return b"".join(orjson.dumps(dict(row)) + b"\n" for row in rows)
+
+
+def encode_csv(rows: List[Dict[str, Any]], columns: List[str]) -> bytes:
+    """Encoder un lot de lignes en CSV (sans en-tête)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_csv_value(row[column]) for column in columns])
+    return buffer.getvalue().encode("utf-8")
+
+
+class ExportService:
+    """Service d'export en flux"""
+
+    @staticmethod
+    def stream(query: Select, export_format: str) -> Iterator[bytes]:
+        """
+        Exécuter une requête avec un curseur serveur et produire les blocs encodés
+
+        La session est propre au générateur : elle reste ouverte pendant toute la
+        diffusion, indépendamment de la session de la requête HTTP.
+        """
+        columns = [column.key for column in query.selected_columns]
+        db = SessionLocal()
+        try:
+            if db.get_bind().dialect.name == "postgresql":
+                # Le client peut lire lentement : ne pas couper la transaction du curseur
+                db.execute(text("SET LOCAL idle_in_transaction_session_timeout = 0"))
+
+            if export_format == "csv":
+                yield encode_csv([{column: column for column in columns}], columns)
+
+            result = db.execute(
+                query.execution_options(stream_results=True, yield_per=EXPORT_CHUNK_SIZE)
+            )
+            for partition in result.mappings().partitions():
+                if export_format == "csv":
+                    yield encode_csv(partition, columns)
+                else:
+                    yield encode_ndjson(partition)
+        finally:
+            db.rollback()
+            db.close()
+
+    @staticmethod
+    def response(query: Select, export_format: str, name: str) -> StreamingResponse:
+        """Construire la réponse HTTP en flux pour un export"""
+        filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{export_format}"
+        return StreamingResponse(
+            ExportService.stream(query, export_format),
+            media_type=EXPORT_FORMATS[export_format],
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}"',
+                "Cache-Control": "no-store",
+                # Désactiver la mise en tampon nginx pour diffuser au fil de l'eau
+                "X-Accel-Buffering": "no"
+            }
+        )
+
+    @staticmethod
+    def tenders_query(
+        status: Optional[TenderStatus] = None,
+        category: Optional[str] = None,
+        tender_type: Optional[TenderType] = None
+    ) -> Select:
+        """Requête d'export des appels d'offres (mêmes filtres que la liste)"""
+        query = select(*TENDER_LIST_COLUMNS)
+        if status:
+            query = query.where(Tender.status == status)
+        if category:
+            query = query.where(Tender.category == category)
+        if tender_type:
+            query = query.where(Tender.tender_type == tender_type)
+        return query
+
+    @staticmethod
+    def bids_query(tender_id: Optional[str] = None, status: Optional[BidStatus] = None) -> Select:
+        """Requête d'export des soumissions, éventuellement limitée à un appel d'offres"""
+        query = select(*BID_RESPONSE_COLUMNS)
+        if tender_id:
+            query = query.where(Bid.tender_id == tender_id)
+        if status:
+            query = query.where(Bid.status == status)
+        return query
+
+    @staticmethod
+    def suppliers_query(
+        status: Optional[str] = None,
+        skip: int = 0,
+        limit: Optional[int] = None
+    ) -> Select:
+        """Requête d'export des fournisseurs (filtre par statut du compte utilisateur)"""
+        query = select(*SUPPLIER_EXPORT_COLUMNS)
+        if status:
+            query = query.join(User, User.id == Supplier.user_id).where(User.status == status)
+        if skip:
+            query = query.offset(skip)
+        if limit:
+            query = query.limit(limit)
+        return query
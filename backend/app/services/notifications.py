@@ -0,0 +1,318 @@
+"""
+Notifications des appels d'offres
+
+La publication ou le changement de statut d'un appel d'offres met un
+événement en file (sans attendre la base) ; un worker de fond :
+- résout les destinataires par blocs de NOTIFICATION_CHUNK_SIZE (fournisseurs
+  éligibles via l'index d'éligibilité pour une publication, participants
+  ayant manifesté leur intérêt ou soumis une offre sinon) ;
+- insère les notifications en masse (COPY sur PostgreSQL, INSERT multi-lignes
+  ailleurs) ;
+- invalide le nombre de notifications non lues mis en cache par utilisateur.
+"""
+import csv
+import io
+import logging
+import queue
+import threading
+import uuid
+from typing import List, Optional, Iterator, Iterable
+from uuid import UUID
+from datetime import datetime
+
+from sqlalchemy import select, insert, update, func, union
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.models.tender import Tender, ExpressionOfInterest, Bid, TenderNotification, TenderStatus
+from app.models.user import Supplier
+from app.services.cache import get_cache
+from app.services.eligibility import eligibility_index
+
+logger = logging.getLogger(__name__)
+
+# Type de notification déclenché par l'arrivée dans un statut
+STATUS_NOTIFICATIONS = {
+    TenderStatus.PUBLISHED: "published",
+    TenderStatus.OPEN: "published",
+    TenderStatus.CLOSED: "closed",
+    TenderStatus.AWARDED: "awarded",
+    TenderStatus.CANCELLED: "cancelled",
+}
+
+# (titre, message) par type de notification
+NOTIFICATION_TEMPLATES = {
+    "published": (
+        "Nouvel appel d'offres {reference}",
+        "L'appel d'offres « {title} » est publié. Date de clôture : {closing_date}."
+    ),
+    "closed": (
+        "Appel d'offres {reference} clôturé",
+        "L'appel d'offres « {title} » est clôturé. Les soumissions sont en cours d'évaluation."
+    ),
+    "awarded": (
+        "Appel d'offres {reference} attribué",
+        "L'appel d'offres « {title} » a été attribué."
+    ),
+    "cancelled": (
+        "Appel d'offres {reference} annulé",
+        "L'appel d'offres « {title} » a été annulé."
+    ),
+}
+
+COPY_NOTIFICATIONS_SQL = (
+    "COPY tender_notifications (id, tender_id, user_id, notification_type, title, message, is_read) "
+    "FROM STDIN WITH (FORMAT csv)"
+)
+
+
+class UnreadCountCache:
+    """Nombre de notifications non lues par utilisateur"""
+
+    UNREAD_PREFIX = "notifications:unread:"
+
+    @classmethod
+    def get(cls, user_id) -> Optional[int]:
+        return get_cache().get(f"{cls.UNREAD_PREFIX}{user_id}")
+
+    @classmethod
+    def set(cls, user_id, count: int) -> None:
+        get_cache().set(f"{cls.UNREAD_PREFIX}{user_id}", count, settings.NOTIFICATION_UNREAD_TTL)
+
+    @classmethod
+    def invalidate(cls, user_ids: Iterable) -> None:
+        get_cache().delete_many([f"{cls.UNREAD_PREFIX}{user_id}" for user_id in user_ids])
+
+
+class NotificationService:
+    """Service de notifications des appels d'offres"""
+
+    @staticmethod
+    def notification_type_for(previous: Optional[TenderStatus], new: TenderStatus) -> Optional[str]:
+        """Type de notification à envoyer pour un changement de statut"""
+        notification_type = STATUS_NOTIFICATIONS.get(new)
+        if notification_type is None or STATUS_NOTIFICATIONS.get(previous) == notification_type:
+            return None
+        return notification_type
+
+    @staticmethod
+    def recipient_chunks(db: Session, tender: Tender, notification_type: str) -> Iterator[List[UUID]]:
+        """Identifiants des utilisateurs destinataires, par blocs"""
+        chunk_size = settings.NOTIFICATION_CHUNK_SIZE
+
+        if notification_type == "published":
+            # Fournisseurs éligibles, résolus en comptes utilisateur bloc par bloc
+            supplier_ids = eligibility_index.eligible_suppliers(db, tender, "express_interest")
+            for start in range(0, len(supplier_ids), chunk_size):
+                yield db.execute(
+                    select(Supplier.user_id).where(Supplier.id.in_(supplier_ids[start:start + chunk_size]))
+                ).scalars().all()
+            return
+
+        # Participants : manifestation d'intérêt active ou soumission
+        participants = union(
+            select(ExpressionOfInterest.supplier_id).where(
+                ExpressionOfInterest.tender_id == tender.id,
+                ExpressionOfInterest.status == "active"
+            ),
+            select(Bid.supplier_id).where(Bid.tender_id == tender.id)
+        ).subquery()
+        # Liste bornée par le nombre de participants : lue en une fois, car
+        # chaque bloc est validé (commit) avant le suivant
+        user_ids = db.execute(
+            select(Supplier.user_id).where(Supplier.id.in_(select(participants.c[0])))
+        ).scalars().all()
+        for start in range(0, len(user_ids), chunk_size):
+            yield user_ids[start:start + chunk_size]
+
+    @staticmethod
+    def insert_notifications(
+        db: Session,
+        tender_id: UUID,
+        notification_type: str,
+        title: str,
+        message: str,
+        user_ids: List[UUID]
+    ) -> None:
+        """Insérer un bloc de notifications en une instruction"""
+        if db.get_bind().dialect.name == "postgresql":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for user_id in user_ids:
+                writer.writerow([uuid.uuid4(), tender_id, user_id, notification_type, title, message, "f"])
+            buffer.seek(0)
+            cursor = db.connection().connection.cursor()
+            try:
+                cursor.copy_expert(COPY_NOTIFICATIONS_SQL, buffer)
+            finally:
+                cursor.close()
+        else:
+            db.execute(insert(TenderNotification), [
+                {
+                    "tender_id": tender_id,
+                    "user_id": user_id,
+                    "notification_type": notification_type,
+                    "title": title,
+                    "message": message,
+                    "is_read": False
+                }
+                for user_id in user_ids
+            ])
+
+    @staticmethod
+    def deliver(db: Session, tender_id: UUID, notification_type: str) -> int:
+        """Créer les notifications d'un événement ; retourne le nombre de destinataires"""
+        tender = db.query(Tender).filter(Tender.id == tender_id).first()
+        if not tender:
+            return 0
+
+        title_template, message_template = NOTIFICATION_TEMPLATES[notification_type]
+        values = {
+            "reference": tender.reference,
+            "title": tender.title,
+            "closing_date": tender.closing_date.strftime("%d/%m/%Y %H:%M") if tender.closing_date else "-"
+        }
+        title = title_template.format(**values)[:200]
+        message = message_template.format(**values)
+
+        # Destinataires déjà notifiés (événement rejoué)
+        already_notified = set(db.execute(
+            select(TenderNotification.user_id).where(
+                TenderNotification.tender_id == tender.id,
+                TenderNotification.notification_type == notification_type
+            )
+        ).scalars())
+
+        delivered = 0
+        for user_ids in NotificationService.recipient_chunks(db, tender, notification_type):
+            user_ids = [user_id for user_id in user_ids if user_id not in already_notified]
+            if not user_ids:
+                continue
+            NotificationService.insert_notifications(
+                db, tender.id, notification_type, title, message, user_ids
+            )
+            db.commit()
+            already_notified.update(user_ids)
+            UnreadCountCache.invalidate(user_ids)
+            delivered += len(user_ids)
+
+        return delivered
+
+    @staticmethod
+    def get_user_notifications(
+        db: Session,
+        user_id: str,
+        skip: int = 0,
+        limit: int = 50,
+        unread_only: bool = False
+    ) -> List[TenderNotification]:
+        """Notifications d'un utilisateur, les plus récentes d'abord"""
+        query = db.query(TenderNotification).filter(TenderNotification.user_id == user_id)
+        if unread_only:
+            query = query.filter(TenderNotification.is_read.is_(False))
+        return query.order_by(TenderNotification.sent_at.desc()).offset(skip).limit(limit).all()
+
+    @staticmethod
+    def get_unread_count(db: Session, user_id: str) -> int:
+        """Nombre de notifications non lues (mis en cache)"""
+        count = UnreadCountCache.get(user_id)
+        if count is None:
+            count = db.execute(
+                select(func.count()).select_from(TenderNotification).where(
+                    TenderNotification.user_id == user_id,
+                    TenderNotification.is_read.is_(False)
+                )
+            ).scalar_one()
+            UnreadCountCache.set(user_id, count)
+        return count
+
+    @staticmethod
+    def mark_read(db: Session, user_id: str, notification_id: str) -> TenderNotification:
+        """Marquer une notification comme lue"""
+        notification = db.query(TenderNotification).filter(
+            TenderNotification.id == notification_id,
+            TenderNotification.user_id == user_id
+        ).first()
+        if not notification:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Notification non trouvée"
+            )
+
+        if not notification.is_read:
+            notification.is_read = True
+            notification.read_at = datetime.utcnow()
+            db.commit()
+            db.refresh(notification)
+            UnreadCountCache.invalidate([user_id])
+
+        return notification
+
+    @staticmethod
+    def mark_all_read(db: Session, user_id: str) -> int:
+        """Marquer toutes les notifications d'un utilisateur comme lues"""
+        result = db.execute(
+            update(TenderNotification)
+            .where(TenderNotification.user_id == user_id, TenderNotification.is_read.is_(False))
+            .values(is_read=True, read_at=datetime.utcnow())
+        )
+        db.commit()
+        UnreadCountCache.set(user_id, 0)
+        return result.rowcount
+
+
+class NotificationPipeline:
+    """File des événements de notification et worker de fond"""
+
+    def __init__(self):
+        self.queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=settings.NOTIFICATION_QUEUE_SIZE)
+        self.session_factory = None
+        self._worker: Optional[threading.Thread] = None
+
+    def start(self, session_factory) -> None:
+        """Démarrer le worker avec la fabrique de sessions donnée"""
+        if not settings.NOTIFICATIONS_ENABLED or self._worker is not None:
+            return
+        self.session_factory = session_factory
+        self._worker = threading.Thread(target=self._run, name="tender-notifications", daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Arrêter le worker après les événements déjà en file"""
+        if self._worker is None:
+            return
+        self.queue.put(None)
+        self._worker.join(timeout)
+        self._worker = None
+
+    def enqueue(self, tender_id, notification_type: str) -> bool:
+        """Mettre un événement en file (non bloquant ; False si la file est pleine)"""
+        if self._worker is None:
+            return False
+        try:
+            self.queue.put_nowait((tender_id, notification_type))
+            return True
+        except queue.Full:
+            logger.error(f"File de notifications pleine - événement {notification_type} perdu pour l'AO {tender_id}")
+            return False
+
+    def _run(self) -> None:
+        while True:
+            event = self.queue.get()
+            if event is None:
+                return
+            tender_id, notification_type = event
+            db = self.session_factory()
+            try:
+                delivered = NotificationService.deliver(db, tender_id, notification_type)
+                logger.info(f"Notifications {notification_type} de l'AO {tender_id} : {delivered} destinataires")
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Erreur d'envoi des notifications {notification_type} de l'AO {tender_id}: {e}")
+            finally:
+                db.close()
+
+
+# Instance globale du pipeline de notifications
+notification_pipeline = NotificationPipeline()
@@ -0,0 +1,277 @@
+"""
+Planificateur du cycle de vie des appels d'offres
+
+Les transitions datées (publié -> ouvert à opening_date, publié / ouvert ->
+clôturé à closing_date) sont gardées dans un tas-min en mémoire. Un thread
+dort jusqu'à la prochaine échéance puis applique toutes les transitions dues
+par un UPDATE ensembliste ; les conditions de l'UPDATE (statut et date)
+écartent les entrées devenues obsolètes après une modification de l'AO.
+
+Le tas est construit au démarrage par une requête sur les AO publiés ou
+ouverts, complété à chaque création / mise à jour dans ce processus, et
+reconstruit toutes les SCHEDULER_RESYNC_INTERVAL secondes pour prendre en
+compte les modifications faites par les autres processus.
+
+Un seul processus applique les transitions : celui qui détient le verrou
+consultatif PostgreSQL SCHEDULER_LOCK_KEY (session dédiée, libérée à l'arrêt
+ou à la perte de la connexion).
+"""
+import calendar
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, update, text
+
+from app.config import settings
+from app.models.tender import Tender, TenderStatus
+from app.services.notifications import NotificationService, notification_pipeline
+from app.services.tender_events import tender_event, record_after_commit
+
+logger = logging.getLogger(__name__)
+
+# Transition -> (statuts de départ, statut d'arrivée, colonne de date)
+TRANSITIONS = {
+    "open": ([TenderStatus.PUBLISHED], TenderStatus.OPEN, Tender.opening_date),
+    "close": ([TenderStatus.PUBLISHED, TenderStatus.OPEN], TenderStatus.CLOSED, Tender.closing_date),
+}
+
+
+def to_epoch(value: datetime) -> float:
+    """Horodatage d'une date (les dates naïves sont en UTC, comme datetime.utcnow())"""
+    if value.tzinfo is not None:
+        return value.timestamp()
+    return calendar.timegm(value.timetuple()) + value.microsecond / 1_000_000
+
+
+class TenderLifecycleScheduler:
+    """Tas des transitions à venir et thread d'exécution"""
+
+    def __init__(self):
+        self.heap: List[Tuple[float, str, object]] = []
+        self.condition = threading.Condition()
+        self.session_factory = None
+        self.is_leader = False
+        self._lock_connection = None
+        self._stopped = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._next_resync = 0.0
+        self._next_reconcile = 0.0
+
+    def start(self, session_factory) -> None:
+        if not settings.SCHEDULER_ENABLED or self._worker is not None:
+            return
+        self.session_factory = session_factory
+        self._stopped.clear()
+        self._worker = threading.Thread(target=self._run, name="tender-lifecycle", daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        if self._worker is None:
+            return
+        self._stopped.set()
+        with self.condition:
+            self.condition.notify()
+        self._worker.join(timeout)
+        self._worker = None
+        self._release_leadership()
+
+    def _push(self, tender_id, status, opening_date, closing_date) -> None:
+        """Ajouter les transitions d'un AO (condition tenue)"""
+        if status == TenderStatus.PUBLISHED and opening_date is not None:
+            heapq.heappush(self.heap, (to_epoch(opening_date), "open", tender_id))
+        if status in (TenderStatus.PUBLISHED, TenderStatus.OPEN) and closing_date is not None:
+            heapq.heappush(self.heap, (to_epoch(closing_date), "close", tender_id))
+
+    def schedule(self, tender: Tender) -> None:
+        """Prendre en compte un AO créé ou modifié dans ce processus"""
+        if self._worker is None:
+            return
+        with self.condition:
+            self._push(tender.id, tender.status, tender.opening_date, tender.closing_date)
+            # Réveiller le thread si l'échéance la plus proche a changé
+            self.condition.notify()
+
+    def _acquire_leadership(self) -> bool:
+        """Prendre le verrou consultatif (session dédiée conservée ouverte)"""
+        db = self.session_factory()
+        bind = db.get_bind()
+        db.close()
+        if bind.dialect.name != "postgresql":
+            # Base locale (tests, développement) : un seul processus
+            return True
+
+        connection = bind.connect()
+        try:
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": settings.SCHEDULER_LOCK_KEY}
+            ).scalar()
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self._lock_connection = connection
+        return True
+
+    def _still_leader(self) -> bool:
+        """Vérifier que la session du verrou est toujours vivante"""
+        if self._lock_connection is None:
+            return True
+        try:
+            self._lock_connection.execute(text("SELECT 1"))
+            self._lock_connection.commit()
+            return True
+        except Exception as e:
+            logger.warning(f"Connexion du verrou du planificateur perdue : {e}")
+            self._release_leadership()
+            return False
+
+    def _release_leadership(self) -> None:
+        self.is_leader = False
+        if self._lock_connection is not None:
+            try:
+                # Fermer la session libère le verrou consultatif
+                self._lock_connection.close()
+            except Exception:
+                pass
+            self._lock_connection = None
+
+    def resync(self) -> int:
+        """Reconstruire le tas depuis la base (AO publiés ou ouverts)"""
+        db = self.session_factory()
+        try:
+            rows = db.execute(
+                select(Tender.id, Tender.status, Tender.opening_date, Tender.closing_date)
+                .where(Tender.status.in_([TenderStatus.PUBLISHED, TenderStatus.OPEN]))
+            ).all()
+        finally:
+            db.close()
+
+        with self.condition:
+            self.heap = []
+            for row in rows:
+                self._push(row.id, row.status, row.opening_date, row.closing_date)
+            size = len(self.heap)
+        self._next_resync = time.time() + settings.SCHEDULER_RESYNC_INTERVAL
+        return size
+
+    def _pop_due(self, now: float) -> dict:
+        """Retirer les entrées échues, regroupées par transition (condition tenue)"""
+        due = {transition: set() for transition in TRANSITIONS}
+        while self.heap and self.heap[0][0] <= now:
+            _, transition, tender_id = heapq.heappop(self.heap)
+            due[transition].add(tender_id)
+        return due
+
+    def apply_due(self, due: dict) -> dict:
+        """Appliquer les transitions échues par UPDATE ensembliste ; retourne les AO modifiés"""
+        changed = {}
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            for transition, tender_ids in due.items():
+                if not tender_ids:
+                    continue
+                from_statuses, to_status, date_column = TRANSITIONS[transition]
+                rows = db.execute(
+                    update(Tender)
+                    .where(
+                        Tender.id.in_(list(tender_ids)),
+                        Tender.status.in_(from_statuses),
+                        date_column <= now
+                    )
+                    .values(status=to_status, updated_at=now)
+                    .returning(Tender.id, Tender.reference, Tender.category, Tender.status, Tender.closing_date)
+                ).all()
+                changed[transition] = [row.id for row in rows]
+                # Événements SSE publiés au commit
+                for row in rows:
+                    record_after_commit(db, tender_event("status", row))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        for transition, tender_ids in changed.items():
+            from_statuses, to_status, _ = TRANSITIONS[transition]
+            if tender_ids:
+                logger.info(f"Planificateur : {len(tender_ids)} AO passés au statut {to_status.value}")
+            notification_type = NotificationService.notification_type_for(from_statuses[-1], to_status)
+            if notification_type:
+                for tender_id in tender_ids:
+                    notification_pipeline.enqueue(tender_id, notification_type)
+        return changed
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                if not self.is_leader:
+                    self.is_leader = self._acquire_leadership()
+                    if not self.is_leader:
+                        self._stopped.wait(settings.SCHEDULER_LEADER_RETRY)
+                        continue
+                    logger.info("Planificateur du cycle de vie des AO actif (verrou obtenu)")
+                    self.resync()
+
+                if time.time() >= self._next_resync:
+                    if not self._still_leader():
+                        continue
+                    self.resync()
+
+                if settings.COUNTER_RECONCILE_INTERVAL > 0 and time.time() >= self._next_reconcile:
+                    self.reconcile_counters()
+
+                with self.condition:
+                    now = time.time()
+                    next_due = self.heap[0][0] if self.heap else float("inf")
+                    if next_due > now:
+                        # Se réveiller aussi pour la resynchronisation et le recalcul des compteurs
+                        wake_at = min(next_due, self._next_resync)
+                        if settings.COUNTER_RECONCILE_INTERVAL > 0:
+                            wake_at = min(wake_at, self._next_reconcile)
+                        self.condition.wait(max(wake_at - now, 0))
+                        continue
+                    due = self._pop_due(now)
+
+                self.apply_due(due)
+            except Exception as e:
+                logger.error(f"Erreur du planificateur du cycle de vie des AO : {e}")
+                self._release_leadership()
+                self._stopped.wait(settings.SCHEDULER_LEADER_RETRY)
+
+    def reconcile_counters(self) -> None:
+        """Recalculer les compteurs des AO (tâche périodique du processus leader)"""
+        # Import local : le service des AO importe ce module
+        from app.services.tender import TenderService
+
+        self._next_reconcile = time.time() + settings.COUNTER_RECONCILE_INTERVAL
+        db = self.session_factory()
+        try:
+            result = TenderService.reconcile_counters(db)
+        finally:
+            db.close()
+        if result["corrected"]:
+            logger.warning(f"Compteurs des AO recalculés : {result['corrected']} / {result['checked']} corrigés")
+
+    def status(self) -> dict:
+        with self.condition:
+            return {
+                "running": self._worker is not None,
+                "leader": self.is_leader,
+                "pending_transitions": len(self.heap),
+                "next_transition_at": (
+                    datetime.utcfromtimestamp(self.heap[0][0]).isoformat() if self.heap else None
+                )
+            }
+
+
+# Instance globale du planificateur
+tender_scheduler = TenderLifecycleScheduler()
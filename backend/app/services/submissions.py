@@ -0,0 +1,374 @@
+"""
+File d'écriture des soumissions d'offres
+
+Dans les dernières minutes avant la clôture, les créations et dépôts
+d'offres arrivent en rafale. La route valide la demande, l'horodate dès sa
+réception (preuve du dépôt dans les délais) puis la met en file et répond
+par un accusé de réception. Un writer unique applique les demandes par lots :
+chaque opération dans un savepoint, un seul commit par lot. La date de
+clôture est comparée à l'heure de réception, jamais à l'heure d'écriture :
+l'attente d'une connexion du pool ne peut plus faire manquer l'échéance.
+
+Avant l'accusé de réception, la demande est écrite (fsync) dans le journal
+local du processus (SUBMISSION_JOURNAL_DIR) : un arrêt brutal avant le
+commit du writer ne perd pas une demande acceptée. Au démarrage, les
+journaux laissés par un processus arrêté sont rejoués ; une demande déjà
+écrite avant l'arrêt est alors reconnue et confirmée au lieu d'être refusée
+comme doublon.
+
+La file est bornée : quand elle est pleine, la demande est refusée
+immédiatement (503) sans bloquer le serveur. Les accusés sont conservés dans
+le cache et consultés par le fournisseur pour connaître le résultat de
+l'écriture.
+"""
+import fcntl
+import json
+import logging
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.models.tender import Bid, BidStatus
+from app.schemas.tender import BidCreate
+from app.services.cache import get_cache
+from app.services.tender import TenderService
+
+logger = logging.getLogger(__name__)
+
+# Opérations acceptées par la file
+OPERATIONS = ("create", "submit")
+
+
+class SubmissionReceiptStore:
+    """Accusés de réception des demandes mises en file"""
+
+    RECEIPT_PREFIX = "submissions:receipt:"
+
+    @classmethod
+    def save(cls, receipt: dict) -> None:
+        get_cache().set(f"{cls.RECEIPT_PREFIX}{receipt['receipt_id']}", receipt, settings.SUBMISSION_RECEIPT_TTL)
+
+    @classmethod
+    def get(cls, receipt_id) -> Optional[dict]:
+        return get_cache().get(f"{cls.RECEIPT_PREFIX}{receipt_id}")
+
+
+class SubmissionJournal:
+    """
+    Journal local des demandes acceptées et pas encore écrites
+
+    Un fichier par processus, verrouillé (flock) tant que le processus vit :
+    une ligne « accepted » (fsync avant l'accusé) par demande, une ligne
+    « done » par lot traité. Un fichier non verrouillé appartient à un
+    processus arrêté : ses demandes sans « done » sont reprises.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.SUBMISSION_JOURNAL_DIR
+        self.path: Optional[str] = None
+        self.file = None
+        self.lock = threading.Lock()
+        self.pending: Dict[str, dict] = {}
+
+    @staticmethod
+    def encode(item: dict) -> dict:
+        encoded = dict(item)
+        encoded["received_at"] = item["received_at"].isoformat()
+        encoded["bid_data"] = item["bid_data"].model_dump(mode="json") if item.get("bid_data") else None
+        return encoded
+
+    @staticmethod
+    def decode(encoded: dict) -> dict:
+        item = dict(encoded)
+        item["received_at"] = datetime.fromisoformat(encoded["received_at"])
+        item["bid_data"] = BidCreate.model_validate(encoded["bid_data"]) if encoded.get("bid_data") else None
+        return item
+
+    @staticmethod
+    def read_pending(file) -> List[dict]:
+        """Demandes acceptées sans ligne « done » (ligne finale tronquée ignorée)"""
+        accepted: Dict[str, dict] = {}
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry["op"] == "accepted":
+                accepted[entry["item"]["receipt_id"]] = entry["item"]
+            else:
+                for receipt_id in entry["receipt_ids"]:
+                    accepted.pop(receipt_id, None)
+        return list(accepted.values())
+
+    def open(self) -> List[dict]:
+        """Ouvrir le journal du processus ; retourne les demandes orphelines à rejouer"""
+        os.makedirs(self.directory, exist_ok=True)
+        orphans = []
+        recovered: List[dict] = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".log"):
+                continue
+            path = os.path.join(self.directory, name)
+            file = open(path, "rb")
+            try:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Journal d'un processus en vie
+                file.close()
+                continue
+            recovered.extend(self.read_pending(file))
+            orphans.append((path, file))
+
+        self.path = os.path.join(self.directory, f"intake-{os.getpid()}-{uuid.uuid4().hex}.log")
+        self.file = open(self.path, "ab")
+        fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+
+        # Reprendre les demandes dans ce journal avant d'effacer les orphelins
+        items = [self.decode(encoded) for encoded in recovered]
+        for item in items:
+            self.append(item, sync=False)
+        self._sync()
+        for path, file in orphans:
+            os.remove(path)
+            file.close()
+        return items
+
+    def close(self) -> None:
+        """Fermer le journal ; il est supprimé si toutes les demandes ont été écrites"""
+        if self.file is None:
+            return
+        with self.lock:
+            if not self.pending:
+                os.remove(self.path)
+            self.file.close()
+            self.file = None
+
+    def _write(self, entry: dict) -> None:
+        self.file.write(json.dumps(entry).encode("utf-8") + b"\n")
+        self.file.flush()
+
+    def _sync(self) -> None:
+        with self.lock:
+            os.fsync(self.file.fileno())
+
+    def append(self, item: dict, sync: bool = True) -> None:
+        """Journaliser une demande acceptée (durable au retour si sync)"""
+        encoded = self.encode(item)
+        with self.lock:
+            self._write({"op": "accepted", "item": encoded})
+            self.pending[item["receipt_id"]] = encoded
+            if sync:
+                os.fsync(self.file.fileno())
+
+    def mark_done(self, receipt_ids: List[str]) -> None:
+        """
+        Marquer des demandes comme traitées
+
+        Sans fsync : une ligne perdue fait seulement rejouer des demandes
+        déjà écrites, reconnues au rejeu.
+        """
+        with self.lock:
+            self._write({"op": "done", "receipt_ids": receipt_ids})
+            for receipt_id in receipt_ids:
+                self.pending.pop(receipt_id, None)
+
+
+class BidSubmissionQueue:
+    """File bornée des soumissions et writer à commit groupé"""
+
+    def __init__(self):
+        self.queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=settings.SUBMISSION_QUEUE_SIZE)
+        self.session_factory = None
+        self.journal: Optional[SubmissionJournal] = None
+        self._worker: Optional[threading.Thread] = None
+
+    def start(self, session_factory) -> None:
+        """Démarrer le writer avec la fabrique de sessions donnée et rejouer les journaux orphelins"""
+        if not settings.SUBMISSION_QUEUE_ENABLED or self._worker is not None:
+            return
+        self.session_factory = session_factory
+        self.journal = SubmissionJournal()
+        recovered = self.journal.open()
+        self._worker = threading.Thread(target=self._run, name="bid-submissions", daemon=True)
+        self._worker.start()
+        if recovered:
+            logger.warning(f"Reprise de {len(recovered)} soumissions acceptées avant un arrêt brutal")
+        for item in recovered:
+            # Bloquant : le writer est démarré et draine la file
+            self.queue.put({**item, "replayed": True})
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Arrêter le writer après les demandes déjà en file"""
+        if self._worker is None:
+            return
+        worker, self._worker = self._worker, None
+        # Bloquant : la sentinelle passe après les demandes acceptées
+        self.queue.put(None)
+        worker.join(timeout)
+        self.journal.close()
+        self.journal = None
+
+    def submit(
+        self,
+        db: Session,
+        operation: str,
+        supplier_id,
+        received_at: datetime,
+        tender_id=None,
+        bid_id=None,
+        bid_data: Optional[BidCreate] = None
+    ) -> dict:
+        """
+        Mettre une demande en file et retourner son accusé de réception
+
+        La demande est journalisée (fsync) avant l'accusé : appeler depuis un
+        thread du pool (run_in_threadpool), pas depuis la boucle asyncio.
+        Sans writer actif (file désactivée), la demande est appliquée
+        immédiatement avec la session de la requête.
+        """
+        if operation not in OPERATIONS:
+            raise ValueError(f"Opération de soumission inconnue : {operation}")
+
+        receipt = {
+            "receipt_id": str(uuid.uuid4()),
+            "operation": operation,
+            "supplier_id": str(supplier_id),
+            "tender_id": str(tender_id) if tender_id else None,
+            "bid_id": str(bid_id) if bid_id else None,
+            "status": "queued",
+            "received_at": received_at,
+            "processed_at": None,
+            "detail": None
+        }
+
+        if self._worker is None:
+            bid = self._apply(db, {**receipt, "bid_data": bid_data}, commit=True)
+            receipt.update(status="committed", bid_id=str(bid.id), processed_at=datetime.utcnow())
+            SubmissionReceiptStore.save(receipt)
+            return receipt
+
+        # Accusé et journal écrits avant la mise en file : le writer peut
+        # remplacer l'accusé dès qu'il prend la demande
+        item = {**receipt, "bid_data": bid_data}
+        SubmissionReceiptStore.save(receipt)
+        self.journal.append(item)
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.journal.mark_done([receipt["receipt_id"]])
+            receipt.update(status="rejected", detail="File des soumissions saturée")
+            SubmissionReceiptStore.save(receipt)
+            logger.error(f"File des soumissions pleine - demande {operation} refusée (fournisseur {supplier_id})")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Le service de soumission est saturé, veuillez réessayer dans quelques secondes",
+                headers={"Retry-After": "5"}
+            )
+        return receipt
+
+    @staticmethod
+    def _apply(db: Session, item: dict, commit: bool):
+        """Appliquer une demande ; retourne l'offre créée ou déposée"""
+        if item["operation"] == "create":
+            return TenderService.create_bid(
+                db, item["tender_id"], item["supplier_id"], item["bid_data"],
+                received_at=item["received_at"], commit=commit
+            )
+        return TenderService.submit_bid(db, item["bid_id"], received_at=item["received_at"], commit=commit)
+
+    @staticmethod
+    def _already_applied(db: Session, item: dict) -> Optional[Bid]:
+        """
+        Offre issue d'une demande rejouée et déjà écrite avant l'arrêt
+        (commit effectué, ligne « done » perdue)
+        """
+        if item["operation"] == "create":
+            return db.query(Bid).filter(
+                Bid.tender_id == item["tender_id"], Bid.supplier_id == item["supplier_id"]
+            ).first()
+        return db.query(Bid).filter(Bid.id == item["bid_id"], Bid.status == BidStatus.SUBMITTED).first()
+
+    def write_batch(self, db: Session, items: List[dict]) -> None:
+        """Appliquer un lot de demandes (un savepoint chacune) et le valider en un commit"""
+        results = []
+        for item in items:
+            try:
+                with db.begin_nested():
+                    bid = self._apply(db, item, commit=False)
+                results.append(("committed", str(bid.id), None))
+            except HTTPException as e:
+                applied = self._already_applied(db, item) if item.get("replayed") else None
+                if applied is not None:
+                    results.append(("committed", str(applied.id), None))
+                else:
+                    results.append(("rejected", item["bid_id"], e.detail))
+            except Exception as e:
+                logger.error(f"Erreur d'écriture de la soumission {item['receipt_id']}: {e}")
+                results.append(("rejected", item["bid_id"], "Erreur d'enregistrement de la soumission"))
+
+        try:
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            if len(items) == 1:
+                logger.error(f"Échec du commit de la soumission {items[0]['receipt_id']}: {e}")
+                results = [("rejected", items[0]["bid_id"], "Erreur d'enregistrement de la soumission")]
+            else:
+                # Un lot en échec est rejoué demande par demande
+                logger.warning(f"Échec du commit d'un lot de {len(items)} soumissions, reprise unitaire : {e}")
+                for item in items:
+                    self.write_batch(db, [item])
+                return
+
+        processed_at = datetime.utcnow()
+        for item, (result_status, bid_id, detail) in zip(items, results):
+            receipt = {key: value for key, value in item.items() if key not in ("bid_data", "replayed")}
+            receipt.update(status=result_status, bid_id=bid_id, detail=detail, processed_at=processed_at)
+            SubmissionReceiptStore.save(receipt)
+        if self.journal is not None:
+            self.journal.mark_done([item["receipt_id"] for item in items])
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+
+            # Commit groupé : le lot reprend tout ce qui est arrivé pendant
+            # l'écriture du lot précédent, sans attente supplémentaire
+            batch = [item]
+            stopping = False
+            while len(batch) < settings.SUBMISSION_BATCH_SIZE:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            db = self.session_factory()
+            try:
+                self.write_batch(db, batch)
+            except Exception as e:
+                logger.error(f"Erreur du writer des soumissions ({len(batch)} demandes): {e}")
+            finally:
+                db.close()
+
+            if stopping:
+                return
+
+    def pending(self) -> int:
+        return self.queue.qsize()
+
+
+# Instance globale de la file des soumissions
+bid_submission_queue = BidSubmissionQueue()
@@ -1,13 +1,17 @@
 """
 Service de gestion des fournisseurs
 """
-from typing import List, Optional
+import json
+from typing import List, Optional, Dict, Any
+from uuid import UUID
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from datetime import datetime
 
-from app.models.user import Supplier, User, UserStatus
+from app.models.user import Supplier, User, UserStatus, AuditLog
 from app.schemas.user import SupplierPhase1Create, SupplierPhase2Update
+from app.services.eligibility import eligibility_index
 
 class SupplierService:
     """Service de gestion des fournisseurs"""
@@ -38,6 +42,7 @@ class SupplierService:
             db.add(supplier)
             db.commit()
             db.refresh(supplier)
+            eligibility_index.refresh(db, [supplier.id])
             
             return supplier
         except Exception as e:
@@ -86,6 +91,7 @@ class SupplierService:
         
         db.commit()
         db.refresh(supplier)
+        eligibility_index.refresh(db, [supplier.id])
         
         return supplier
     
@@ -169,9 +175,108 @@ class SupplierService:
         
         db.commit()
         db.refresh(supplier)
+        eligibility_index.refresh(db, [supplier.id])
         
         return supplier
     
+    @staticmethod
+    def validate_suppliers_bulk(
+        db: Session,
+        supplier_ids: List[UUID],
+        action: str,
+        notes: Optional[str] = None,
+        admin_id: Optional[UUID] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Valider ou rejeter plusieurs fournisseurs en une transaction
+        
+        Les cibles sont chargées en une requête, les transitions appliquées par
+        UPDATE ensemblistes sur users.status et suppliers.validated_by_admin,
+        et les lignes d'audit insérées en un seul INSERT multi-lignes.
+        """
+        transitions = {
+            "approve": (UserStatus.ACTIVE, True, "approved"),
+            "reject": (UserStatus.REJECTED, False, "rejected"),
+        }
+        if action not in transitions:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Action invalide. Utilisez 'approve' ou 'reject'"
+            )
+        target_status, validated, outcome = transitions[action]
+        
+        # Charger toutes les cibles en une requête
+        rows = db.query(Supplier.id, Supplier.user_id, Supplier.validated_by_admin, User.status).join(
+            User, User.id == Supplier.user_id
+        ).filter(Supplier.id.in_(supplier_ids)).all()
+        found = {str(row.id): row for row in rows}
+        
+        results = []
+        to_update = []
+        seen = set()
+        for supplier_id in supplier_ids:
+            key = str(supplier_id)
+            if key in seen:
+                continue
+            seen.add(key)
+            
+            row = found.get(key)
+            if row is None:
+                results.append({"supplier_id": supplier_id, "outcome": "not_found"})
+            elif row.status == target_status and bool(row.validated_by_admin) == validated:
+                # Statut utilisateur et validation déjà dans l'état cible
+                results.append({
+                    "supplier_id": supplier_id,
+                    "outcome": "unchanged",
+                    "previous_status": row.status,
+                    "status": row.status
+                })
+            else:
+                to_update.append(row)
+                results.append({
+                    "supplier_id": supplier_id,
+                    "outcome": outcome,
+                    "previous_status": row.status,
+                    "status": target_status.value
+                })
+        
+        if not to_update:
+            return results
+        
+        now = datetime.utcnow()
+        db.execute(
+            update(User)
+            .where(User.id.in_([row.user_id for row in to_update]))
+            .values(status=target_status.value)
+        )
+        db.execute(
+            update(Supplier)
+            .where(Supplier.id.in_([row.id for row in to_update]))
+            .values(validated_by_admin=validated, validation_date=now, validation_notes=notes)
+        )
+        db.execute(insert(AuditLog), [
+            {
+                "user_id": admin_id,
+                "action": f"supplier_{outcome}",
+                "table_name": "suppliers",
+                "record_id": row.id,
+                "old_values": json.dumps({
+                    "status": row.status,
+                    "validated_by_admin": row.validated_by_admin
+                }),
+                "new_values": json.dumps({
+                    "status": target_status.value,
+                    "validated_by_admin": validated,
+                    "validation_notes": notes
+                })
+            }
+            for row in to_update
+        ])
+        db.commit()
+        eligibility_index.refresh(db, [row.id for row in to_update])
+        
+        return results
+    
     @staticmethod
     def get_dashboard_stats(db: Session) -> dict:
         """Obtenir les statistiques du tableau de bord"""
@@ -2,6 +2,10 @@
 Service de gestion des appels d'offres avec système de permissions
 """
 from typing import List, Optional, Dict, Any
+from sqlalchemy import select, insert, update, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta
@@ -13,8 +17,30 @@ from app.models.tender import (
 )
 from app.models.user import User, Supplier, UserStatus, UserRole
 from app.schemas.tender import (
-    TenderCreate, TenderUpdate, ExpressionOfInterestCreate, BidCreate, BidUpdate
+    TenderCreate, TenderUpdate, ExpressionOfInterestCreate, BidCreate, BidUpdate,
+    TenderResponse, BidResponse
 )
+from app.services.notifications import NotificationService, notification_pipeline
+from app.services.scheduler import tender_scheduler
+from app.services.tender_events import tender_broadcaster, tender_event, record_after_commit
+
+# Colonnes lues directement pour les listes (chemin rapide sans objets ORM ni
+# modèles Pydantic) ; dérivées des schémas de réponse pour rester synchronisées
+TENDER_LIST_COLUMNS = [
+    Tender.__table__.c[name] for name in TenderResponse.model_fields
+    if name in Tender.__table__.c
+]
+BID_RESPONSE_COLUMNS = [
+    Bid.__table__.c[name] for name in BidResponse.model_fields
+    if name in Bid.__table__.c
+]
+
+# INSERT ... ON CONFLICT DO NOTHING par dialecte (les autres bases lèvent
+# une IntegrityError sur la contrainte d'unicité)
+UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
 
 class TenderService:
     """Service de gestion des appels d'offres"""
@@ -46,6 +72,7 @@ class TenderService:
             opening_date=tender_data.opening_date,
             closing_date=tender_data.closing_date,
             tender_type=tender_data.tender_type,
+            status=tender_data.status,
             estimated_value=tender_data.estimated_value,
             currency=tender_data.currency,
             eligibility_rules=tender_data.eligibility_rules,
@@ -62,13 +89,64 @@ class TenderService:
         db.commit()
         db.refresh(tender)
         
+        # Notifier les fournisseurs éligibles si l'AO est publié dès sa création
+        TenderService._notify_status_change(tender, None)
+        tender_scheduler.schedule(tender)
+        tender_broadcaster.publish(tender_event("created", tender))
+        
         return tender
     
+    @staticmethod
+    def update_tender(db: Session, tender_id: str, tender_data: TenderUpdate) -> Tender:
+        """Mettre à jour un appel d'offres"""
+        tender = db.query(Tender).filter(Tender.id == tender_id).first()
+        if not tender:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Appel d'offres non trouvé"
+            )
+        
+        previous_status = tender.status
+        
+        # Mettre à jour les champs fournis
+        update_dict = tender_data.dict(exclude_unset=True)
+        for field, value in update_dict.items():
+            setattr(tender, field, value)
+        
+        tender.updated_at = datetime.utcnow()
+        db.commit()
+        db.refresh(tender)
+        
+        TenderService._notify_status_change(tender, previous_status)
+        tender_scheduler.schedule(tender)
+        tender_broadcaster.publish(tender_event("updated", tender))
+        
+        return tender
+    
+    @staticmethod
+    def _notify_status_change(tender: Tender, previous_status: Optional[TenderStatus]) -> None:
+        """Mettre en file les notifications liées au nouveau statut (envoi en arrière-plan)"""
+        notification_type = NotificationService.notification_type_for(previous_status, tender.status)
+        if notification_type:
+            notification_pipeline.enqueue(tender.id, notification_type)
+    
     @staticmethod
     def get_tender_by_id(db: Session, tender_id: str) -> Optional[Tender]:
         """Récupérer un appel d'offres par ID"""
         return db.query(Tender).filter(Tender.id == tender_id).first()
     
+    @staticmethod
+    def increment_views(db: Session, tender_id: str) -> None:
+        """Incrémenter le compteur de vues sans modifier updated_at (ETag stable)"""
+        db.query(Tender).filter(Tender.id == tender_id).update(
+            {
+                Tender.views_count: Tender.views_count + 1,
+                Tender.updated_at: Tender.updated_at
+            },
+            synchronize_session=False
+        )
+        db.commit()
+    
     @staticmethod
     def get_tenders(
         db: Session, 
@@ -90,6 +168,27 @@ class TenderService:
         
         return query.offset(skip).limit(limit).all()
     
+    @staticmethod
+    def get_tender_rows(
+        db: Session, 
+        skip: int = 0, 
+        limit: int = 100,
+        status: Optional[TenderStatus] = None,
+        category: Optional[str] = None,
+        tender_type: Optional[TenderType] = None
+    ) -> List[Row]:
+        """Récupérer la liste des appels d'offres en lignes de colonnes (sans objets ORM)"""
+        query = select(*TENDER_LIST_COLUMNS)
+        
+        if status:
+            query = query.where(Tender.status == status)
+        if category:
+            query = query.where(Tender.category == category)
+        if tender_type:
+            query = query.where(Tender.tender_type == tender_type)
+        
+        return db.execute(query.offset(skip).limit(limit)).all()
+    
     @staticmethod
     def get_tender_permissions(db: Session, tender_id: str, user_id: Optional[str] = None) -> Dict[str, Any]:
         """Obtenir les permissions d'un utilisateur sur un appel d'offres"""
@@ -100,6 +199,18 @@ class TenderService:
                 detail="Appel d'offres non trouvé"
             )
         
+        user = db.query(User).filter(User.id == user_id).first() if user_id else None
+        supplier = db.query(Supplier).filter(Supplier.user_id == user_id).first() if user else None
+        
+        return TenderService.compute_permissions(tender, user, supplier)
+    
+    @staticmethod
+    def compute_permissions(tender, user: Optional[User], supplier: Optional[Supplier]) -> Dict[str, Any]:
+        """
+        Calculer les permissions à partir d'objets déjà chargés
+        
+        `tender` peut être un objet Tender ou une ligne de TENDER_LIST_COLUMNS.
+        """
         # Permissions par défaut (lecture publique)
         permissions = {
             "can_view": True,
@@ -110,17 +221,9 @@ class TenderService:
             "eligibility_status": "not_authenticated"
         }
         
-        if not user_id:
-            return permissions
-        
-        # Vérifier l'utilisateur
-        user = db.query(User).filter(User.id == user_id).first()
         if not user:
             return permissions
         
-        # Vérifier le fournisseur
-        supplier = db.query(Supplier).filter(Supplier.user_id == user_id).first()
-        
         # Permissions selon le statut du fournisseur
         if user.role in [UserRole.ADMIN, UserRole.MANAGER]:
             # Administrateurs ont tous les droits
@@ -136,6 +239,23 @@ class TenderService:
         
         return permissions
     
+    @staticmethod
+    def get_permission_context(user: Optional[User]) -> str:
+        """Empreinte des données utilisateur dont dépendent les permissions (pour les ETags)"""
+        if not user:
+            return "anonymous"
+        
+        parts = [user.id, user.role, user.status]
+        supplier = user.supplier_profile
+        if supplier:
+            parts.extend([
+                supplier.country,
+                supplier.supplier_type,
+                supplier.profile_status,
+                supplier.validated_by_admin
+            ])
+        return "|".join(str(part) for part in parts)
+    
     @staticmethod
     def _check_eligibility(tender: Tender, supplier: Supplier, user: User) -> Dict[str, Any]:
         """Vérifier l'éligibilité d'un fournisseur à un appel d'offres"""
@@ -224,31 +344,30 @@ class TenderService:
                 detail="La date de clôture de cet appel d'offres est dépassée"
             )
         
-        # Vérifier qu'il n'y a pas déjà une EOI
-        existing_eoi = db.query(ExpressionOfInterest).filter(
-            ExpressionOfInterest.tender_id == tender_id,
-            ExpressionOfInterest.supplier_id == supplier_id,
-            ExpressionOfInterest.status == "active"
-        ).first()
-        
-        if existing_eoi:
+        # Créer la manifestation d'intérêt ; l'index unique partiel sur les
+        # manifestations actives écarte les doublons, même concurrents
+        eoi = TenderService._insert_unique(
+            db,
+            ExpressionOfInterest,
+            {
+                "tender_id": tender.id,
+                "supplier_id": supplier_id,
+                "message": eoi_data.message,
+                "contact_preference": eoi_data.contact_preference,
+                "status": "active"
+            },
+            index_where=ExpressionOfInterest.status == "active"
+        )
+        if eoi is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Vous avez déjà manifesté votre intérêt pour cet appel d'offres"
             )
         
-        # Créer la manifestation d'intérêt
-        eoi = ExpressionOfInterest(
-            tender_id=tender_id,
-            supplier_id=supplier_id,
-            message=eoi_data.message,
-            contact_preference=eoi_data.contact_preference
-        )
-        
-        db.add(eoi)
-        
-        # Mettre à jour le compteur
-        tender.eoi_count += 1
+        # Incrément atomique côté serveur, en dernier pour tenir le verrou de
+        # ligne de l'AO le moins longtemps possible
+        eoi_count = TenderService._increment_counter(db, tender.id, Tender.eoi_count)
+        record_after_commit(db, tender_event("counters", tender, eoi_count=eoi_count))
         
         db.commit()
         db.refresh(eoi)
@@ -260,9 +379,17 @@ class TenderService:
         db: Session, 
         tender_id: str, 
         supplier_id: str, 
-        bid_data: BidCreate
+        bid_data: BidCreate,
+        received_at: Optional[datetime] = None,
+        commit: bool = True
     ) -> Bid:
-        """Créer une soumission"""
+        """
+        Créer une soumission
+
+        received_at : heure de réception de la demande, si elle a été mise en
+        file (le respect de la date de clôture est jugé sur cette heure) ;
+        commit=False laisse la validation au writer de la file.
+        """
         # Vérifier que l'AO existe
         tender = db.query(Tender).filter(Tender.id == tender_id).first()
         if not tender:
@@ -271,52 +398,58 @@ class TenderService:
                 detail="Appel d'offres non trouvé"
             )
         
-        # Vérifier que l'AO est ouvert
-        if tender.status not in [TenderStatus.PUBLISHED, TenderStatus.OPEN]:
+        # Vérifier que l'AO est ouvert ; une demande reçue avant la clôture
+        # reste recevable si le planificateur a clôturé l'AO entre-temps
+        closed_after_receipt = (
+            received_at is not None
+            and tender.status == TenderStatus.CLOSED
+            and tender.closing_date <= datetime.utcnow()
+        )
+        if tender.status not in [TenderStatus.PUBLISHED, TenderStatus.OPEN] and not closed_after_receipt:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Cet appel d'offres n'accepte plus de soumissions"
             )
         
         # Vérifier que la date de clôture n'est pas passée
-        if tender.closing_date < datetime.utcnow():
+        if tender.closing_date < (received_at or datetime.utcnow()):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="La date de clôture de cet appel d'offres est dépassée"
             )
         
-        # Vérifier qu'il n'y a pas déjà une soumission
-        existing_bid = db.query(Bid).filter(
-            Bid.tender_id == tender_id,
-            Bid.supplier_id == supplier_id
-        ).first()
+        # Générer une référence de soumission
+        bid_reference = f"BID-{tender.reference}-{str(uuid.uuid4())[:8].upper()}"
         
-        if existing_bid:
+        # Créer la soumission ; l'index unique (tender_id, supplier_id)
+        # écarte les doublons, même concurrents
+        bid = TenderService._insert_unique(
+            db,
+            Bid,
+            {
+                "tender_id": tender.id,
+                "supplier_id": supplier_id,
+                "bid_reference": bid_reference,
+                "total_amount": bid_data.total_amount,
+                "currency": bid_data.currency,
+                "validity_period": bid_data.validity_period,
+                "technical_proposal": bid_data.technical_proposal,
+                "delivery_time": bid_data.delivery_time,
+                "status": BidStatus.DRAFT
+            }
+        )
+        if bid is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Vous avez déjà soumis une offre pour cet appel d'offres"
             )
         
-        # Générer une référence de soumission
-        bid_reference = f"BID-{tender.reference}-{str(uuid.uuid4())[:8].upper()}"
-        
-        # Créer la soumission
-        bid = Bid(
-            tender_id=tender_id,
-            supplier_id=supplier_id,
-            bid_reference=bid_reference,
-            total_amount=bid_data.total_amount,
-            currency=bid_data.currency,
-            validity_period=bid_data.validity_period,
-            technical_proposal=bid_data.technical_proposal,
-            delivery_time=bid_data.delivery_time,
-            status=BidStatus.DRAFT
-        )
-        
-        db.add(bid)
+        # Incrément atomique côté serveur (voir express_interest)
+        bids_count = TenderService._increment_counter(db, tender.id, Tender.bids_count)
+        record_after_commit(db, tender_event("counters", tender, bids_count=bids_count))
         
-        # Mettre à jour le compteur
-        tender.bids_count += 1
+        if not commit:
+            return bid
         
         db.commit()
         db.refresh(bid)
@@ -324,8 +457,13 @@ class TenderService:
         return bid
     
     @staticmethod
-    def submit_bid(db: Session, bid_id: str) -> Bid:
-        """Soumettre une offre (passer de draft à submitted)"""
+    def submit_bid(
+        db: Session,
+        bid_id: str,
+        received_at: Optional[datetime] = None,
+        commit: bool = True
+    ) -> Bid:
+        """Soumettre une offre (passer de draft à submitted ; voir create_bid pour received_at)"""
         bid = db.query(Bid).filter(Bid.id == bid_id).first()
         if not bid:
             raise HTTPException(
@@ -340,7 +478,8 @@ class TenderService:
             )
         
         # Vérifier que la date de clôture n'est pas passée
-        if bid.tender.closing_date < datetime.utcnow():
+        received_at = received_at or datetime.utcnow()
+        if bid.tender.closing_date < received_at:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="La date de clôture de cet appel d'offres est dépassée"
@@ -350,13 +489,86 @@ class TenderService:
         
         # Marquer comme soumis
         bid.status = BidStatus.SUBMITTED
-        bid.submitted_at = datetime.utcnow()
+        bid.submitted_at = received_at
+        
+        if not commit:
+            db.flush()
+            return bid
         
         db.commit()
         db.refresh(bid)
         
         return bid
     
+    @staticmethod
+    def _insert_unique(db: Session, model, values: Dict[str, Any], index_where=None):
+        """
+        Insérer une ligne sauf conflit sur (tender_id, supplier_id)
+
+        Une seule instruction INSERT ... ON CONFLICT DO NOTHING RETURNING ;
+        retourne l'objet inséré, ou None si la ligne existe déjà.
+        """
+        upsert_insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+        if upsert_insert is None:
+            try:
+                with db.begin_nested():
+                    return db.scalars(insert(model).values(**values).returning(model)).first()
+            except IntegrityError:
+                return None
+
+        statement = upsert_insert(model).values(**values).on_conflict_do_nothing(
+            index_elements=[model.tender_id, model.supplier_id],
+            index_where=index_where
+        )
+        return db.scalars(statement.returning(model)).first()
+    
+    @staticmethod
+    def _increment_counter(db: Session, tender_id, column) -> Optional[int]:
+        """UPDATE tenders SET <compteur> = <compteur> + 1 RETURNING <compteur>, sans lecture préalable"""
+        return db.execute(
+            update(Tender)
+            .where(Tender.id == tender_id)
+            .values({column: func.coalesce(column, 0) + 1})
+            .returning(column)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+    
+    @staticmethod
+    def reconcile_counters(db: Session, tender_ids: Optional[List] = None) -> Dict[str, int]:
+        """
+        Recalculer eoi_count et bids_count depuis les tables sources
+        
+        Une requête GROUP BY par table, puis un UPDATE groupé limité aux AO
+        dont les compteurs ont dérivé.
+        """
+        eoi_query = select(ExpressionOfInterest.tender_id, func.count()).where(
+            ExpressionOfInterest.status == "active"
+        ).group_by(ExpressionOfInterest.tender_id)
+        bids_query = select(Bid.tender_id, func.count()).group_by(Bid.tender_id)
+        tenders_query = select(Tender.id, Tender.eoi_count, Tender.bids_count)
+        if tender_ids is not None:
+            eoi_query = eoi_query.where(ExpressionOfInterest.tender_id.in_(tender_ids))
+            bids_query = bids_query.where(Bid.tender_id.in_(tender_ids))
+            tenders_query = tenders_query.where(Tender.id.in_(tender_ids))
+        
+        eoi_counts = dict(db.execute(eoi_query).all())
+        bids_counts = dict(db.execute(bids_query).all())
+        
+        checked = 0
+        drifted = []
+        for tender in db.execute(tenders_query):
+            checked += 1
+            eoi_count = eoi_counts.get(tender.id, 0)
+            bids_count = bids_counts.get(tender.id, 0)
+            if tender.eoi_count != eoi_count or tender.bids_count != bids_count:
+                drifted.append({"id": tender.id, "eoi_count": eoi_count, "bids_count": bids_count})
+        
+        if drifted:
+            db.execute(update(Tender), drifted)
+            db.commit()
+        
+        return {"checked": checked, "corrected": len(drifted)}
+    
     @staticmethod
     def get_supplier_bids(db: Session, supplier_id: str) -> List[Bid]:
         """Récupérer les soumissions d'un fournisseur"""
@@ -367,6 +579,12 @@ class TenderService:
         """Récupérer les soumissions d'un appel d'offres"""
         return db.query(Bid).filter(Bid.tender_id == tender_id).all()
     
+    @staticmethod
+    def get_tender_bid_rows(db: Session, tender_id: str) -> List[Dict[str, Any]]:
+        """Récupérer les soumissions d'un appel d'offres en dictionnaires prêts à sérialiser"""
+        query = select(*BID_RESPONSE_COLUMNS).where(Bid.tender_id == tender_id)
+        return [dict(row) for row in db.execute(query).mappings()]
+    
     @staticmethod
     def get_tender_stats(db: Session) -> Dict[str, Any]:
         """Obtenir les statistiques des appels d'offres"""
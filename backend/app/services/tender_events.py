@@ -0,0 +1,214 @@
+"""
+Diffusion des changements d'appels d'offres (Server-Sent Events)
+
+Les services publient un événement après chaque changement visible d'un AO
+(publication, changement de statut ou de date de clôture, nouveaux
+compteurs de manifestations d'intérêt / soumissions). Les événements passent
+par le canal Redis TENDER_EVENTS_CHANNEL pour atteindre tous les workers ;
+chaque worker les redistribue à ses clients SSE connectés, filtrés par AO ou
+par catégorie. Sans Redis, la diffusion reste locale au processus.
+
+Un client connecté ne coûte qu'une connexion inactive et une file en
+mémoire : aucune requête n'est exécutée pour lui entre deux événements. Un
+client trop lent pour suivre reçoit un événement « resync » l'invitant à
+relire la liste.
+
+Les compteurs sont incrémentés dans des transactions encore ouvertes : leurs
+événements sont attachés à la session et publiés après le commit.
+"""
+import asyncio
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Iterable, Optional, Set
+
+import redis
+from sqlalchemy import event as sqlalchemy_event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.tender import Tender, TenderStatus
+from app.services.cache import get_cache, RedisCache
+
+logger = logging.getLogger(__name__)
+
+# Clé de session des événements en attente de commit
+PENDING_EVENTS_KEY = "tender_events"
+
+
+def tender_event(event_type: str, tender: Tender, **fields) -> Optional[dict]:
+    """Événement d'un AO ; None pour un brouillon (non visible des fournisseurs)"""
+    tender_status = fields.pop("status", tender.status)
+    if tender_status == TenderStatus.DRAFT:
+        return None
+    closing_date = fields.pop("closing_date", tender.closing_date)
+    event = {
+        "event": event_type,
+        "tender_id": str(tender.id),
+        "reference": tender.reference,
+        "category": tender.category,
+        "status": tender_status.value if isinstance(tender_status, TenderStatus) else tender_status,
+        "closing_date": closing_date.isoformat() if closing_date else None,
+        "at": datetime.utcnow().isoformat()
+    }
+    event.update(fields)
+    return event
+
+
+class EventSubscriber:
+    """Client SSE connecté à ce processus"""
+
+    def __init__(self, tender_ids: Set[str], categories: Set[str]):
+        self.tender_ids = tender_ids
+        self.categories = categories
+        self.queue: "asyncio.Queue[dict]" = asyncio.Queue(maxsize=settings.TENDER_EVENTS_CLIENT_QUEUE)
+        self.lagging = False
+
+    def wants(self, event: dict) -> bool:
+        if self.tender_ids and event["tender_id"] not in self.tender_ids:
+            return False
+        if self.categories and event.get("category") not in self.categories:
+            return False
+        return True
+
+
+class TenderEventBroadcaster:
+    """Redistribution des événements aux clients SSE du processus"""
+
+    def __init__(self):
+        self.subscribers: Set[EventSubscriber] = set()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._redis: Optional[redis.Redis] = None
+        self._pubsub = None
+        self._listener: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Écouter le canal Redis (si Redis est disponible)"""
+        if not settings.TENDER_EVENTS_ENABLED or self._listener is not None:
+            return
+        cache = get_cache()
+        if not isinstance(cache, RedisCache):
+            logger.warning("Redis indisponible : événements des AO diffusés dans ce processus uniquement")
+            return
+        self._redis = cache.redis_client
+        self._stopped.clear()
+        self._subscribe()
+        self._listener = threading.Thread(target=self._listen, name="tender-events", daemon=True)
+        self._listener.start()
+
+    def stop(self) -> None:
+        if self._listener is None:
+            return
+        self._stopped.set()
+        self._listener.join(5)
+        self._listener = None
+        self._redis = None
+        self._close_pubsub()
+
+    def _subscribe(self) -> None:
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(settings.TENDER_EVENTS_CHANNEL)
+
+    def _close_pubsub(self) -> None:
+        try:
+            self._pubsub.close()
+        except Exception:
+            pass
+
+    def publish(self, event: Optional[dict]) -> None:
+        """Publier un événement à tous les workers (appelable depuis n'importe quel thread)"""
+        if event is None or not settings.TENDER_EVENTS_ENABLED:
+            return
+        if self._redis is not None:
+            try:
+                self._redis.publish(settings.TENDER_EVENTS_CHANNEL, json.dumps(event))
+                return
+            except redis.RedisError as e:
+                logger.warning(f"Publication Redis des événements d'AO impossible, diffusion locale : {e}")
+        self._deliver(event)
+
+    def _listen(self) -> None:
+        """Thread d'écoute du canal Redis (attente bornée pour voir l'arrêt)"""
+        while not self._stopped.is_set():
+            try:
+                message = self._pubsub.get_message(timeout=1.0)
+            except Exception as e:
+                logger.error(f"Écoute des événements d'AO interrompue, reconnexion : {e}")
+                self._close_pubsub()
+                self._stopped.wait(5)
+                try:
+                    self._subscribe()
+                except Exception:
+                    pass
+                continue
+
+            if message is None or message.get("type") != "message":
+                continue
+            try:
+                self._deliver(json.loads(message["data"]))
+            except ValueError:
+                logger.warning("Événement d'AO illisible ignoré")
+
+    def _deliver(self, event: dict) -> None:
+        """Transmettre un événement à la boucle asyncio des clients"""
+        loop = self.loop
+        if loop is None or loop.is_closed() or not self.subscribers:
+            return
+        loop.call_soon_threadsafe(self._dispatch, event)
+
+    def _dispatch(self, event: dict) -> None:
+        """Répartir un événement entre les clients (boucle asyncio)"""
+        for subscriber in list(self.subscribers):
+            if subscriber.lagging or not subscriber.wants(event):
+                continue
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Client trop lent : il relira la liste au lieu de rattraper
+                subscriber.lagging = True
+
+    def subscribe(self, tender_ids: Iterable[str], categories: Iterable[str]) -> Optional[EventSubscriber]:
+        """Inscrire un client (None si le nombre maximal de clients est atteint)"""
+        if len(self.subscribers) >= settings.TENDER_EVENTS_MAX_CLIENTS:
+            return None
+        self.loop = asyncio.get_running_loop()
+        subscriber = EventSubscriber(set(tender_ids), set(categories))
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: EventSubscriber) -> None:
+        self.subscribers.discard(subscriber)
+
+    def status(self) -> dict:
+        return {
+            "clients": len(self.subscribers),
+            "cross_worker": self._listener is not None
+        }
+
+
+# Instance globale du diffuseur d'événements
+tender_broadcaster = TenderEventBroadcaster()
+
+
+def record_after_commit(db: Session, event: Optional[dict]) -> None:
+    """Publier un événement lorsque la transaction en cours sera validée"""
+    if event is not None:
+        db.info.setdefault(PENDING_EVENTS_KEY, []).append(event)
+
+
+@sqlalchemy_event.listens_for(Session, "after_commit")
+def _publish_pending_events(session: Session) -> None:
+    for event in session.info.pop(PENDING_EVENTS_KEY, []):
+        tender_broadcaster.publish(event)
+
+
+@sqlalchemy_event.listens_for(Session, "after_rollback")
+def _discard_pending_events(session: Session) -> None:
+    session.info.pop(PENDING_EVENTS_KEY, None)
+
+
+def format_sse(event: dict) -> str:
+    """Message Server-Sent Events"""
+    return f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
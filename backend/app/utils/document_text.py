@@ -0,0 +1,130 @@
+"""
+Extraction du texte et du nombre de pages des documents
+
+Exécuté dans les processus du pool d'analyse des documents : le module
+n'importe que la bibliothèque standard (et pypdf lorsqu'il est installé)
+afin que les processus démarrent vite et sans l'état de l'application.
+Le résultat ne dépend que du contenu du fichier, ce qui permet de le
+réutiliser pour tout document de même empreinte.
+"""
+import os
+import re
+from datetime import datetime
+
+# Version de l'analyse : un changement invalide les résultats mis en cache
+ANALYZER_VERSION = 1
+
+# Signature des types de fichiers acceptés au téléversement
+MAGIC_NUMBERS = {
+    "application/pdf": b"%PDF-",
+    "image/png": b"\x89PNG",
+    "image/jpeg": b"\xff\xd8\xff",
+    "application/zip": b"PK\x03\x04",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": b"PK\x03\x04",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": b"PK\x03\x04",
+}
+
+# En dessous de ce nombre de caractères par page, le PDF est un scan sans texte
+MIN_TEXT_PER_PAGE = 50
+
+# Longueur de l'extrait de texte conservé
+EXCERPT_LENGTH = 500
+
+# Comptage des pages sans pypdf (objets /Type /Page, hors /Pages)
+PAGE_OBJECT = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+SCAN_BLOCK_SIZE = 1024 * 1024
+
+
+def _count_pdf_pages(path: str) -> int:
+    """Compter les objets page d'un PDF par blocs (mémoire constante)"""
+    count = 0
+    pending = b""
+    with open(path, "rb") as file:
+        while True:
+            block = file.read(SCAN_BLOCK_SIZE)
+            data = pending + block
+            # Un motif qui commence dans les 32 derniers octets peut être coupé :
+            # il est compté au bloc suivant
+            cut = len(data) if not block else max(len(data) - 32, 0)
+            count += sum(1 for match in PAGE_OBJECT.finditer(data) if match.start() < cut)
+            pending = data[cut:]
+            if not block:
+                break
+    return count
+
+
+def _extract_pdf(path: str, result: dict) -> None:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        # Sans pypdf : nombre de pages seulement, texte non évalué
+        result["page_count"] = _count_pdf_pages(path)
+        result["text_length"] = None
+        return
+
+    try:
+        reader = PdfReader(path)
+        if reader.is_encrypted and not reader.decrypt(""):
+            result["issues"].append("encrypted")
+            return
+
+        text_length = 0
+        excerpt = ""
+        for page in reader.pages:
+            text = (page.extract_text() or "").strip()
+            text_length += len(text)
+            if len(excerpt) < EXCERPT_LENGTH and text:
+                excerpt = f"{excerpt} {text}".strip()[:EXCERPT_LENGTH]
+        result["page_count"] = len(reader.pages)
+        result["text_length"] = text_length
+        result["text_excerpt"] = excerpt
+    except Exception:
+        result["issues"].append("unreadable")
+        return
+
+    if result["page_count"] and text_length < MIN_TEXT_PER_PAGE * result["page_count"]:
+        result["issues"].append("no_text_layer")
+
+
+def empty_result(mime_type: str) -> dict:
+    """Résultat d'extraction vierge"""
+    return {
+        "analyzer_version": ANALYZER_VERSION,
+        "mime_type": mime_type,
+        "size": 0,
+        "page_count": None,
+        "text_length": 0,
+        "text_excerpt": "",
+        "issues": [],
+        "analyzed_at": datetime.utcnow().isoformat()
+    }
+
+
+def extract_document(path: str, mime_type: str) -> dict:
+    """Analyser un fichier : taille, signature, nombre de pages et texte"""
+    result = empty_result(mime_type)
+
+    try:
+        result["size"] = os.path.getsize(path)
+        with open(path, "rb") as file:
+            head = file.read(8)
+    except FileNotFoundError:
+        result["issues"].append("missing_file")
+        return result
+
+    if result["size"] == 0:
+        result["issues"].append("empty")
+        return result
+
+    expected = MAGIC_NUMBERS.get(mime_type)
+    if expected and not head.startswith(expected):
+        result["issues"].append("content_type_mismatch")
+        return result
+
+    if mime_type == "application/pdf":
+        _extract_pdf(path, result)
+    elif mime_type.startswith("image/"):
+        result["page_count"] = 1
+        result["issues"].append("scanned_image")
+
+    return result
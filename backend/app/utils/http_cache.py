@@ -0,0 +1,104 @@
+"""
+Utilitaires de cache HTTP (GET conditionnels) pour CAMEG-CHAIN
+
+Les routes calculent un ETag fort à partir de `updated_at` et du contexte de
+permissions de l'appelant, puis répondent 304 sans sérialiser le contenu si le
+client possède déjà la représentation courante.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+
+# Politiques Cache-Control par route
+CACHE_POLICIES: Dict[str, str] = {
+    # Lectures publiques : micro-cache nginx / navigateur de quelques secondes
+    "tender_public": "public, max-age=5, stale-while-revalidate=30",
+    # Lectures authentifiées : toujours revalider auprès de l'API via l'ETag
+    "tender_private": "private, no-cache",
+    "supplier_analysis": "private, no-cache",
+}
+
+
+def make_etag(*parts: Any) -> str:
+    """Construire un ETag fort à partir des éléments qui déterminent la réponse"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, datetime):
+            part = part.isoformat()
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Normaliser une date en UTC (les dates naïves sont supposées UTC)"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def http_date(value: datetime) -> str:
+    """Formater une date au format HTTP (RFC 7231)"""
+    return format_datetime(_as_utc(value).replace(microsecond=0), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Comparer If-None-Match à l'ETag courant (comparaison faible, RFC 7232)"""
+    if header.strip() == "*":
+        return True
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return any(
+        candidate[2:] == etag if candidate.startswith("W/") else candidate == etag
+        for candidate in candidates
+    )
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Indiquer si la représentation du client est à jour"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # If-None-Match prévaut sur If-Modified-Since
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since is None:
+            return False
+        return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+
+    return False
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime], cache_control: str) -> Dict[str, str]:
+    """Construire les headers de validation et de cache"""
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Vary": "Authorization",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime], cache_control: str) -> Response:
+    """Réponse 304 sans corps"""
+    return Response(status_code=304, headers=cache_headers(etag, last_modified, cache_control))
+
+
+def apply_cache_headers(
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime],
+    cache_control: str
+) -> None:
+    """Ajouter les headers de cache à une réponse 200"""
+    for name, value in cache_headers(etag, last_modified, cache_control).items():
+        response.headers[name] = value
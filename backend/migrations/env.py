@@ -0,0 +1,61 @@
+"""
+Environnement Alembic pour CAMEG-CHAIN
+
+Les migrations partagent la même URL et la même métadonnée que l'application
+(app.database), afin que `alembic revision --autogenerate` compare le schéma
+réel aux modèles SQLAlchemy.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.database import Base, DATABASE_URL
+# Importer tous les modèles pour peupler Base.metadata
+import app.models  # noqa: F401
+import app.models.supplier_ai  # noqa: F401
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Générer le SQL des migrations sans connexion (alembic upgrade --sql)"""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Appliquer les migrations sur la base configurée"""
+    connectable = create_engine(DATABASE_URL, poolclass=pool.NullPool)
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            compare_type=True,
+            # Une transaction par révision : les blocs autocommit
+            # (CREATE INDEX CONCURRENTLY) restent isolés
+            transaction_per_migration=True,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,58 @@
+"""Index sur les prédicats chauds des services
+
+Ajoute les index manquants pour les filtres les plus fréquents :
+- doublons de soumission / manifestation d'intérêt (tender_id, supplier_id)
+- filtres IA sur l'état de préqualification et le score prédictif
+- recommandations en attente
+- jointures suppliers -> users filtrées par statut (users.status, users.id)
+
+Les index sont créés avec CREATE INDEX CONCURRENTLY pour ne pas bloquer
+les écritures sur une base en production. Ils sont idempotents
+(IF NOT EXISTS) car une partie du schéma provient de database/init.sql
+et de Base.metadata.create_all.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00
+"""
+from alembic import op
+
+# Identifiants de révision utilisés par Alembic
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (nom, table, colonnes)
+HOT_PREDICATE_INDEXES = [
+    ("idx_bids_tender_supplier", "bids", ["tender_id", "supplier_id"]),
+    ("idx_expressions_of_interest_tender_supplier", "expressions_of_interest", ["tender_id", "supplier_id"]),
+    ("idx_suppliers_ai_prequalification", "suppliers_ai", ["etat_prequalification"]),
+    ("idx_suppliers_ai_score_total", "suppliers_ai", ["score_predictif_total"]),
+    ("idx_supplier_recommendations_status", "supplier_recommendations", ["status"]),
+    ("idx_user_status_id", "users", ["status", "id"]),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY est interdit dans une transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in HOT_PREDICATE_INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _columns in reversed(HOT_PREDICATE_INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
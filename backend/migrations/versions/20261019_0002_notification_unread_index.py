@@ -0,0 +1,39 @@
+"""Index des notifications non lues par utilisateur
+
+Sert la liste des notifications et le recalcul du compteur de non lues
+(tender_notifications filtrées par user_id et is_read) lorsque le cache
+est invalidé après un envoi en masse.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00
+"""
+from alembic import op
+
+# Identifiants de révision utilisés par Alembic
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY est interdit dans une transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_tender_notifications_user_unread",
+            "tender_notifications",
+            ["user_id", "is_read"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "idx_tender_notifications_user_unread",
+            table_name="tender_notifications",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
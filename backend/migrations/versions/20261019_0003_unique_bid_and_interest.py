@@ -0,0 +1,65 @@
+"""Unicité des soumissions et manifestations d'intérêt par fournisseur
+
+Remplace les index de recherche de doublons (tender_id, supplier_id) par
+des index uniques, cibles des INSERT ... ON CONFLICT DO NOTHING des
+services :
+- bids : une soumission par fournisseur et par AO ;
+- expressions_of_interest : une manifestation active par fournisseur et
+  par AO (index partiel, une manifestation retirée peut être renouvelée).
+
+La création échoue si la table contient déjà des doublons ; ils doivent
+être résolus manuellement avant la migration (un index invalide laissé
+par l'échec de CREATE INDEX CONCURRENTLY est supprimé au nouvel essai).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# Identifiants de révision utilisés par Alembic
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# (nouvel index unique, ancien index, table, condition de l'index partiel)
+UNIQUE_INDEXES = [
+    ("uq_bids_tender_supplier", "idx_bids_tender_supplier", "bids", None),
+    (
+        "uq_expressions_of_interest_tender_supplier_active",
+        "idx_expressions_of_interest_tender_supplier",
+        "expressions_of_interest",
+        "status = 'active'",
+    ),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY est interdit dans une transaction
+    with op.get_context().autocommit_block():
+        for name, old_name, table, where in UNIQUE_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+            op.create_index(
+                name,
+                table,
+                ["tender_id", "supplier_id"],
+                unique=True,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+            )
+            op.drop_index(old_name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, old_name, table, _where in reversed(UNIQUE_INDEXES):
+            op.create_index(
+                old_name,
+                table,
+                ["tender_id", "supplier_id"],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
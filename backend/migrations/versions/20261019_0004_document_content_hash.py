@@ -0,0 +1,60 @@
+"""Empreinte SHA-256 des documents
+
+Ajoute la colonne sha256 (indexée) aux documents des fournisseurs, des
+appels d'offres et des soumissions. Elle identifie le fichier dans le
+stockage adressé par contenu (blobs/<aa>/<bb>/<sha256>) : un même
+certificat téléversé par plusieurs fournisseurs n'est stocké qu'une fois.
+
+L'ajout d'une colonne nullable sans défaut ne réécrit pas la table ; les
+index sont créés avec CREATE INDEX CONCURRENTLY.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:00
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# Identifiants de révision utilisés par Alembic
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+DOCUMENT_TABLES = ["supplier_documents", "tender_documents", "bid_documents"]
+
+
+def _has_column(table: str, column: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return any(existing["name"] == column for existing in inspector.get_columns(table))
+
+
+def upgrade() -> None:
+    # Une partie du schéma provient de database/init.sql et de create_all
+    for table in DOCUMENT_TABLES:
+        if not _has_column(table, "sha256"):
+            op.add_column(table, sa.Column("sha256", sa.String(64), nullable=True))
+
+    # CONCURRENTLY est interdit dans une transaction
+    with op.get_context().autocommit_block():
+        for table in DOCUMENT_TABLES:
+            op.create_index(
+                f"ix_{table}_sha256",
+                table,
+                ["sha256"],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in reversed(DOCUMENT_TABLES):
+            op.drop_index(
+                f"ix_{table}_sha256",
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    for table in reversed(DOCUMENT_TABLES):
+        op.drop_column(table, "sha256")
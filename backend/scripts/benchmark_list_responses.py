@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Benchmark des réponses de listes : chemin Pydantic actuel vs chemin rapide.
+
+Compare, pour une liste d'appels d'offres et une liste de soumissions :
+- "pydantic" : objets ORM -> modèles Pydantic -> jsonable_encoder -> json.dumps
+  (équivalent de JSONResponse avec response_model)
+- "fast"     : select() de colonnes -> dictionnaires -> orjson.dumps
+  (équivalent de ORJSONResponse sur le chemin FAST_LIST_RESPONSES)
+
+Usage :
+    python scripts/benchmark_list_responses.py [--tenders 1000] [--bids 1000] [--repeat 20]
+
+Par défaut, une base SQLite en mémoire est créée et peuplée ; --database-url
+permet de mesurer sur une base existante (aucune donnée n'y est insérée).
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import orjson  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.database import Base  # noqa: E402
+from app.models.tender import Tender, Bid, TenderStatus, TenderType, BidStatus  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.tender import TenderResponse, TenderListResponse, BidResponse  # noqa: E402
+from app.services.tender import TenderService  # noqa: E402
+from app.routes.tender import TENDER_PERMISSION_FIELDS  # noqa: E402
+
+
+def seed(session, tender_count: int, bid_count: int) -> uuid.UUID:
+    """Peupler la base de test et retourner l'ID de l'AO portant les soumissions"""
+    creator = User(
+        id=uuid.uuid4(),
+        username="benchmark",
+        email="benchmark@example.com",
+        hashed_password="x",
+        role="admin"
+    )
+    session.add(creator)
+    now = datetime.utcnow()
+
+    tenders = []
+    for i in range(tender_count):
+        tenders.append(Tender(
+            id=uuid.uuid4(),
+            reference=f"AO-BENCH-{i:06d}",
+            title=f"Fourniture de médicaments essentiels lot {i}",
+            description="Appel d'offres de référence pour le benchmark " * 4,
+            category="medicaments",
+            publication_date=now,
+            opening_date=now,
+            closing_date=now + timedelta(days=30),
+            tender_type=TenderType.OPEN,
+            status=TenderStatus.PUBLISHED,
+            eligibility_rules={"countries": ["TG", "CI", "BJ"], "supplier_types": ["pharmaceutique"]},
+            required_documents=["licence_pharmaceutique", "certificat_gmp"],
+            evaluation_criteria={"technical": 70, "financial": 30},
+            estimated_value=1_000_000.0 + i,
+            contact_person="Service achats",
+            contact_email="achats@example.com",
+            views_count=i,
+            eoi_count=0,
+            bids_count=0,
+            created_by=creator.id,
+            created_at=now
+        ))
+    session.add_all(tenders)
+
+    target = tenders[0]
+    session.add_all([
+        Bid(
+            id=uuid.uuid4(),
+            tender_id=target.id,
+            supplier_id=uuid.uuid4(),
+            bid_reference=f"BID-BENCH-{i:06d}",
+            status=BidStatus.SUBMITTED,
+            total_amount=500_000.0 + i,
+            currency="XOF",
+            validity_period=90,
+            technical_proposal="Proposition technique " * 8,
+            delivery_time=30,
+            submitted_at=now,
+            created_at=now
+        )
+        for i in range(bid_count)
+    ])
+    session.commit()
+    return target.id
+
+
+def pydantic_tender_list(session, limit: int) -> bytes:
+    tenders = TenderService.get_tenders(session, 0, limit)
+    responses = []
+    for tender in tenders:
+        tender_dict = tender.__dict__.copy()
+        tender_dict.update(TenderService.compute_permissions(tender, None, None))
+        responses.append(TenderResponse(**tender_dict))
+    body = TenderListResponse(
+        tenders=responses, total=len(tenders), page=1, size=limit,
+        has_next=len(tenders) == limit, has_prev=False
+    )
+    return json.dumps(jsonable_encoder(body)).encode("utf-8")
+
+
+def fast_tender_list(session, limit: int) -> bytes:
+    tenders = TenderService.get_tender_rows(session, 0, limit)
+    items = []
+    for tender in tenders:
+        permissions = TenderService.compute_permissions(tender, None, None)
+        item = tender._asdict()
+        for field in TENDER_PERMISSION_FIELDS:
+            item[field] = permissions[field]
+        items.append(item)
+    return orjson.dumps({
+        "tenders": items, "total": len(tenders), "page": 1, "size": limit,
+        "has_next": len(tenders) == limit, "has_prev": False
+    })
+
+
+def pydantic_bid_list(session, tender_id: uuid.UUID) -> bytes:
+    bids = TenderService.get_tender_bids(session, tender_id)
+    return json.dumps(jsonable_encoder([BidResponse.from_orm(bid) for bid in bids])).encode("utf-8")
+
+
+def fast_bid_list(session, tender_id: uuid.UUID) -> bytes:
+    return orjson.dumps(TenderService.get_tender_bid_rows(session, tender_id))
+
+
+def measure(session_factory, func, *args, repeat: int) -> dict:
+    """Mesurer une fonction (une session neuve par itération, comme par requête)"""
+    durations = []
+    size = 0
+    for _ in range(repeat):
+        session = session_factory()
+        try:
+            start = time.perf_counter()
+            size = len(func(session, *args))
+            durations.append((time.perf_counter() - start) * 1000)
+        finally:
+            session.close()
+    return {
+        "mean_ms": round(statistics.mean(durations), 2),
+        "median_ms": round(statistics.median(durations), 2),
+        "min_ms": round(min(durations), 2),
+        "bytes": size
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark des réponses de listes")
+    parser.add_argument("--tenders", type=int, default=1000, help="Nombre d'appels d'offres")
+    parser.add_argument("--bids", type=int, default=1000, help="Nombre de soumissions sur un AO")
+    parser.add_argument("--repeat", type=int, default=20, help="Nombre d'itérations par mesure")
+    parser.add_argument("--database-url", help="Base existante à utiliser (lecture seule)")
+    parser.add_argument("--tender-id", help="AO dont lister les soumissions (avec --database-url)")
+    args = parser.parse_args()
+
+    if args.database_url:
+        engine = create_engine(args.database_url)
+        session_factory = sessionmaker(bind=engine)
+        tender_id = args.tender_id
+    else:
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+        session = session_factory()
+        tender_id = seed(session, args.tenders, args.bids)
+        session.close()
+
+    results = {
+        "tender_list": {
+            "pydantic": measure(session_factory, pydantic_tender_list, args.tenders, repeat=args.repeat),
+            "fast": measure(session_factory, fast_tender_list, args.tenders, repeat=args.repeat),
+        }
+    }
+    if tender_id:
+        results["bid_list"] = {
+            "pydantic": measure(session_factory, pydantic_bid_list, tender_id, repeat=args.repeat),
+            "fast": measure(session_factory, fast_bid_list, tender_id, repeat=args.repeat),
+        }
+
+    for result in results.values():
+        result["speedup"] = round(result["pydantic"]["median_ms"] / max(result["fast"]["median_ms"], 1e-6), 2)
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Vérifie que les prédicats des requêtes des services sont couverts par un index.
+
+Le script analyse statiquement app/services et app/routes, relève les colonnes
+utilisées dans les appels .filter()/.where() (comparaisons, in_, between), puis
+les compare aux index, clés primaires et contraintes d'unicité du schéma réel
+de la base désignée par DATABASE_URL.
+
+Un prédicat est :
+- "covered" si les premières colonnes d'un index appartiennent toutes au prédicat
+- "partial" si un index commence par au moins une de ses colonnes
+- "missing" sinon
+
+Usage :
+    python scripts/check_index_coverage.py [--fail-on-partial]
+
+Code de sortie 1 si un prédicat n'est pas couvert.
+"""
+import argparse
+import ast
+import json
+import os
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from sqlalchemy import create_engine, inspect  # noqa: E402
+
+from app.database import Base, DATABASE_URL  # noqa: E402
+import app.models  # noqa: E402,F401
+import app.models.supplier_ai  # noqa: E402,F401
+
+SCANNED_DIRS = ["app/services", "app/routes"]
+FILTER_METHODS = {"filter", "where"}
+COLUMN_OPERATORS = {"in_", "between", "is_"}
+
+
+def get_model_tables() -> Dict[str, str]:
+    """Associer le nom de chaque classe de modèle à sa table"""
+    return {
+        mapper.class_.__name__: mapper.local_table.name
+        for mapper in Base.registry.mappers
+    }
+
+
+def _column_ref(node: ast.AST) -> Optional[Tuple[str, str]]:
+    """Retourner (Modèle, colonne) pour un nœud `Modele.colonne`"""
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+        return node.value.id, node.attr
+    return None
+
+
+def _predicate_columns(node: ast.AST) -> List[Tuple[str, str]]:
+    """Extraire les colonnes comparées dans un argument de filter()"""
+    columns = []
+    for child in ast.walk(node):
+        if isinstance(child, ast.Compare):
+            for operand in [child.left] + child.comparators:
+                ref = _column_ref(operand)
+                if ref:
+                    columns.append(ref)
+        elif (
+            isinstance(child, ast.Call)
+            and isinstance(child.func, ast.Attribute)
+            and child.func.attr in COLUMN_OPERATORS
+        ):
+            ref = _column_ref(child.func.value)
+            if ref:
+                columns.append(ref)
+    return columns
+
+
+def collect_predicates(model_tables: Dict[str, str]) -> Dict[Tuple[str, Tuple[str, ...]], List[str]]:
+    """Collecter les prédicats (table, colonnes) et leurs emplacements dans le code"""
+    predicates = defaultdict(list)
+
+    for directory in SCANNED_DIRS:
+        for path in sorted((BACKEND_DIR / directory).glob("*.py")):
+            tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+            for node in ast.walk(tree):
+                if not (
+                    isinstance(node, ast.Call)
+                    and isinstance(node.func, ast.Attribute)
+                    and node.func.attr in FILTER_METHODS
+                ):
+                    continue
+
+                # Regrouper par table les colonnes d'un même appel filter()
+                by_table: Dict[str, List[str]] = defaultdict(list)
+                for arg in node.args:
+                    for model, column in _predicate_columns(arg):
+                        table = model_tables.get(model)
+                        if table and column not in by_table[table]:
+                            by_table[table].append(column)
+
+                location = f"{path.relative_to(BACKEND_DIR)}:{node.lineno}"
+                for table, columns in by_table.items():
+                    predicates[(table, tuple(columns))].append(location)
+
+    return predicates
+
+
+def get_index_prefixes(inspector, table: str) -> List[List[str]]:
+    """Lister les colonnes de chaque index (PK et unicité comprises) d'une table"""
+    indexes = []
+    pk = inspector.get_pk_constraint(table)
+    if pk and pk.get("constrained_columns"):
+        indexes.append(pk["constrained_columns"])
+    for index in inspector.get_indexes(table):
+        indexes.append([c for c in index["column_names"] if c])
+    for constraint in inspector.get_unique_constraints(table):
+        indexes.append(constraint["column_names"])
+    return indexes
+
+
+def classify(columns: Tuple[str, ...], indexes: List[List[str]]) -> str:
+    """Classer la couverture d'un prédicat par les index existants"""
+    wanted: Set[str] = set(columns)
+    best = "missing"
+    for index_columns in indexes:
+        prefix = index_columns[:len(wanted)]
+        if prefix and set(prefix) <= wanted:
+            return "covered"
+        if index_columns and index_columns[0] in wanted:
+            best = "partial"
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Couverture des prédicats par les index")
+    parser.add_argument(
+        "--fail-on-partial",
+        action="store_true",
+        help="Considérer aussi les prédicats partiellement couverts comme des erreurs"
+    )
+    args = parser.parse_args()
+
+    url = os.environ.get("DATABASE_URL", DATABASE_URL)
+    inspector = inspect(create_engine(url))
+    live_tables = set(inspector.get_table_names())
+
+    predicates = collect_predicates(get_model_tables())
+    report = {"database_url": url.split("@")[-1], "covered": [], "partial": [], "missing": []}
+    index_cache: Dict[str, List[List[str]]] = {}
+
+    for (table, columns), locations in sorted(predicates.items()):
+        if table not in live_tables:
+            report["missing"].append({
+                "table": table,
+                "columns": list(columns),
+                "locations": locations,
+                "reason": "table absente du schéma"
+            })
+            continue
+        if table not in index_cache:
+            index_cache[table] = get_index_prefixes(inspector, table)
+        status = classify(columns, index_cache[table])
+        report[status].append({"table": table, "columns": list(columns), "locations": locations})
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    failing = len(report["missing"])
+    if args.fail_on_partial:
+        failing += len(report["partial"])
+    return 1 if failing else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,6 +3,8 @@ Configuration des tests pour CAMEG-CHAIN
 """
 import pytest
 import asyncio
+import uuid
+from datetime import datetime, timedelta
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -11,6 +13,8 @@ from sqlalchemy.pool import StaticPool
 from app.main import app
 from app.database import get_db, Base
 from app.config import settings
+from app.models.tender import Tender, TenderStatus
+from app.models.user import Supplier, User, UserRole, UserStatus
 
 # Base de données de test en mémoire
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -77,3 +81,52 @@ def test_supplier_data():
         "country": "Togo",
         "phone_number": "+22898765432"
     }
+
+@pytest.fixture
+def tender_factory(db_session):
+    """Créer des appels d'offres (ouvert depuis 5 jours, clôture dans 5 jours par défaut)"""
+    def factory(status=TenderStatus.OPEN, **values) -> Tender:
+        now = datetime.utcnow()
+        fields = {
+            "reference": f"AO-TEST-{str(uuid.uuid4())[:8].upper()}",
+            "title": "Fourniture de médicaments",
+            "description": "Appel d'offres de test",
+            "category": "medicaments",
+            "publication_date": now - timedelta(days=10),
+            "opening_date": now - timedelta(days=5),
+            "closing_date": now + timedelta(days=5),
+            "status": status,
+            "created_by": uuid.uuid4(),
+            **values
+        }
+        tender = Tender(**fields)
+        db_session.add(tender)
+        db_session.commit()
+        return tender
+    return factory
+
+@pytest.fixture
+def supplier_factory(db_session):
+    """Créer des fournisseurs avec leur compte utilisateur (statut du compte, champs du fournisseur)"""
+    def factory(status=UserStatus.ACTIVE, **values) -> Supplier:
+        suffix = str(uuid.uuid4())[:8]
+        user = User(
+            username=f"fournisseur-{suffix}",
+            email=f"fournisseur-{suffix}@example.com",
+            hashed_password="x",
+            role=UserRole.SUPPLIER.value,
+            status=status.value
+        )
+        db_session.add(user)
+        db_session.flush()
+        fields = {
+            "company_name": f"Pharma {suffix}",
+            "country": "Togo",
+            "phone_number": "+22890000000",
+            **values
+        }
+        supplier = Supplier(user_id=user.id, **fields)
+        db_session.add(supplier)
+        db_session.commit()
+        return supplier
+    return factory
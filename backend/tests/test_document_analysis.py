@@ -0,0 +1,106 @@
+"""
+Tests pour l'analyse de conformité des documents de soumission
+"""
+import os
+import time
+
+from app.services import document_analysis
+from app.services.document_analysis import DocumentAnalysisPipeline, DocumentAnalysisService
+from app.utils.document_text import extract_document
+
+
+def analysis(*issues) -> dict:
+    return {"issues": list(issues)}
+
+
+def hanging_extract(path: str, mime_type: str) -> dict:
+    """Extraction bloquée sur un fichier (exécutée dans le pool)"""
+    if path == "bloque.pdf":
+        time.sleep(60)
+    return {"issues": [], "pid": os.getpid()}
+
+
+class TestBidCompliance:
+    """Tests pour le score de conformité"""
+
+    def test_complete_and_clean_bid(self):
+        """Tous les documents requis, sans problème : 100"""
+        result = DocumentAnalysisService.compliance(
+            ["licence_pharmaceutique", "certificat_gmp"],
+            [
+                ("licence_pharmaceutique", "licence.pdf", analysis()),
+                ("certificat_gmp", "gmp.pdf", analysis()),
+            ]
+        )
+        assert result["score"] == 100.0
+        assert result["issues"] == []
+        assert result["missing_documents"] == []
+
+    def test_missing_document_and_issue(self):
+        """Un document requis manquant et un scan sans texte"""
+        result = DocumentAnalysisService.compliance(
+            ["licence_pharmaceutique", "certificat_gmp"],
+            [("licence_pharmaceutique", "licence.pdf", analysis("no_text_layer"))]
+        )
+        # Couverture 1/2 (40) ; aucun document sans problème (0)
+        assert result["score"] == 40.0
+        assert result["missing_documents"] == ["certificat_gmp"]
+        assert result["issues"][0] == "Document requis manquant : certificat_gmp"
+        assert "licence.pdf" in result["issues"][1]
+        assert len(result["recommendations"]) == 2
+
+    def test_pending_documents_are_not_penalised(self):
+        """Les documents en cours d'analyse ne comptent pas dans la qualité"""
+        result = DocumentAnalysisService.compliance(
+            None,
+            [("offre", "offre.pdf", analysis()), ("annexe", "annexe.pdf", None)]
+        )
+        assert result["score"] == 100.0
+        assert result["pending_documents"] == 1
+
+
+class TestDocumentExtraction:
+    """Tests pour l'extraction exécutée dans le pool de processus"""
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "vide.pdf"
+        path.write_bytes(b"")
+        assert extract_document(str(path), "application/pdf")["issues"] == ["empty"]
+
+    def test_content_type_mismatch(self, tmp_path):
+        path = tmp_path / "certificat.pdf"
+        path.write_bytes(b"\x89PNG\r\n\x1a\n" + b"\x00" * 32)
+        assert extract_document(str(path), "application/pdf")["issues"] == ["content_type_mismatch"]
+
+    def test_missing_file(self, tmp_path):
+        assert extract_document(str(tmp_path / "absent.pdf"), "application/pdf")["issues"] == ["missing_file"]
+
+
+class TestExtractionTimeout:
+    """Tests pour le remplacement du pool après un dépassement de délai"""
+
+    def test_stuck_worker_replaced(self, monkeypatch):
+        """Le fichier bloquant est déclaré illisible et le pool remplacé"""
+        monkeypatch.setattr(document_analysis, "extract_document", hanging_extract)
+        pipeline = DocumentAnalysisPipeline()
+        pipeline.executor = pipeline._new_executor()
+        stuck_executor = pipeline.executor
+        try:
+            monkeypatch.setattr(document_analysis.settings, "DOCUMENT_ANALYSIS_TIMEOUT", 30)
+            first = pipeline._extract("sain.pdf", "application/pdf")
+            stuck_processes = list(stuck_executor._processes.values())
+
+            monkeypatch.setattr(document_analysis.settings, "DOCUMENT_ANALYSIS_TIMEOUT", 1)
+            result = pipeline._extract("bloque.pdf", "application/pdf")
+            assert result["issues"] == ["unreadable"]
+            assert pipeline.executor is not stuck_executor
+            for process in stuck_processes:
+                process.join(5)
+                assert not process.is_alive()
+
+            monkeypatch.setattr(document_analysis.settings, "DOCUMENT_ANALYSIS_TIMEOUT", 30)
+            after = pipeline._extract("sain.pdf", "application/pdf")
+            assert after["issues"] == []
+            assert after["pid"] != first["pid"]
+        finally:
+            pipeline.executor.shutdown(wait=True, cancel_futures=True)
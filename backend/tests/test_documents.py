@@ -0,0 +1,199 @@
+"""
+Tests pour le stockage adressé par contenu, les téléchargements partiels et
+les droits d'accès aux documents
+"""
+import asyncio
+import hashlib
+import os
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.tender import Bid, BidStatus, TenderDocument, TenderStatus
+from app.models.user import User, UserRole, UserStatus
+from app.services import documents
+from app.services.cache import MemoryCache
+from app.services.documents import DocumentService, DocumentStorage, UploadHashers, parse_range, iter_file
+
+
+@pytest.fixture
+def storage_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(documents.settings, "DOCUMENT_STORAGE_DIR", str(tmp_path))
+    os.makedirs(tmp_path / "uploads")
+    return tmp_path
+
+
+def write_partial(upload_id: str, content: bytes) -> str:
+    path = DocumentStorage.upload_path(upload_id)
+    with open(path, "wb") as partial:
+        partial.write(content)
+    return path
+
+
+class TestDocumentStorage:
+    """Tests pour le stockage des documents"""
+
+    def test_identical_content_is_stored_once(self, storage_dir):
+        """Un second téléversement du même contenu réutilise le blob existant"""
+        content = b"%PDF-1.7 certificat GMP"
+        sha256 = hashlib.sha256(content).hexdigest()
+
+        first_path, first_dedup = DocumentStorage.commit_blob(write_partial("a", content), sha256)
+        second_path, second_dedup = DocumentStorage.commit_blob(write_partial("b", content), sha256)
+
+        assert first_path == second_path == f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+        assert (first_dedup, second_dedup) == (False, True)
+        assert os.listdir(storage_dir / "uploads") == []
+        with open(DocumentStorage.absolute_path(first_path), "rb") as blob:
+            assert blob.read() == content
+
+    def test_paths_outside_storage_are_refused(self, storage_dir):
+        with pytest.raises(HTTPException) as exc_info:
+            DocumentStorage.absolute_path("../etc/passwd")
+        assert exc_info.value.status_code == 404
+
+    def test_hasher_is_rebuilt_from_partial_file(self, storage_dir):
+        """Reprise dans un autre processus : empreinte recalculée depuis le fichier partiel"""
+        content = os.urandom(3 * 1024 * 1024 + 17)
+        path = write_partial("c", content)
+
+        hasher = UploadHashers().resume("c", len(content), path)
+
+        assert hasher.hexdigest() == hashlib.sha256(content).hexdigest()
+
+
+class FakeChunkRequest:
+    """Requête dont le corps est lu par morceaux"""
+
+    def __init__(self, *pieces: bytes):
+        self.pieces = pieces
+
+    async def stream(self):
+        for piece in self.pieces:
+            yield piece
+
+
+class TestAppendChunk:
+    """Tests pour l'écriture des morceaux"""
+
+    def test_last_chunk_in_another_process_stores_document(self, storage_dir, db_session, tender_factory, monkeypatch):
+        """Sans état SHA-256 en mémoire, l'empreinte est recalculée et le document enregistré"""
+        monkeypatch.setattr(documents, "get_cache", lambda: MemoryCache())
+        monkeypatch.setattr(documents, "upload_hashers", UploadHashers())
+        tender = tender_factory()
+        first, last = b"%PDF-1.7 cahier", b" des charges"
+        upload = {
+            "upload_id": "reprise",
+            "target": "tender",
+            "owner_id": tender.id,
+            "document_type": "rfp",
+            "file_name": "dao.pdf",
+            "mime_type": "application/pdf",
+            "total_size": len(first) + len(last)
+        }
+        write_partial("reprise", first)
+
+        offset, document = asyncio.run(
+            DocumentService.append_chunk(db_session, upload, len(first), FakeChunkRequest(last))
+        )
+
+        assert offset == upload["total_size"]
+        assert document["sha256"] == hashlib.sha256(first + last).hexdigest()
+        assert db_session.query(TenderDocument).one().file_path == DocumentStorage.blob_path(document["sha256"])
+
+
+class TestTenderDocumentAccess:
+    """Droits de téléchargement des documents d'appel d'offres"""
+
+    @pytest.fixture
+    def tender_document(self, db_session, tender_factory):
+        def factory(tender_status=TenderStatus.OPEN, is_public=True, **tender_values) -> TenderDocument:
+            tender = tender_factory(tender_status, **tender_values)
+            document = TenderDocument(
+                tender_id=tender.id,
+                document_type="rfp",
+                file_name="dao.pdf",
+                file_path="blobs/aa/bb/aabb",
+                is_public=is_public,
+                requires_authentication=False
+            )
+            db_session.add(document)
+            db_session.commit()
+            return document
+        return factory
+
+    @staticmethod
+    def can_download(db_session, user, document) -> bool:
+        try:
+            DocumentService.get_document_for_download(db_session, user, "tender", document.id)
+            return True
+        except HTTPException as exc:
+            assert exc.status_code == 403
+            return False
+
+    def supplier_user(self, db_session, supplier_factory, **values) -> User:
+        supplier = supplier_factory(UserStatus.ACTIVE, **values)
+        return db_session.get(User, supplier.user_id)
+
+    def test_public_document_of_published_tender(self, db_session, tender_document):
+        assert self.can_download(db_session, None, tender_document())
+
+    def test_draft_tender_documents_reserved_to_managers(self, db_session, tender_document, supplier_factory):
+        document = tender_document(TenderStatus.DRAFT)
+        manager = User(username="manager", email="manager@example.com", hashed_password="x", role=UserRole.MANAGER.value)
+
+        assert not self.can_download(db_session, None, document)
+        assert not self.can_download(db_session, self.supplier_user(db_session, supplier_factory), document)
+        assert self.can_download(db_session, manager, document)
+
+    def test_private_document_refused_to_anonymous_and_ineligible(self, db_session, tender_document, supplier_factory):
+        """Document non public : ni anonyme, ni fournisseur hors des règles d'éligibilité"""
+        document = tender_document(is_public=False, eligibility_rules={"countries": ["Bénin"]})
+
+        assert not self.can_download(db_session, None, document)
+        assert not self.can_download(db_session, self.supplier_user(db_session, supplier_factory), document)
+        assert self.can_download(db_session, self.supplier_user(db_session, supplier_factory, country="Bénin"), document)
+
+    def test_private_document_open_to_participants(self, db_session, tender_document, supplier_factory):
+        """Un soumissionnaire garde l'accès même hors des règles actuelles"""
+        document = tender_document(is_public=False, eligibility_rules={"countries": ["Bénin"]})
+        supplier = supplier_factory(UserStatus.ACTIVE)
+        db_session.add(Bid(
+            tender_id=document.tender_id,
+            supplier_id=supplier.id,
+            bid_reference=f"BID-TEST-{str(uuid.uuid4())[:8].upper()}",
+            status=BidStatus.SUBMITTED
+        ))
+        db_session.commit()
+
+        assert self.can_download(db_session, db_session.get(User, supplier.user_id), document)
+
+
+class TestRanges:
+    """Tests pour l'en-tête Range"""
+
+    @pytest.mark.parametrize("header, expected", [
+        (None, None),
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, 999)),
+        ("bytes=-100", (900, 999)),
+        ("bytes=900-5000", (900, 999)),
+        ("bytes=0-1,5-9", None),
+        ("items=0-1", None),
+    ])
+    def test_parse_range(self, header, expected):
+        assert parse_range(header, 1000) == expected
+
+    def test_unsatisfiable_range(self):
+        with pytest.raises(HTTPException) as exc_info:
+            parse_range("bytes=1000-", 1000)
+        assert exc_info.value.status_code == 416
+        assert exc_info.value.headers["Content-Range"] == "bytes */1000"
+
+    def test_iter_file_reads_requested_slice(self, tmp_path):
+        path = tmp_path / "document.bin"
+        content = os.urandom(2 * 1024 * 1024 + 5)
+        path.write_bytes(content)
+
+        assert b"".join(iter_file(str(path), 10, 1024 * 1024 + 20)) == content[10:1024 * 1024 + 21]
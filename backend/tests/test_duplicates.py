@@ -0,0 +1,59 @@
+"""
+Tests pour la détection des doublons par contrainte d'unicité
+"""
+import uuid
+
+from app.models.tender import ExpressionOfInterest, Bid, BidStatus
+from app.services.tender import TenderService
+
+
+def bid_values(tender_id, supplier_id) -> dict:
+    return {
+        "tender_id": tender_id,
+        "supplier_id": supplier_id,
+        "bid_reference": f"BID-TEST-{str(uuid.uuid4())[:8].upper()}",
+        "status": BidStatus.DRAFT
+    }
+
+
+def eoi_values(tender_id, supplier_id) -> dict:
+    return {"tender_id": tender_id, "supplier_id": supplier_id, "status": "active"}
+
+
+class TestInsertUnique:
+    """Tests pour INSERT ... ON CONFLICT DO NOTHING"""
+
+    def test_duplicate_bid_is_rejected(self, db_session):
+        """Une seconde soumission du même fournisseur n'est pas insérée"""
+        tender_id, supplier_id = uuid.uuid4(), uuid.uuid4()
+
+        first = TenderService._insert_unique(db_session, Bid, bid_values(tender_id, supplier_id))
+        second = TenderService._insert_unique(db_session, Bid, bid_values(tender_id, supplier_id))
+        other = TenderService._insert_unique(db_session, Bid, bid_values(tender_id, uuid.uuid4()))
+
+        assert first is not None and first.id is not None
+        assert second is None
+        assert other is not None
+        assert db_session.query(Bid).count() == 2
+
+    def test_withdrawn_interest_can_be_renewed(self, db_session):
+        """Seules les manifestations actives entrent dans la contrainte"""
+        tender_id, supplier_id = uuid.uuid4(), uuid.uuid4()
+        active_only = ExpressionOfInterest.status == "active"
+
+        first = TenderService._insert_unique(
+            db_session, ExpressionOfInterest, eoi_values(tender_id, supplier_id), index_where=active_only
+        )
+        duplicate = TenderService._insert_unique(
+            db_session, ExpressionOfInterest, eoi_values(tender_id, supplier_id), index_where=active_only
+        )
+        assert first is not None
+        assert duplicate is None
+
+        first.status = "withdrawn"
+        db_session.flush()
+        renewed = TenderService._insert_unique(
+            db_session, ExpressionOfInterest, eoi_values(tender_id, supplier_id), index_where=active_only
+        )
+        assert renewed is not None
+        assert renewed.id != first.id
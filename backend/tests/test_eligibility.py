@@ -0,0 +1,69 @@
+"""
+Tests pour l'index inversé d'éligibilité
+"""
+import uuid
+from types import SimpleNamespace
+
+from app.models.tender import TenderType
+from app.models.user import UserStatus
+from app.services.eligibility import EligibilityIndex
+
+
+def make_index(*suppliers) -> EligibilityIndex:
+    """Index construit directement à partir de tuples d'attributs"""
+    index = EligibilityIndex()
+    for supplier_id, attributes in suppliers:
+        index._set(supplier_id, attributes)
+    return index
+
+
+def eligible(index: EligibilityIndex, tender, action: str) -> set:
+    return set(index._decode(index._bitmaps(tender)[action]))
+
+
+class TestEligibilityIndex:
+    """Tests pour l'évaluation des règles par bitmaps"""
+
+    def setup_method(self):
+        self.complete_tg = uuid.uuid4()
+        self.partial_ci = uuid.uuid4()
+        self.validated_tg = uuid.uuid4()
+        self.pending_tg = uuid.uuid4()
+        self.index = make_index(
+            (self.complete_tg, ("TG", "pharmaceutical", "profile_complete", False, UserStatus.ACTIVE.value)),
+            (self.partial_ci, ("CI", "medical", "profile_partial", False, UserStatus.ACTIVE.value)),
+            (self.validated_tg, ("TG", "pharmaceutical", "profile_complete", True, UserStatus.ACTIVE.value)),
+            (self.pending_tg, ("TG", "pharmaceutical", "profile_complete", True, UserStatus.PENDING_VALIDATION.value)),
+        )
+
+    def test_open_tender_rules(self):
+        """AO ouvert : comptes actifs filtrés par pays et type"""
+        tender = SimpleNamespace(tender_type=TenderType.OPEN, eligibility_rules={"countries": ["TG"]})
+
+        assert eligible(self.index, tender, "express_interest") == {self.complete_tg, self.validated_tg}
+        assert eligible(self.index, tender, "submit_bid") == {self.complete_tg, self.validated_tg}
+
+        tender.eligibility_rules = {"supplier_types": ["medical"]}
+        assert eligible(self.index, tender, "submit_bid") == {self.partial_ci}
+
+    def test_restricted_tender_requires_validation(self):
+        """AO restreint : profil complet et validation admin"""
+        tender = SimpleNamespace(tender_type=TenderType.RESTRICTED, eligibility_rules=None)
+
+        assert eligible(self.index, tender, "submit_bid") == {self.validated_tg}
+
+    def test_incremental_update_and_removal(self):
+        """Les mises à jour déplacent le fournisseur ; les cases libérées sont réutilisées"""
+        tender = SimpleNamespace(tender_type=TenderType.OPEN, eligibility_rules={"countries": ["CI"]})
+
+        self.index._set(self.complete_tg, ("CI", "pharmaceutical", "profile_complete", False, UserStatus.ACTIVE.value))
+        assert eligible(self.index, tender, "express_interest") == {self.complete_tg, self.partial_ci}
+
+        self.index._remove(self.partial_ci)
+        assert eligible(self.index, tender, "express_interest") == {self.complete_tg}
+
+        newcomer = uuid.uuid4()
+        self.index._set(newcomer, ("CI", "medical", "phase_1_complete", False, UserStatus.ACTIVE.value))
+        assert len(self.index.supplier_ids) == 4
+        assert eligible(self.index, tender, "express_interest") == {self.complete_tg, newcomer}
+        assert eligible(self.index, tender, "submit_bid") == {self.complete_tg}
@@ -0,0 +1,77 @@
+"""
+Tests pour le moteur d'évaluation des soumissions
+"""
+import numpy as np
+
+from app.services.evaluation import EvaluationService
+
+
+class TestEvaluation:
+    """Tests pour la notation et le classement vectorisés"""
+
+    def test_criteria_weights_normalized(self):
+        """Les poids sont normalisés, avec repli sur 70/30"""
+        assert EvaluationService.criteria_weights({"technical": 60, "financial": 40}) == (0.6, 0.4)
+        assert EvaluationService.criteria_weights({"technical": 1, "financial": 1}) == (0.5, 0.5)
+        assert EvaluationService.criteria_weights(None) == (0.7, 0.3)
+        assert EvaluationService.criteria_weights({"technical": "abc"}) == (0.7, 0.3)
+
+    def test_lowest_price_with_currency_conversion(self):
+        """La note financière compare les montants convertis dans une devise commune"""
+        scores = EvaluationService.score_bids(
+            group=np.array([0, 0, 0]),
+            amounts=np.array([655957.0, 1000.0, 2000.0]),
+            rates=np.array([1.0, 655.957, 655.957]),  # XOF, EUR, EUR
+            technical=np.array([80.0, 80.0, 80.0]),
+            submitted=np.array([1.0, 2.0, 3.0]),
+            weights=np.array([[0.0, 1.0]])
+        )
+
+        assert scores["financial"].tolist() == [100.0, 100.0, 50.0]
+        # Égalité départagée par la date de soumission
+        assert scores["rank"].tolist() == [1, 2, 3]
+
+    def test_ranking_per_tender(self):
+        """Chaque appel d'offres a son propre classement et ses propres poids"""
+        scores = EvaluationService.score_bids(
+            group=np.array([0, 1, 0, 1]),
+            amounts=np.array([100.0, 100.0, 200.0, 50.0]),
+            rates=np.ones(4),
+            technical=np.array([50.0, 90.0, 100.0, np.nan]),
+            submitted=np.zeros(4),
+            weights=np.array([[0.7, 0.3], [0.5, 0.5]])
+        )
+
+        assert scores["total"].tolist() == [65.0, 70.0, 85.0, 50.0]
+        assert scores["rank"].tolist() == [2, 1, 1, 2]
+
+    def test_invalid_financial_offer_ranked_last(self):
+        """Montant absent ou devise inconnue : note financière nulle, classée en dernier"""
+        scores = EvaluationService.score_bids(
+            group=np.array([0, 0, 0]),
+            amounts=np.array([np.nan, 100.0, 100.0]),
+            rates=np.array([1.0, np.nan, 1.0]),
+            technical=np.array([100.0, 100.0, 10.0]),
+            submitted=np.zeros(3),
+            weights=np.array([[0.7, 0.3]])
+        )
+
+        assert scores["valid"].tolist() == [False, False, True]
+        assert scores["financial"].tolist() == [0.0, 0.0, 100.0]
+        assert scores["rank"].tolist() == [2, 3, 1]
+
+    def test_missing_technical_score_flagged(self):
+        """Sans note technique : comptée 0 et signalée comme non évaluée"""
+        scores = EvaluationService.score_bids(
+            group=np.array([0, 0]),
+            amounts=np.array([100.0, 100.0]),
+            rates=np.ones(2),
+            technical=np.array([np.nan, 60.0]),
+            submitted=np.zeros(2),
+            weights=np.array([[0.7, 0.3]])
+        )
+
+        assert scores["technically_evaluated"].tolist() == [False, True]
+        assert scores["technical"].tolist() == [0.0, 60.0]
+        assert scores["total"].tolist() == [30.0, 72.0]
+        assert scores["rank"].tolist() == [2, 1]
@@ -0,0 +1,114 @@
+"""
+Tests pour les exports en flux (NDJSON / CSV)
+"""
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models.tender import Bid, BidStatus, TenderStatus
+from app.models.user import UserStatus
+from app.services import export
+from app.services.export import ExportService, SUPPLIER_EXPORT_COLUMNS
+from app.services.tender import BID_RESPONSE_COLUMNS, TENDER_LIST_COLUMNS
+
+
+CRITERIA = {"technical": 70, "financial": 30}
+
+
+@pytest.fixture
+def export_session(db_session, monkeypatch):
+    """Les exports ouvrent leur propre session : la lier à la base de test"""
+    monkeypatch.setattr(export, "SessionLocal", sessionmaker(bind=db_session.get_bind()))
+    return db_session
+
+
+def make_bid(db_session, tender, status=BidStatus.SUBMITTED) -> Bid:
+    bid = Bid(
+        tender_id=tender.id,
+        supplier_id=uuid.uuid4(),
+        bid_reference=f"BID-TEST-{str(uuid.uuid4())[:8].upper()}",
+        total_amount=1500.0,
+        status=status
+    )
+    db_session.add(bid)
+    db_session.commit()
+    return bid
+
+
+def read_ndjson(query) -> list:
+    content = b"".join(ExportService.stream(query, "ndjson"))
+    return [json.loads(line) for line in content.decode("utf-8").splitlines()]
+
+
+def read_csv(query) -> list:
+    content = b"".join(ExportService.stream(query, "csv"))
+    return list(csv.reader(io.StringIO(content.decode("utf-8"))))
+
+
+class TestNdjsonExport:
+    """Une ligne JSON par enregistrement"""
+
+    def test_tenders_filtered_by_status_and_category(self, export_session, tender_factory):
+        expected = tender_factory(TenderStatus.OPEN, evaluation_criteria=CRITERIA)
+        tender_factory(TenderStatus.DRAFT)
+        tender_factory(TenderStatus.OPEN, category="consommables")
+
+        rows = read_ndjson(ExportService.tenders_query(TenderStatus.OPEN, "medicaments"))
+
+        assert len(rows) == 1
+        assert list(rows[0]) == [column.key for column in TENDER_LIST_COLUMNS]
+        assert rows[0]["id"] == str(expected.id)
+        assert rows[0]["status"] == "open"
+        assert rows[0]["evaluation_criteria"] == CRITERIA
+
+    def test_suppliers_filtered_by_user_status(self, export_session, supplier_factory):
+        active = supplier_factory(UserStatus.ACTIVE)
+        supplier_factory(UserStatus.PENDING_VALIDATION)
+
+        rows = read_ndjson(ExportService.suppliers_query(UserStatus.ACTIVE.value))
+
+        assert [row["id"] for row in rows] == [str(active.id)]
+        assert set(rows[0]) == {column.key for column in SUPPLIER_EXPORT_COLUMNS}
+
+    def test_empty_export(self, export_session):
+        assert b"".join(ExportService.stream(ExportService.tenders_query(TenderStatus.AWARDED), "ndjson")) == b""
+
+
+class TestCsvExport:
+    """En-tête puis une ligne par enregistrement"""
+
+    def test_bids_filtered_by_tender_and_status(self, export_session, tender_factory):
+        tender, other = tender_factory(), tender_factory()
+        expected = make_bid(export_session, tender)
+        make_bid(export_session, tender, BidStatus.DRAFT)
+        make_bid(export_session, other)
+
+        header, *rows = read_csv(ExportService.bids_query(tender.id, BidStatus.SUBMITTED))
+
+        assert header == [column.key for column in BID_RESPONSE_COLUMNS]
+        assert len(rows) == 1
+        row = dict(zip(header, rows[0]))
+        assert row["id"] == str(expected.id)
+        assert row["status"] == "submitted"
+        assert row["total_amount"] == "1500.0"
+
+    def test_tenders_cells(self, export_session, tender_factory):
+        tender_factory(TenderStatus.OPEN, evaluation_criteria=CRITERIA)
+
+        header, *rows = read_csv(ExportService.tenders_query())
+        row = dict(zip(header, rows[0]))
+
+        assert len(rows) == 1
+        assert row["status"] == "open"
+        assert json.loads(row["evaluation_criteria"]) == CRITERIA
+        assert datetime.fromisoformat(row["closing_date"])
+
+    def test_header_only_when_empty(self, export_session):
+        assert read_csv(ExportService.bids_query(uuid.uuid4())) == [
+            [column.key for column in BID_RESPONSE_COLUMNS]
+        ]
@@ -0,0 +1,121 @@
+"""
+Tests pour les GET conditionnels (ETag / Last-Modified)
+"""
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import Request
+
+from app.utils.http_cache import CACHE_POLICIES, make_etag, http_date, is_not_modified, not_modified_response
+
+
+def make_request(headers: dict) -> Request:
+    """Construire une requête minimale avec les headers donnés"""
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+class TestHttpCache:
+    """Tests pour les utilitaires de cache HTTP"""
+    
+    def test_etag_depends_on_permission_context(self):
+        """L'ETag change avec updated_at et le contexte de permissions"""
+        updated_at = datetime(2026, 1, 1, 12, 0, 0)
+        etag = make_etag("tender", "id-1", updated_at, "anonymous")
+        
+        assert etag.startswith('"') and etag.endswith('"')
+        assert etag == make_etag("tender", "id-1", updated_at, "anonymous")
+        assert etag != make_etag("tender", "id-1", updated_at, "user-1|supplier|actif")
+        assert etag != make_etag("tender", "id-1", updated_at + timedelta(seconds=1), "anonymous")
+    
+    def test_if_none_match(self):
+        """If-None-Match accepte les listes, les ETags faibles et *"""
+        etag = make_etag("tender", "id-1")
+        
+        assert is_not_modified(make_request({"If-None-Match": etag}), etag)
+        assert is_not_modified(make_request({"If-None-Match": f'"other", W/{etag}'}), etag)
+        assert is_not_modified(make_request({"If-None-Match": "*"}), etag)
+        assert not is_not_modified(make_request({"If-None-Match": '"other"'}), etag)
+    
+    def test_if_modified_since(self):
+        """If-Modified-Since compare à la seconde près, If-None-Match est prioritaire"""
+        etag = make_etag("tender", "id-1")
+        last_modified = datetime(2026, 1, 1, 12, 0, 0, 500000)
+        
+        assert is_not_modified(make_request({"If-Modified-Since": http_date(last_modified)}), etag, last_modified)
+        assert not is_not_modified(
+            make_request({"If-Modified-Since": http_date(last_modified - timedelta(minutes=1))}),
+            etag, last_modified
+        )
+        assert not is_not_modified(
+            make_request({"If-None-Match": '"other"', "If-Modified-Since": http_date(last_modified)}),
+            etag, last_modified
+        )
+        assert not is_not_modified(make_request({"If-Modified-Since": "invalid"}), etag, last_modified)
+    
+    def test_not_modified_response(self):
+        """La réponse 304 porte les headers de validation sans corps"""
+        etag = make_etag("tender", "id-1")
+        response = not_modified_response(etag, datetime(2026, 1, 1), "private, no-cache")
+        
+        assert response.status_code == 304
+        assert response.body == b""
+        assert response.headers["ETag"] == etag
+        assert response.headers["Cache-Control"] == "private, no-cache"
+        assert response.headers["Last-Modified"] == "Thu, 01 Jan 2026 00:00:00 GMT"
+
+
+class TestTenderRoutes:
+    """GET conditionnels sur les routes des appels d'offres"""
+
+    def test_list_not_modified(self, client, tender_factory):
+        """La liste renvoie 304 tant que les AO listés sont inchangés"""
+        tender_factory()
+
+        first = client.get("/api/v1/tenders/")
+        etag = first.headers["ETag"]
+        assert first.status_code == 200
+        assert first.headers["Cache-Control"] == CACHE_POLICIES["tender_public"]
+        assert "Last-Modified" in first.headers
+
+        cached = client.get("/api/v1/tenders/", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["ETag"] == etag
+
+    def test_list_etag_changes_with_content(self, client, db_session, tender_factory):
+        tender = tender_factory()
+        etag = client.get("/api/v1/tenders/").headers["ETag"]
+
+        tender.updated_at = datetime.utcnow() + timedelta(minutes=1)
+        db_session.commit()
+
+        response = client.get("/api/v1/tenders/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_detail_etag_stable_across_views(self, client, db_session, tender_factory):
+        """Le compteur de vues n'invalide pas l'ETag du détail"""
+        tender = tender_factory(views_count=0)
+        url = f"/api/v1/tenders/{tender.id}"
+
+        first = client.get(url)
+        second = client.get(url)
+        assert first.status_code == second.status_code == 200
+        assert first.headers["ETag"] == second.headers["ETag"]
+        assert first.headers["Cache-Control"] == CACHE_POLICIES["tender_public"]
+
+        cached = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+        assert cached.status_code == 304
+        assert cached.content == b""
+
+        db_session.refresh(tender)
+        assert tender.views_count == 3
+
+    def test_detail_unknown_or_invalid_id(self, client):
+        assert client.get(f"/api/v1/tenders/{uuid.uuid4()}").status_code == 404
+        assert client.get("/api/v1/tenders/not-a-uuid").status_code == 422
@@ -0,0 +1,118 @@
+"""
+Tests pour les notifications des appels d'offres
+"""
+import uuid
+
+import pytest
+
+from app.config import settings
+from app.models.tender import ExpressionOfInterest, Bid, BidStatus, TenderNotification, TenderStatus
+from app.services import notifications
+from app.services.cache import MemoryCache
+from app.services.notifications import NotificationService, UnreadCountCache
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    """Cache mémoire isolé pour le compteur de non lues"""
+    cache = MemoryCache()
+    monkeypatch.setattr(notifications, "get_cache", lambda: cache)
+    return cache
+
+
+def add_participant(db_session, supplier_factory, tender, with_bid=False) -> uuid.UUID:
+    """Fournisseur ayant manifesté son intérêt (et soumis une offre) ; retourne son compte"""
+    supplier = supplier_factory()
+    db_session.add(ExpressionOfInterest(tender_id=tender.id, supplier_id=supplier.id, status="active"))
+    if with_bid:
+        db_session.add(Bid(
+            tender_id=tender.id,
+            supplier_id=supplier.id,
+            bid_reference=f"BID-TEST-{str(uuid.uuid4())[:8].upper()}",
+            status=BidStatus.SUBMITTED
+        ))
+    db_session.commit()
+    return supplier.user_id
+
+
+class TestNotificationType:
+    """Type de notification déclenché par un changement de statut"""
+
+    def test_status_changes(self):
+        assert NotificationService.notification_type_for(TenderStatus.DRAFT, TenderStatus.PUBLISHED) == "published"
+        assert NotificationService.notification_type_for(TenderStatus.OPEN, TenderStatus.CLOSED) == "closed"
+        assert NotificationService.notification_type_for(None, TenderStatus.CANCELLED) == "cancelled"
+
+    def test_no_duplicate_or_silent_transition(self):
+        """Publié -> ouvert ne renotifie pas ; brouillon et évalué ne notifient pas"""
+        assert NotificationService.notification_type_for(TenderStatus.PUBLISHED, TenderStatus.OPEN) is None
+        assert NotificationService.notification_type_for(None, TenderStatus.DRAFT) is None
+        assert NotificationService.notification_type_for(TenderStatus.CLOSED, TenderStatus.EVALUATED) is None
+
+    def test_every_notification_type_has_a_template(self):
+        assert set(notifications.STATUS_NOTIFICATIONS.values()) == set(notifications.NOTIFICATION_TEMPLATES)
+
+
+class TestDeliver:
+    """Création des notifications d'un événement"""
+
+    def test_participants_notified_by_chunks(self, db_session, tender_factory, supplier_factory, memory_cache, monkeypatch):
+        """Un participant avec manifestation et offre est notifié une fois ; blocs de taille bornée"""
+        monkeypatch.setattr(settings, "NOTIFICATION_CHUNK_SIZE", 2)
+        tender = tender_factory(TenderStatus.CLOSED)
+        user_ids = {add_participant(db_session, supplier_factory, tender, with_bid=i == 0) for i in range(5)}
+        chunks = []
+        insert_notifications = NotificationService.insert_notifications
+
+        def spy(db, tender_id, notification_type, title, message, chunk):
+            chunks.append(len(chunk))
+            insert_notifications(db, tender_id, notification_type, title, message, chunk)
+
+        monkeypatch.setattr(NotificationService, "insert_notifications", staticmethod(spy))
+
+        assert NotificationService.deliver(db_session, tender.id, "closed") == 5
+        assert chunks == [2, 2, 1]
+        rows = db_session.query(TenderNotification).all()
+        assert {row.user_id for row in rows} == user_ids
+        assert rows[0].title == f"Appel d'offres {tender.reference} clôturé"
+
+    def test_replay_does_not_duplicate(self, db_session, tender_factory, supplier_factory, memory_cache):
+        """Un événement rejoué ne notifie que les nouveaux destinataires"""
+        tender = tender_factory(TenderStatus.CLOSED)
+        add_participant(db_session, supplier_factory, tender)
+        add_participant(db_session, supplier_factory, tender)
+
+        assert NotificationService.deliver(db_session, tender.id, "closed") == 2
+        assert NotificationService.deliver(db_session, tender.id, "closed") == 0
+        add_participant(db_session, supplier_factory, tender)
+        assert NotificationService.deliver(db_session, tender.id, "closed") == 1
+        assert db_session.query(TenderNotification).count() == 3
+
+    def test_unknown_tender(self, db_session, memory_cache):
+        assert NotificationService.deliver(db_session, uuid.uuid4(), "closed") == 0
+
+
+class TestUnreadCount:
+    """Compteur de non lues mis en cache"""
+
+    def test_delivery_invalidates_cached_count(self, db_session, tender_factory, supplier_factory, memory_cache):
+        tender = tender_factory(TenderStatus.CLOSED)
+        user_id = add_participant(db_session, supplier_factory, tender)
+
+        assert NotificationService.get_unread_count(db_session, user_id) == 0
+        assert UnreadCountCache.get(user_id) == 0
+
+        NotificationService.deliver(db_session, tender.id, "closed")
+        assert UnreadCountCache.get(user_id) is None
+        assert NotificationService.get_unread_count(db_session, user_id) == 1
+
+    def test_mark_read_invalidates_cached_count(self, db_session, tender_factory, supplier_factory, memory_cache):
+        tender = tender_factory(TenderStatus.CLOSED)
+        user_id = add_participant(db_session, supplier_factory, tender)
+        NotificationService.deliver(db_session, tender.id, "closed")
+        notification = db_session.query(TenderNotification).one()
+
+        assert NotificationService.get_unread_count(db_session, user_id) == 1
+        NotificationService.mark_read(db_session, user_id, notification.id)
+        assert UnreadCountCache.get(user_id) is None
+        assert NotificationService.get_unread_count(db_session, user_id) == 0
@@ -0,0 +1,117 @@
+"""
+Tests pour le planificateur du cycle de vie des appels d'offres
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.tender import Bid, BidStatus, ExpressionOfInterest, TenderStatus
+from app.services import scheduler as scheduler_module
+from app.services import tender_events
+from app.services.scheduler import TenderLifecycleScheduler, to_epoch
+from app.services.tender import TenderService
+
+
+class TestTenderScheduler:
+    """Tests pour le tas des transitions"""
+
+    def test_naive_dates_are_utc(self):
+        """Les dates naïves sont interprétées en UTC"""
+        naive = datetime(2026, 10, 19, 12, 0, 0)
+        aware = naive.replace(tzinfo=timezone.utc)
+        assert to_epoch(naive) == to_epoch(aware)
+
+    def test_transitions_by_status(self):
+        """Publié : ouverture et clôture ; ouvert : clôture ; brouillon : rien"""
+        scheduler = TenderLifecycleScheduler()
+        opening = datetime(2026, 10, 20, 8, 0, 0)
+        closing = datetime(2026, 10, 30, 17, 0, 0)
+
+        scheduler._push("published", TenderStatus.PUBLISHED, opening, closing)
+        scheduler._push("open", TenderStatus.OPEN, opening, closing)
+        scheduler._push("draft", TenderStatus.DRAFT, opening, closing)
+
+        assert sorted((transition, tender_id) for _, transition, tender_id in scheduler.heap) == [
+            ("close", "open"), ("close", "published"), ("open", "published")
+        ]
+
+    def test_pop_due_groups_by_transition(self):
+        """Seules les entrées échues sont retirées, regroupées par transition"""
+        scheduler = TenderLifecycleScheduler()
+        scheduler._push("a", TenderStatus.OPEN, None, datetime(2026, 10, 19, 10, 0, 0))
+        scheduler._push("b", TenderStatus.PUBLISHED, datetime(2026, 10, 19, 9, 0, 0), datetime(2026, 10, 25))
+        scheduler._push("c", TenderStatus.OPEN, None, datetime(2026, 10, 19, 11, 0, 0))
+
+        due = scheduler._pop_due(to_epoch(datetime(2026, 10, 19, 10, 30, 0)))
+
+        assert due == {"open": {"b"}, "close": {"a"}}
+        assert len(scheduler.heap) == 2
+
+
+class TestApplyDue:
+    """Tests des transitions échues appliquées sur la base"""
+
+    def test_due_transitions_applied_and_stale_entries_skipped(self, db_session, tender_factory, monkeypatch):
+        """Les gardes de statut et de date écartent les entrées obsolètes"""
+        now = datetime.utcnow()
+        past, future = now - timedelta(minutes=5), now + timedelta(days=2)
+        closing = tender_factory(TenderStatus.OPEN, closing_date=past)
+        opening = tender_factory(TenderStatus.PUBLISHED, opening_date=past)
+        # Clôture repoussée après la mise en tas
+        postponed = tender_factory(TenderStatus.OPEN, closing_date=future)
+        # Annulé après la mise en tas
+        cancelled = tender_factory(TenderStatus.CANCELLED, closing_date=past)
+
+        enqueued, published = [], []
+        monkeypatch.setattr(
+            scheduler_module.notification_pipeline, "enqueue",
+            lambda tender_id, notification_type: enqueued.append((tender_id, notification_type))
+        )
+        monkeypatch.setattr(tender_events.tender_broadcaster, "publish", published.append)
+
+        scheduler = TenderLifecycleScheduler()
+        scheduler.session_factory = sessionmaker(bind=db_session.get_bind())
+        changed = scheduler.apply_due({
+            "open": {opening.id},
+            "close": {closing.id, postponed.id, cancelled.id}
+        })
+
+        assert changed == {"open": [opening.id], "close": [closing.id]}
+        db_session.expire_all()
+        assert opening.status == TenderStatus.OPEN
+        assert closing.status == TenderStatus.CLOSED
+        assert postponed.status == TenderStatus.OPEN
+        assert cancelled.status == TenderStatus.CANCELLED
+
+        # Publié -> ouvert ne renotifie pas ; la clôture notifie les participants
+        assert enqueued == [(closing.id, "closed")]
+        assert sorted(event["status"] for event in published) == ["closed", "open"]
+
+
+class TestCounterReconciliation:
+    """Tests pour le recalcul périodique de eoi_count / bids_count"""
+
+    def test_drifted_counters_corrected(self, db_session, tender_factory):
+        """Seuls les AO dont les compteurs ont dérivé sont corrigés"""
+        drifted = tender_factory(eoi_count=5, bids_count=0)
+        exact = tender_factory(eoi_count=1, bids_count=1)
+        for tender in (drifted, exact):
+            db_session.add(ExpressionOfInterest(tender_id=tender.id, supplier_id=uuid.uuid4(), status="active"))
+            db_session.add(Bid(
+                tender_id=tender.id,
+                supplier_id=uuid.uuid4(),
+                bid_reference=f"BID-TEST-{str(uuid.uuid4())[:8].upper()}",
+                status=BidStatus.SUBMITTED
+            ))
+        # Manifestation retirée : hors du compteur
+        db_session.add(ExpressionOfInterest(tender_id=drifted.id, supplier_id=uuid.uuid4(), status="withdrawn"))
+        db_session.commit()
+
+        assert TenderService.reconcile_counters(db_session) == {"checked": 2, "corrected": 1}
+        db_session.expire_all()
+        assert (drifted.eoi_count, drifted.bids_count) == (1, 1)
+        assert (exact.eoi_count, exact.bids_count) == (1, 1)
+
+        # Compteurs désormais exacts : rien à corriger
+        assert TenderService.reconcile_counters(db_session) == {"checked": 2, "corrected": 0}
@@ -0,0 +1,168 @@
+"""
+Tests pour la file d'écriture des soumissions d'offres
+"""
+import contextlib
+import queue
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.schemas.tender import BidCreate
+from app.services import submissions
+from app.services.submissions import BidSubmissionQueue, SubmissionJournal
+from app.services.tender import TenderService
+
+
+class FakeSession:
+    """Session minimale : savepoints sans effet, commits comptés"""
+
+    def __init__(self):
+        self.commits = 0
+
+    def begin_nested(self):
+        return contextlib.nullcontext()
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def receipts(monkeypatch):
+    """Accusés enregistrés, par identifiant"""
+    saved = {}
+    monkeypatch.setattr(
+        submissions.SubmissionReceiptStore, "save",
+        classmethod(lambda cls, receipt: saved.__setitem__(receipt["receipt_id"], dict(receipt)))
+    )
+    return saved
+
+
+def make_item(total_amount: float, received_at: datetime) -> dict:
+    return {
+        "receipt_id": str(uuid.uuid4()),
+        "operation": "create",
+        "supplier_id": str(uuid.uuid4()),
+        "tender_id": str(uuid.uuid4()),
+        "bid_id": None,
+        "status": "queued",
+        "received_at": received_at,
+        "processed_at": None,
+        "detail": None,
+        "bid_data": BidCreate(total_amount=total_amount)
+    }
+
+
+class TestBidSubmissionQueue:
+    """Tests pour le writer à commit groupé"""
+
+    def test_batch_commits_once_and_isolates_rejections(self, monkeypatch, receipts):
+        """Un lot est validé en un commit ; une demande refusée n'affecte pas les autres"""
+        received_at = datetime(2026, 10, 19, 16, 59, 58)
+        seen_received_at = []
+
+        def fake_create_bid(db, tender_id, supplier_id, bid_data, received_at=None, commit=True):
+            assert commit is False
+            seen_received_at.append(received_at)
+            if bid_data.total_amount < 0:
+                raise HTTPException(status_code=400, detail="Montant invalide")
+            return SimpleNamespace(id=uuid.uuid4())
+
+        monkeypatch.setattr(TenderService, "create_bid", staticmethod(fake_create_bid))
+        items = [make_item(1000.0, received_at), make_item(-1.0, received_at), make_item(2000.0, received_at)]
+        db = FakeSession()
+
+        BidSubmissionQueue().write_batch(db, items)
+
+        assert db.commits == 1
+        assert seen_received_at == [received_at] * 3
+        statuses = [receipts[item["receipt_id"]]["status"] for item in items]
+        assert statuses == ["committed", "rejected", "committed"]
+        assert receipts[items[1]["receipt_id"]]["detail"] == "Montant invalide"
+        assert all("bid_data" not in receipt for receipt in receipts.values())
+
+    def test_full_queue_is_refused(self, receipts, tmp_path):
+        """File pleine : 503 immédiat avec Retry-After, accusé marqué refusé"""
+        submission_queue = BidSubmissionQueue()
+        submission_queue.journal = SubmissionJournal(str(tmp_path))
+        submission_queue.journal.open()
+        submission_queue.queue = queue.Queue(maxsize=1)
+        submission_queue.queue.put({})
+        submission_queue._worker = object()  # writer considéré comme actif
+
+        with pytest.raises(HTTPException) as exc_info:
+            submission_queue.submit(
+                None, "create", uuid.uuid4(), datetime.utcnow(),
+                tender_id=uuid.uuid4(), bid_data=BidCreate(total_amount=1000.0)
+            )
+
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers["Retry-After"] == "5"
+        assert [receipt["status"] for receipt in receipts.values()] == ["rejected"]
+        # La demande refusée n'est pas rejouée
+        assert submission_queue.journal.pending == {}
+
+    def test_replayed_request_already_written_is_confirmed(self, monkeypatch, receipts):
+        """Demande rejouée après un arrêt brutal mais déjà écrite : confirmée, pas refusée"""
+        existing = SimpleNamespace(id=uuid.uuid4())
+
+        def fake_create_bid(db, tender_id, supplier_id, bid_data, received_at=None, commit=True):
+            raise HTTPException(status_code=400, detail="Vous avez déjà soumis une offre pour cet appel d'offres")
+
+        monkeypatch.setattr(TenderService, "create_bid", staticmethod(fake_create_bid))
+        monkeypatch.setattr(BidSubmissionQueue, "_already_applied", staticmethod(lambda db, item: existing))
+        fresh = make_item(1000.0, datetime.utcnow())
+        replayed = {**make_item(1000.0, datetime.utcnow()), "replayed": True}
+
+        BidSubmissionQueue().write_batch(FakeSession(), [fresh, replayed])
+
+        assert receipts[fresh["receipt_id"]]["status"] == "rejected"
+        assert receipts[replayed["receipt_id"]]["status"] == "committed"
+        assert receipts[replayed["receipt_id"]]["bid_id"] == str(existing.id)
+        assert "replayed" not in receipts[replayed["receipt_id"]]
+
+
+class TestSubmissionJournal:
+    """Tests pour le journal des demandes acceptées"""
+
+    def test_orphan_journal_is_replayed(self, tmp_path):
+        """Les demandes acceptées sans « done » d'un processus arrêté sont reprises"""
+        received_at = datetime(2026, 10, 19, 16, 59, 58)
+        crashed = SubmissionJournal(str(tmp_path))
+        crashed.open()
+        written, lost = make_item(1000.0, received_at), make_item(2000.0, received_at)
+        crashed.append(written)
+        crashed.append(lost)
+        crashed.mark_done([written["receipt_id"]])
+        # Arrêt brutal : verrou libéré sans fermeture propre
+        crashed.file.close()
+
+        recovered = SubmissionJournal(str(tmp_path)).open()
+
+        assert [item["receipt_id"] for item in recovered] == [lost["receipt_id"]]
+        assert recovered[0]["received_at"] == received_at
+        assert recovered[0]["bid_data"] == lost["bid_data"]
+        assert len(list(tmp_path.iterdir())) == 1
+
+    def test_live_journal_is_not_claimed(self, tmp_path):
+        """Le journal d'un processus en vie (verrouillé) n'est pas repris"""
+        live = SubmissionJournal(str(tmp_path))
+        live.open()
+        live.append(make_item(1000.0, datetime.utcnow()))
+
+        assert SubmissionJournal(str(tmp_path)).open() == []
+
+    def test_clean_close_removes_journal(self, tmp_path):
+        journal = SubmissionJournal(str(tmp_path))
+        journal.open()
+        item = make_item(1000.0, datetime.utcnow())
+        journal.append(item)
+        journal.mark_done([item["receipt_id"]])
+        journal.close()
+
+        assert list(tmp_path.iterdir()) == []
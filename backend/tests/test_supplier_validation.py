@@ -0,0 +1,79 @@
+"""
+Tests pour la validation groupée des fournisseurs
+"""
+import json
+import uuid
+
+from app.models.user import AuditLog, User, UserStatus
+from app.services.supplier import SupplierService
+
+
+def outcomes(results) -> dict:
+    return {str(result["supplier_id"]): result["outcome"] for result in results}
+
+
+class TestValidateSuppliersBulk:
+    """Transitions, cibles inchangées et cibles introuvables"""
+
+    def test_pending_suppliers_approved(self, db_session, supplier_factory):
+        """Les fournisseurs en attente sont activés, validés et audités"""
+        first = supplier_factory(UserStatus.PENDING_VALIDATION)
+        second = supplier_factory(UserStatus.PENDING_VALIDATION)
+
+        results = SupplierService.validate_suppliers_bulk(db_session, [first.id, second.id], "approve", "ok")
+
+        assert outcomes(results) == {str(first.id): "approved", str(second.id): "approved"}
+        db_session.expire_all()
+        for supplier in (first, second):
+            assert supplier.validated_by_admin is True
+            assert supplier.validation_notes == "ok"
+            assert db_session.get(User, supplier.user_id).status == UserStatus.ACTIVE.value
+        assert db_session.query(AuditLog).filter(AuditLog.action == "supplier_approved").count() == 2
+
+    def test_already_validated_is_unchanged(self, db_session, supplier_factory):
+        """Actif et déjà validé : aucune écriture ni ligne d'audit"""
+        supplier = supplier_factory(UserStatus.ACTIVE, validated_by_admin=True)
+
+        results = SupplierService.validate_suppliers_bulk(db_session, [supplier.id], "approve")
+
+        assert outcomes(results) == {str(supplier.id): "unchanged"}
+        assert db_session.query(AuditLog).count() == 0
+
+    def test_active_but_not_validated_is_approved(self, db_session, supplier_factory):
+        """Un statut actif sans validation administrateur n'est pas « inchangé »"""
+        supplier = supplier_factory(UserStatus.ACTIVE, validated_by_admin=False)
+
+        results = SupplierService.validate_suppliers_bulk(db_session, [supplier.id], "approve")
+
+        assert outcomes(results) == {str(supplier.id): "approved"}
+        db_session.expire_all()
+        assert supplier.validated_by_admin is True
+        audit = db_session.query(AuditLog).one()
+        assert json.loads(audit.old_values) == {"status": UserStatus.ACTIVE.value, "validated_by_admin": False}
+
+    def test_unknown_supplier_not_found(self, db_session):
+        """Un identifiant inconnu est signalé sans faire échouer le lot"""
+        missing = uuid.uuid4()
+
+        results = SupplierService.validate_suppliers_bulk(db_session, [missing], "reject")
+
+        assert results == [{"supplier_id": missing, "outcome": "not_found"}]
+
+    def test_mixed_batch(self, db_session, supplier_factory):
+        """Lot mixte : rejet, inchangé, introuvable et doublon ignoré"""
+        pending = supplier_factory(UserStatus.PENDING_VALIDATION)
+        rejected = supplier_factory(UserStatus.REJECTED, validated_by_admin=False)
+        active = supplier_factory(UserStatus.ACTIVE, validated_by_admin=True)
+        missing = uuid.uuid4()
+
+        results = SupplierService.validate_suppliers_bulk(
+            db_session, [pending.id, rejected.id, active.id, missing, pending.id], "reject", "incomplet"
+        )
+
+        assert [result["outcome"] for result in results] == ["rejected", "unchanged", "rejected", "not_found"]
+        db_session.expire_all()
+        assert db_session.get(User, pending.user_id).status == UserStatus.REJECTED.value
+        assert db_session.get(User, active.user_id).status == UserStatus.REJECTED.value
+        assert active.validated_by_admin is False
+        assert rejected.validation_notes is None
+        assert db_session.query(AuditLog).filter(AuditLog.action == "supplier_rejected").count() == 2
@@ -0,0 +1,99 @@
+"""
+Tests pour la diffusion des changements d'appels d'offres (SSE)
+"""
+import asyncio
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.config import settings
+from app.models.tender import TenderStatus
+from app.services.tender_events import (
+    PENDING_EVENTS_KEY, TenderEventBroadcaster, format_sse, record_after_commit, tender_event
+)
+
+
+def make_tender(status=TenderStatus.OPEN, category="medicaments"):
+    return SimpleNamespace(
+        id="11111111-1111-1111-1111-111111111111",
+        reference="AO-2026-001",
+        category=category,
+        status=status,
+        closing_date=datetime(2026, 11, 30, 12, 0)
+    )
+
+
+class TestTenderEvent:
+    """Construction des événements"""
+
+    def test_draft_is_not_broadcast(self):
+        assert tender_event("updated", make_tender(status=TenderStatus.DRAFT)) is None
+
+    def test_event_fields(self):
+        event = tender_event("counters", make_tender(), bids_count=3)
+        assert event["event"] == "counters"
+        assert event["status"] == "open"
+        assert event["closing_date"] == "2026-11-30T12:00:00"
+        assert event["bids_count"] == 3
+
+    def test_format_sse(self):
+        event = tender_event("status", make_tender())
+        message = format_sse(event)
+        assert message.startswith("event: status\ndata: ")
+        assert message.endswith("\n\n")
+        assert json.loads(message.split("data: ", 1)[1]) == event
+
+
+class TestBroadcaster:
+    """Répartition locale entre les clients"""
+
+    def test_filters_by_tender_and_category(self):
+        async def scenario():
+            broadcaster = TenderEventBroadcaster()
+            by_tender = broadcaster.subscribe(["11111111-1111-1111-1111-111111111111"], [])
+            by_category = broadcaster.subscribe([], ["consommables"])
+            everything = broadcaster.subscribe([], [])
+            broadcaster.publish(tender_event("created", make_tender()))
+            await asyncio.sleep(0)
+            return by_tender.queue.qsize(), by_category.queue.qsize(), everything.queue.qsize()
+
+        assert asyncio.run(scenario()) == (1, 0, 1)
+
+    def test_slow_client_is_marked_lagging(self, monkeypatch):
+        monkeypatch.setattr(settings, "TENDER_EVENTS_CLIENT_QUEUE", 2)
+        broadcaster = TenderEventBroadcaster()
+
+        async def scenario():
+            subscriber = broadcaster.subscribe([], [])
+            for _ in range(3):
+                broadcaster.publish(tender_event("updated", make_tender()))
+            await asyncio.sleep(0)
+            return subscriber
+
+        subscriber = asyncio.run(scenario())
+        assert subscriber.lagging
+        assert subscriber.queue.qsize() == 2
+
+    def test_max_clients(self, monkeypatch):
+        monkeypatch.setattr(settings, "TENDER_EVENTS_MAX_CLIENTS", 1)
+
+        async def scenario():
+            broadcaster = TenderEventBroadcaster()
+            first = broadcaster.subscribe([], [])
+            second = broadcaster.subscribe([], [])
+            broadcaster.unsubscribe(first)
+            return second, broadcaster.subscribe([], [])
+
+        refused, accepted = asyncio.run(scenario())
+        assert refused is None
+        assert accepted is not None
+
+
+class TestRecordAfterCommit:
+    """Événements attachés à la transaction en cours"""
+
+    def test_events_kept_until_commit(self):
+        session = SimpleNamespace(info={})
+        record_after_commit(session, tender_event("counters", make_tender(), eoi_count=1))
+        record_after_commit(session, None)
+        assert len(session.info[PENDING_EVENTS_KEY]) == 1
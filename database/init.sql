@@ -188,6 +188,7 @@ CREATE TABLE IF NOT EXISTS tender_documents (
     file_path VARCHAR(500) NOT NULL,
     file_size INTEGER,
     mime_type VARCHAR(100),
+    sha256 VARCHAR(64),
     is_public BOOLEAN DEFAULT TRUE,
     requires_authentication BOOLEAN DEFAULT FALSE,
     uploaded_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
@@ -202,6 +203,7 @@ CREATE TABLE IF NOT EXISTS bid_documents (
     file_path VARCHAR(500) NOT NULL,
     file_size INTEGER,
     mime_type VARCHAR(100),
+    sha256 VARCHAR(64),
     is_validated BOOLEAN DEFAULT FALSE,
     validation_notes TEXT,
     validated_by UUID REFERENCES users(id),
@@ -326,10 +328,15 @@ CREATE INDEX IF NOT EXISTS idx_bids_tender_id ON bids(tender_id);
 CREATE INDEX IF NOT EXISTS idx_bids_supplier_id ON bids(supplier_id);
 CREATE INDEX IF NOT EXISTS idx_bids_status ON bids(status);
 CREATE INDEX IF NOT EXISTS idx_bids_bid_reference ON bids(bid_reference);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_bids_tender_supplier ON bids(tender_id, supplier_id);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_expressions_of_interest_tender_supplier_active ON expressions_of_interest(tender_id, supplier_id) WHERE status = 'active';
 CREATE INDEX IF NOT EXISTS idx_tender_documents_tender_id ON tender_documents(tender_id);
 CREATE INDEX IF NOT EXISTS idx_bid_documents_bid_id ON bid_documents(bid_id);
+CREATE INDEX IF NOT EXISTS ix_tender_documents_sha256 ON tender_documents(sha256);
+CREATE INDEX IF NOT EXISTS ix_bid_documents_sha256 ON bid_documents(sha256);
 CREATE INDEX IF NOT EXISTS idx_tender_notifications_tender_id ON tender_notifications(tender_id);
 CREATE INDEX IF NOT EXISTS idx_tender_notifications_user_id ON tender_notifications(user_id);
+CREATE INDEX IF NOT EXISTS idx_tender_notifications_user_unread ON tender_notifications(user_id, is_read);
 
 -- Index pour l'évaluation IA des fournisseurs
 CREATE INDEX IF NOT EXISTS idx_suppliers_ai_supplier_id ON suppliers_ai(supplier_id);